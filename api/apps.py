@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Registra los receptores que invalidan las versiones usadas en las peticiones condicionales.
+        from api.signals import connect_signals
+        connect_signals()
@@ -0,0 +1,72 @@
+import weakref
+
+from django.db import connection, transaction
+
+
+class _Batch:
+    """
+    Elementos acumulados en una transacción y callback de commit que los procesa.
+    """
+
+    def __init__(self, flush):
+        self.flush = flush
+        self.items = set()
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        if self.items:
+            self.flush(self.items)
+
+
+class CommitBatch:
+    """
+    Acumula elementos durante la transacción en curso y los procesa juntos, con un único callback
+    `transaction.on_commit`, al confirmarse.
+
+    El lote vive solo en la lista de callbacks de la conexión; la conexión guarda una referencia débil a él.
+    Si la transacción (o el savepoint en el que se registró el callback) se revierte, Django descarta el
+    callback, el lote deja de existir y el siguiente `add` empieza uno nuevo; además, un lote no se reutiliza
+    fuera del bloque atómico en el que se creó. Así no hace falta inspeccionar la lista interna de callbacks
+    de la conexión.
+
+    Fuera de una transacción `on_commit` ejecuta el callback al momento, así que `add` procesa los
+    elementos inmediatamente.
+
+    Attributes:
+        name (str): Nombre del lote, único por conexión.
+        flush (callable): Recibe el conjunto de elementos acumulados al confirmarse la transacción.
+    """
+
+    def __init__(self, name, flush):
+        self.name = name
+        self.flush = flush
+        self._attribute = f'_commit_batch_{name}'
+
+    def _current(self):
+        reference = getattr(connection, self._attribute, None)
+        batch = reference() if reference is not None else None
+        # Fuera de una transacción el lote anterior ya se procesó o se revirtió.
+        if batch is None or batch.done or not connection.in_atomic_block:
+            return None
+        return batch
+
+    def add(self, items):
+        """
+        Añade `items` al lote de la transacción en curso, registrando su callback si es el primero.
+        """
+        batch = self._current()
+        if batch is None:
+            batch = _Batch(self.flush)
+            setattr(connection, self._attribute, weakref.ref(batch))
+            batch.items.update(items)
+            transaction.on_commit(batch)
+        else:
+            batch.items.update(items)
+
+    def pending(self):
+        """
+        Elementos añadidos en la transacción en curso que todavía no se han confirmado.
+        """
+        batch = self._current()
+        return set(batch.items) if batch is not None else set()
@@ -0,0 +1,211 @@
+from datetime import datetime
+from operator import attrgetter
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist
+from django.db import models
+from django.db.models.manager import BaseManager
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.fields import SkipField, get_attribute
+from rest_framework.relations import ManyRelatedField, PKOnlyObject, PrimaryKeyRelatedField
+from rest_framework.settings import api_settings
+
+# Campo del serializer -> columnas del modelo para las que su `to_representation` devuelve tal cual el
+# valor leído de la base de datos (`int(int)`, `str(str)`, `bool(bool)`).
+IDENTITY_FIELDS = (
+    (serializers.IntegerField, (models.IntegerField, models.AutoField)),
+    (serializers.CharField, (models.CharField, models.TextField)),
+    (serializers.BooleanField, (models.BooleanField,)),
+)
+
+
+def _is_plain_pk_field(field):
+    return (
+        isinstance(field, PrimaryKeyRelatedField)
+        and field.pk_field is None
+        and type(field).to_representation is PrimaryKeyRelatedField.to_representation
+    )
+
+
+def _is_identity(field, model_field):
+    if isinstance(field, serializers.JSONField):
+        return not field.binary
+    return any(
+        type(field) is field_class and isinstance(model_field, column_classes)
+        for field_class, column_classes in IDENTITY_FIELDS
+    )
+
+
+def _model_field(model, field):
+    """
+    Campo concreto del modelo al que apunta `field`, o `None` si su `source` no es un campo simple.
+    """
+    if model is None or len(field.source_attrs) != 1:
+        return None
+    try:
+        model_field = model._meta.get_field(field.source_attrs[0])
+    except FieldDoesNotExist:
+        return None
+    return model_field if getattr(model_field, 'concrete', False) else None
+
+
+def _getter(field):
+    """
+    Acceso al `source` de un campo. Con un solo atributo se usa `attrgetter`; como en `get_attribute` de
+    DRF, una relación inversa uno a uno inexistente se lee como `None`.
+    """
+    if len(field.source_attrs) != 1:
+        attrs = field.source_attrs
+        return lambda instance: get_attribute(instance, attrs)
+    get = attrgetter(field.source_attrs[0])
+
+    def read(instance):
+        try:
+            return get(instance)
+        except ObjectDoesNotExist:
+            return None
+    return read
+
+
+def _datetime(field, model_field):
+    """
+    `DateTimeField.to_representation` en ISO 8601 con la zona horaria resuelta una sola vez, o `None` si el
+    campo usa otro formato (en ese caso se usa el camino genérico).
+    """
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or field_timezone is None:
+        return None
+    get = attrgetter(model_field.attname)
+
+    def represent(instance):
+        value = get(instance)
+        if value is None:
+            return None
+        if not isinstance(value, datetime) or not timezone.is_aware(value):
+            return field.to_representation(value)
+        try:
+            value = value.astimezone(field_timezone).isoformat()
+        except (OverflowError, ValueError):
+            return field.to_representation(value)
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return represent
+
+
+def _generic(field):
+    # Misma secuencia que `Serializer.to_representation` para un campo cualquiera.
+    def represent(instance):
+        attribute = field.get_attribute(instance)
+        check_for_none = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+        return None if check_for_none is None else field.to_representation(attribute)
+    return represent
+
+
+def _nested_list(field):
+    child = CompiledSerializer(field.child)
+    prime = getattr(field, 'prime', None)
+    get = _getter(field)
+
+    def represent(instance):
+        items = get(instance)
+        if items is None:
+            return None
+        items = list(items.all()) if isinstance(items, BaseManager) else list(items)
+        if prime is not None:
+            prime(items)
+        return [child.to_representation(item) for item in items]
+    return represent
+
+
+def _nested(field):
+    child = CompiledSerializer(field)
+    get = _getter(field)
+
+    def represent(instance):
+        attribute = get(instance)
+        return None if attribute is None else child.to_representation(attribute)
+    return represent
+
+
+def _compile_field(field, model):
+    """
+    Devuelve la función `instancia -> valor` de un campo ya ligado a su serializer.
+
+    Los casos frecuentes (columnas simples, claves ajenas, listas de ids y serializers anidados) se
+    resuelven con un acceso directo al atributo; el resto usa la maquinaria del propio campo.
+    """
+    if isinstance(field, serializers.SerializerMethodField):
+        return getattr(field.parent, field.method_name)
+    if field.source == '*':
+        return field.to_representation
+    if isinstance(field, serializers.ListSerializer):
+        return _nested_list(field)
+    if isinstance(field, serializers.BaseSerializer):
+        return _nested(field)
+
+    model_field = _model_field(model, field)
+    if isinstance(field, ManyRelatedField) and _is_plain_pk_field(field.child_relation):
+        get = _getter(field)
+        # Como `ManyRelatedField.get_attribute`: un objeto sin guardar no tiene relaciones.
+        return lambda instance: [] if instance.pk is None else [item.pk for item in get(instance).all()]
+    if model_field is not None and _is_plain_pk_field(field) and field.use_pk_only_optimization():
+        # Como `PKOnlyObject`: la clave ajena se lee de la columna `<campo>_id`, sin cargar el objeto.
+        return attrgetter(model_field.attname)
+    if model_field is not None and _is_identity(field, model_field):
+        return attrgetter(model_field.attname)
+    if model_field is not None and type(field) is serializers.DateTimeField:
+        represent = _datetime(field, model_field)
+        if represent is not None:
+            return represent
+    return _generic(field)
+
+
+class CompiledSerializer:
+    """
+    Plan de serialización de solo lectura compilado a partir de un serializer de DRF ya construido.
+
+    Cada campo legible se traduce una vez en una función de acceso (atributo, columna `_id`, lista de ids
+    precargados, fecha ISO 8601 o serializer anidado compilado) y cada objeto se convierte con un bucle sobre esas
+    funciones, sin pasar por `get_attribute`/`to_representation` de cada campo. La salida es idéntica a
+    la de `serializer.to_representation`: mismos campos, orden y valores.
+
+    Args:
+        serializer (Serializer): Serializer (con sus campos ya recortados por `api.fieldsets`, si procede).
+    """
+
+    def __init__(self, serializer):
+        model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+        self.plan = [(field.field_name, _compile_field(field, model)) for field in serializer._readable_fields]
+
+    def to_representation(self, instance):
+        ret = {}
+        for name, represent in self.plan:
+            try:
+                ret[name] = represent(instance)
+            except SkipField:
+                pass
+        return ret
+
+
+class CompiledListSerializer(serializers.ListSerializer):
+    """
+    `ListSerializer` que serializa sus elementos con un `CompiledSerializer` del hijo.
+
+    Las subclases preparan en `prime` lo que necesiten en bloque (por ejemplo las imágenes de la página)
+    antes de serializar; el mismo `prime` se invoca cuando la lista va anidada en otro serializer compilado.
+    `COMPILED_SERIALIZERS = False` vuelve al camino estándar de DRF.
+    """
+
+    def prime(self, items):
+        """
+        Carga en bloque los datos auxiliares de `items` antes de serializarlos.
+        """
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, BaseManager) else data)
+        self.prime(items)
+        if not getattr(settings, 'COMPILED_SERIALIZERS', True):
+            return super().to_representation(items)
+        compiled = CompiledSerializer(self.child)
+        return [compiled.to_representation(item) for item in items]
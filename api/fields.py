@@ -0,0 +1,30 @@
+from django.db import router
+from rest_framework import serializers
+
+
+class ReferencePrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    `PrimaryKeyRelatedField` que valida los ids contra una tabla de `api.reference_cache`.
+
+    Si el id está en la tabla se devuelve una instancia con solo la clave primaria cargada (el resto de
+    campos se difiere), sin consultar la base de datos. Los ids que no están en la tabla (por ejemplo
+    ingredientes sin aprobar) se resuelven con el queryset del campo, como en `PrimaryKeyRelatedField`.
+
+    Args:
+        reference_table (ReferenceTable): Tabla de referencia con las filas válidas.
+    """
+
+    def __init__(self, reference_table=None, **kwargs):
+        self.reference_table = reference_table
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if self.reference_table is not None and not isinstance(data, bool):
+            try:
+                pk = int(data)
+            except (TypeError, ValueError):
+                pk = None
+            if pk is not None and self.reference_table.get(pk) is not None:
+                model = self.get_queryset().model
+                return model.from_db(router.db_for_read(model), [model._meta.pk.attname], [pk])
+        return super().to_internal_value(data)
@@ -0,0 +1,149 @@
+from rest_framework import serializers
+
+FIELDS_PARAM = 'fields'
+INCLUDE_PARAM = 'include'
+EXCLUDE_PARAM = 'exclude'
+
+
+def parse_field_list(value):
+    """
+    Convierte una lista de campos separados por comas, con puntos para los anidados, en un árbol.
+
+    `'id,name,steps.description,steps.order'` -> `{'id': None, 'name': None, 'steps': {'description': None, 'order': None}}`.
+    Un valor `None` significa "el campo completo".
+    """
+    tree = {}
+    for item in value.split(','):
+        path = [part for part in item.strip().split('.') if part]
+        if not path:
+            continue
+        node = tree
+        for part in path[:-1]:
+            child = node.get(part)
+            if child is None:
+                # `steps` y `steps.order` a la vez: gana la forma más restrictiva.
+                child = node[part] = {}
+            node = child
+        node.setdefault(path[-1], None)
+    return tree
+
+
+class FieldSelection:
+    """
+    Forma de la respuesta pedida con `?fields=`, `?include=` y `?exclude=` para un nivel de serializer.
+
+    - `fields`: campos a devolver (el resto se omite).
+    - `include`: relaciones anidadas a devolver; las no indicadas se omiten y no se consultan.
+    - `exclude`: campos o relaciones a omitir.
+
+    `id` se conserva siempre, en todos los niveles: las etiquetas de la caché de respuestas y los
+    clientes identifican cada objeto por él.
+
+    Las tres admiten rutas con puntos (`fields=id,steps.description`) que se aplican al serializer anidado.
+
+    Attributes:
+        fields (dict | None): Árbol de campos pedidos o `None` si no se restringe.
+        include (dict | None): Árbol de relaciones pedidas o `None` si no se restringe.
+        exclude (dict): Árbol de campos omitidos.
+    """
+
+    def __init__(self, fields=None, include=None, exclude=None):
+        self.fields = fields
+        self.include = include
+        self.exclude = exclude or {}
+
+    @classmethod
+    def from_request(cls, request):
+        """
+        Lee la selección de los parámetros de una lectura. Devuelve `None` si no hay selección o si la
+        petición es una escritura: recortar campos en ella dejaría sin validar los datos recibidos.
+        """
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return None
+        params = request.query_params
+        values = [params.get(name) for name in (FIELDS_PARAM, INCLUDE_PARAM, EXCLUDE_PARAM)]
+        if not any(values):
+            return None
+        return cls(*(parse_field_list(value) if value else None for value in values))
+
+    def child(self, name):
+        """
+        Selección aplicable al serializer anidado en `name`, o `None` si se devuelve completo.
+        """
+        fields = (self.fields or {}).get(name)
+        include = (self.include or {}).get(name)
+        exclude = self.exclude.get(name)
+        if not (fields or include or exclude):
+            return None
+        return FieldSelection(fields, include, exclude)
+
+    def keeps(self, name, relation=False):
+        """
+        Indica si el campo `name` forma parte de la respuesta. `relation` marca las relaciones anidadas,
+        que son las únicas a las que afecta `include`.
+        """
+        if name == 'id':
+            return True
+        if name in self.exclude and self.exclude[name] is None:
+            return False
+        if self.fields is not None and name not in self.fields:
+            return False
+        if relation and self.include is not None and name not in self.include:
+            return False
+        return True
+
+
+class DynamicFieldsMixin:
+    """
+    Permite a un serializer devolver solo la forma pedida con `api.fieldsets.FieldSelection`.
+
+    El serializer raíz lee la selección de la petición (solo en lecturas) y la reparte a sus serializers
+    anidados, que la aplican a su vez si también usan este mixin. Los campos omitidos no llegan a
+    evaluarse, por lo que sus consultas (imágenes, relaciones) tampoco se hacen.
+
+    Attributes:
+        relation_fields (tuple[str]): Campos con relaciones anidadas, afectados por `?include=`.
+    """
+    relation_fields = ()
+
+    def __init__(self, *args, field_selection=None, **kwargs):
+        self._field_selection = field_selection
+        super().__init__(*args, **kwargs)
+
+    @property
+    def field_selection(self):
+        if self._field_selection is not None:
+            return self._field_selection
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if parent is None:
+            return FieldSelection.from_request(self.context.get('request'))
+        return None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selection = self.field_selection
+        if selection is None:
+            return fields
+        for name in list(fields):
+            if not selection.keeps(name, relation=name in self.relation_fields):
+                del fields[name]
+                continue
+            nested = fields[name]
+            if isinstance(nested, serializers.ListSerializer):
+                nested = nested.child
+            if isinstance(nested, DynamicFieldsMixin):
+                nested._field_selection = selection.child(name)
+        return fields
+
+
+def selected_relations(request, relation_fields):
+    """
+    Devuelve las relaciones de `relation_fields` que forman parte de la respuesta pedida en `request`.
+    Los ViewSets la usan para adaptar el plan de precarga del queryset a la forma de la respuesta.
+    """
+    selection = FieldSelection.from_request(request)
+    if selection is None:
+        return list(relation_fields)
+    return [name for name in relation_fields if selection.keeps(name, relation=True)]
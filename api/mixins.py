@@ -0,0 +1,223 @@
+import hashlib
+import json
+
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from api import response_cache
+from api.versioning import get_versions
+
+
+class NotModified(APIException):
+    """
+    Se lanza desde `ConditionalGetMixin.initial` cuando los validadores del cliente siguen vigentes.
+    """
+    status_code = status.HTTP_304_NOT_MODIFIED
+    default_detail = 'Not modified.'
+    default_code = 'not_modified'
+
+
+class ConditionalGetMixin:
+    """
+    Añade peticiones condicionales (ETag / Last-Modified) a las lecturas de un ViewSet.
+
+    Los validadores se calculan a partir de las versiones de `api.versioning`, sin tocar el queryset
+    ni el serializador: si el cliente envía un `If-None-Match` (o, en su defecto, un `If-Modified-Since`)
+    que sigue vigente se responde 304 antes de ejecutar la acción.
+
+    El ETag combina las versiones de los ámbitos con la URL completa (filtros y página), el usuario y el
+    formato de respuesta, ya que todos ellos cambian el cuerpo.
+
+    Attributes:
+        conditional_scopes (tuple[str]): Ámbitos de versión de los que dependen las respuestas.
+        conditional_actions (tuple[str]): Acciones que admiten peticiones condicionales.
+    """
+    conditional_scopes = ()
+    conditional_actions = ('list', 'retrieve')
+
+    def initial(self, request, *args, **kwargs):
+        self.validators = None
+        super().initial(request, *args, **kwargs)
+        if request.method not in ('GET', 'HEAD') or self.action not in self.conditional_actions:
+            return
+        self.validators = self.get_validators(request)
+        if self.is_not_modified(request, *self.validators):
+            raise NotModified()
+
+    def get_validators(self, request):
+        """
+        Devuelve `(etag, last_modified)` de la petición actual con una sola lectura de la caché de versiones.
+        """
+        tokens, last_modified = get_versions(self.conditional_scopes)
+        user = request.user
+        parts = [
+            *tokens,
+            request.get_full_path(),
+            str(user.pk) if user.is_authenticated else 'anonymous',
+            'staff' if user.is_staff else 'public',
+            request.accepted_media_type or '',
+        ]
+        digest = hashlib.sha1('|'.join(parts).encode()).hexdigest()
+        # Last-Modified tiene resolución de segundos: se redondea hacia arriba para no anunciar una
+        # fecha anterior al cambio.
+        return f'"{digest}"', int(last_modified) + 1 if last_modified else None
+
+    def is_not_modified(self, request, etag, last_modified):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            # La comparación es débil (RFC 9110 §13.1.2): se ignora el prefijo W/.
+            etags = {tag.removeprefix('W/') for tag in parse_etags(if_none_match)}
+            return '*' in etags or etag in etags
+        if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+        return bool(if_modified_since and last_modified and last_modified <= if_modified_since)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=exc.status_code)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, 'validators', None)
+        if validators and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            etag, last_modified = validators
+            response['ETag'] = etag
+            if last_modified:
+                response['Last-Modified'] = http_date(last_modified)
+            # El cliente puede guardar la respuesta, pero debe revalidarla en cada uso.
+            response['Cache-Control'] = 'private, no-cache' if request.user.is_authenticated else 'no-cache'
+            patch_vary_headers(response, ('Accept', 'Authorization'))
+        return response
+
+
+class ReferenceReadMixin:
+    """
+    Sirve el listado completo y el detalle de un ViewSet desde una tabla de `api.reference_cache`.
+
+    Solo se usa la tabla cuando la respuesta coincide con ella: listados sin parámetros de consulta
+    (sin filtros ni paginación) y detalles cuyo id está en la tabla. En cualquier otro caso se delega
+    en la implementación del ViewSet.
+
+    Attributes:
+        reference_table (ReferenceTable): Tabla con las filas ya serializadas.
+    """
+    reference_table = None
+
+    def list(self, request, *args, **kwargs):
+        if self.paginator is None and not request.query_params:
+            return Response(self.reference_table.rows())
+        return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            pk = int(kwargs[self.lookup_url_kwarg or self.lookup_field])
+        except (KeyError, TypeError, ValueError):
+            pk = None
+        row = self.reference_table.get(pk) if pk is not None else None
+        if row is None:
+            return super().retrieve(request, *args, **kwargs)
+        return Response(row)
+
+
+class PrerenderedResponse(Response):
+    """
+    Respuesta cuyo cuerpo JSON ya está renderizado (por ejemplo, leído de la caché de respuestas).
+
+    `data` solo se decodifica del cuerpo si alguien lo lee; servir la respuesta no lo necesita.
+    """
+
+    def __init__(self, content, content_type, data=None):
+        self.prerendered_content = content
+        self.prerendered_content_type = content_type
+        super().__init__(data=data)
+
+    @property
+    def data(self):
+        if self._data is None and self.prerendered_content:
+            self._data = json.loads(self.prerendered_content)
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+
+    @property
+    def rendered_content(self):
+        self['Content-Type'] = self.prerendered_content_type
+        return self.prerendered_content
+
+
+class ResponseCacheMixin:
+    """
+    Guarda en caché las respuestas de lectura anónimas (iguales para todos los visitantes) ya renderizadas.
+
+    La clave es la acción con sus parámetros de consulta. Cada respuesta depende de las etiquetas que
+    devuelve `get_response_cache_tags` y deja de servirse cuando cualquiera de ellas cambia de versión.
+    Si la entrada falta o está obsoleta, solo una petición la recalcula: las demás reciben la versión
+    anterior mientras tanto o, si no la hay, esperan a que termine.
+
+    Attributes:
+        response_cache_actions (tuple[str]): Acciones cuyas respuestas se guardan.
+    """
+    response_cache_actions = ('list', 'retrieve')
+
+    def get_response_cache_tags(self, data):
+        """
+        Devuelve las etiquetas de dependencia de una respuesta a partir de sus datos.
+        """
+        return []
+
+    def get_response_cache_key(self, request):
+        params = '&'.join(f'{key}={value}' for key, value in sorted(request.query_params.lists()))
+        return f'{self.basename}:{self.action}:{self.kwargs.get(self.lookup_url_kwarg or self.lookup_field, "")}:{params}'
+
+    def is_response_cacheable(self, request):
+        return (
+            request.method == 'GET'
+            and self.action in self.response_cache_actions
+            and not request.user.is_authenticated
+            and request.accepted_renderer.format == 'json'
+        )
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, super().retrieve, *args, **kwargs)
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        if not self.is_response_cacheable(request):
+            return handler(request, *args, **kwargs)
+
+        key = self.get_response_cache_key(request)
+        entry = response_cache.get_entry(key)
+        if entry is not None and entry.is_fresh():
+            return PrerenderedResponse(entry.content, entry.content_type)
+
+        if not response_cache.acquire(key):
+            # Otra petición ya la está recalculando: se sirve la versión anterior o se espera a la nueva.
+            entry = entry or response_cache.wait_for_entry(key)
+            if entry is not None:
+                return PrerenderedResponse(entry.content, entry.content_type)
+            return handler(request, *args, **kwargs)
+
+        def render():
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response, None, None
+            renderer, media_type = request.accepted_renderer, request.accepted_media_type
+            content = renderer.render(response.data, media_type, self.get_renderer_context())
+            if renderer.charset:
+                media_type = f'{media_type}; charset={renderer.charset}'
+            return response, content, media_type
+
+        try:
+            response, content, content_type = response_cache.compute(key, render, self.get_response_cache_tags)
+        finally:
+            response_cache.release(key)
+        if content is None:
+            return response
+        return PrerenderedResponse(content, content_type, data=response.data)
@@ -0,0 +1,163 @@
+import json
+import threading
+from collections import OrderedDict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+from rest_framework.renderers import JSONRenderer
+
+from api.versioning import CATEGORY_TREE, INGREDIENTS, UNIT_TYPES, UNITS, get_versions, has_pending
+
+KEY_PREFIX = 'reference-data:'
+
+
+class ReferenceTable:
+    """
+    Tabla de datos de referencia (pequeña y de cambio infrecuente) servida desde caché.
+
+    Las filas se guardan completas bajo la versión actual de su ámbito (`api.versioning`): las señales de
+    los modelos renuevan la versión y la siguiente lectura recarga la tabla con una sola consulta.
+    Delante de la caché de Django hay un LRU en memoria del proceso, por lo que una lectura con la versión
+    vigente solo consulta el token de versión.
+
+    Attributes:
+        name (str): Nombre de la tabla, usado en las claves de caché.
+        model (str): Modelo en formato `app_label.ModelName`.
+        scope (str): Ámbito de versión que invalida la tabla.
+        serializer (str | None): Ruta del serializador con el que se guardan las filas. Sin él se guardan
+            los `fields` indicados con `values()`.
+        fields (tuple[str]): Campos guardados cuando no hay serializador.
+        filters (dict): Filtros del queryset (por ejemplo solo ingredientes aprobados).
+        ordering (tuple[str]): Orden de las filas.
+        prefetch (tuple[str]): Relaciones precargadas para el serializador.
+    """
+
+    def __init__(self, name, model, scope, serializer=None, fields=('id',), filters=None, ordering=('id',),
+                 prefetch=()):
+        self.name = name
+        self.model = model
+        self.scope = scope
+        self.serializer = serializer
+        self.fields = fields
+        self.filters = filters or {}
+        self.ordering = ordering
+        self.prefetch = prefetch
+
+    def get_queryset(self):
+        queryset = apps.get_model(self.model).objects.filter(**self.filters).order_by(*self.ordering)
+        return queryset.prefetch_related(*self.prefetch) if self.prefetch else queryset
+
+    def load(self):
+        """
+        Lee la tabla de la base de datos. Con serializador las filas se pasan por JSON para guardarlas
+        como tipos simples, idénticas a las que devolvería la API.
+        """
+        if self.serializer is None:
+            return list(self.get_queryset().values(*self.fields))
+        data = import_string(self.serializer)(self.get_queryset(), many=True).data
+        return json.loads(JSONRenderer().render(data))
+
+    def rows(self):
+        """
+        Devuelve todas las filas de la tabla.
+        """
+        return reference_cache.get(self).rows
+
+    def get(self, pk):
+        """
+        Devuelve la fila con id `pk` o `None` si no está en la tabla.
+        """
+        return reference_cache.get(self).by_id.get(pk)
+
+    def missing(self, ids):
+        """
+        Devuelve los ids de `ids` que no están en la tabla.
+        """
+        by_id = reference_cache.get(self).by_id
+        return {pk for pk in ids if pk not in by_id}
+
+
+class ReferenceSnapshot:
+    """
+    Filas de una tabla de referencia para una versión concreta, con su índice por id.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        # Las filas sin `id` (UnitTypeSerializer no lo expone) solo sirven para el listado completo.
+        self.by_id = {row['id']: row for row in rows if 'id' in row}
+
+
+class ReferenceCache:
+    """
+    LRU en memoria del proceso delante de la caché de Django, indexado por `(tabla, versión)`.
+
+    Attributes:
+        maxsize (int): Número máximo de instantáneas en memoria (`REFERENCE_CACHE_LOCAL_SIZE`).
+    """
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, table):
+        """
+        Devuelve la instantánea vigente de `table`: del LRU local, de la caché compartida o de la base de datos.
+        """
+        (token,), _ = get_versions([table.scope])
+        if has_pending(table.scope):
+            # La transacción en curso cambió la tabla: se lee sin guardar nada hasta el commit.
+            return ReferenceSnapshot(table.load())
+
+        key = (table.name, token)
+        with self._lock:
+            snapshot = self._local.get(key)
+            if snapshot is not None:
+                self._local.move_to_end(key)
+                return snapshot
+
+        cache_key = f'{KEY_PREFIX}{table.name}:{token}'
+        rows = cache.get(cache_key)
+        if rows is None:
+            rows = table.load()
+            cache.set(cache_key, rows, timeout=getattr(settings, 'REFERENCE_CACHE_TIMEOUT', None))
+        snapshot = ReferenceSnapshot(rows)
+
+        with self._lock:
+            self._local[key] = snapshot
+            self._local.move_to_end(key)
+            maxsize = self.maxsize or getattr(settings, 'REFERENCE_CACHE_LOCAL_SIZE', 16)
+            while len(self._local) > maxsize:
+                self._local.popitem(last=False)
+        return snapshot
+
+    def clear(self):
+        """
+        Vacía el LRU local (la caché compartida se invalida con las versiones).
+        """
+        with self._lock:
+            self._local.clear()
+
+
+reference_cache = ReferenceCache()
+
+units = ReferenceTable(
+    'units', 'measurements.Unit', UNITS,
+    serializer='measurements.serializers.unitSerializer.UnitSerializer',
+)
+unit_types = ReferenceTable(
+    'unit_types', 'measurements.UnitType', UNIT_TYPES,
+    serializer='measurements.serializers.unitTypeSerializer.UnitTypeSerializer', prefetch=('units',),
+)
+categories = ReferenceTable(
+    'categories', 'recipes.Category', CATEGORY_TREE,
+    fields=('id', 'name', 'parent_category_id', 'depth', 'path'), ordering=('path',),
+)
+approved_ingredients = ReferenceTable(
+    'approved_ingredients', 'recipes.Ingredient', INGREDIENTS,
+    serializer='recipes.serializers.ingredientSerializer.IngredientSerializer',
+    filters={'is_approved': True}, prefetch=('categories',),
+)
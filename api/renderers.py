@@ -0,0 +1,40 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    `JSONRenderer` que codifica con `orjson` cuando está instalado y, si no, se comporta igual que el de DRF.
+
+    La salida es byte a byte la de `JSONRenderer` con la configuración por defecto (JSON compacto en
+    UTF-8): los tipos que `orjson` formatearía distinto (fechas, decimales, textos diferidos...) se
+    delegan en el `JSONEncoder` de DRF y `U+2028`/`U+2029` se escapan igual. Con sangría (`; indent=`),
+    con otra configuración de `UNICODE_JSON`/`COMPACT_JSON` o si `orjson` no puede codificar los datos
+    (por ejemplo enteros de más de 64 bits) se usa el renderer de DRF.
+
+    Los floats no finitos (`NaN`, `Infinity`) y los de exponente grande se escriben de otra forma que con
+    `json`; los endpoints que lo usan no devuelven floats.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
@@ -0,0 +1,125 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from api.versioning import RECIPES, get_versions
+
+KEY_PREFIX = 'response:'
+LOCK_PREFIX = 'response-lock:'
+
+# Etiquetas de dependencia. Cada respuesta guardada recuerda la versión de sus etiquetas y deja de
+# servirse en cuanto alguna cambia (`api.signals` las renueva con `bump_versions`).
+RECIPE_LIST_TAG = 'tag:recipe-list'
+CATALOG_TAG = 'tag:recipe-catalog'
+
+
+def recipe_tag(recipe_id):
+    return f'tag:recipe:{recipe_id}'
+
+
+def user_tag(user_id):
+    return f'tag:user:{user_id}'
+
+
+def image_tags(image):
+    """
+    Etiquetas de las respuestas que muestran `image` (la receta, la receta del paso o el usuario).
+    """
+    from media.models.image import Image
+    from recipes.models.step import Step
+
+    if image.type == Image.ImageType.RECIPE:
+        return [recipe_tag(image.external_id)]
+    if image.type == Image.ImageType.STEP:
+        recipe_ids = Step.objects.filter(pk=image.external_id).values_list('recipe_id', flat=True)
+        return [recipe_tag(recipe_id) for recipe_id in recipe_ids]
+    if image.type == Image.ImageType.USER:
+        return [user_tag(image.external_id)]
+    return []
+
+
+class CachedEntry:
+    """
+    Respuesta ya renderizada junto con las versiones de sus etiquetas en el momento de generarla.
+
+    Attributes:
+        content (bytes): Cuerpo renderizado.
+        content_type (str): Cabecera Content-Type.
+        tags (list[str]): Etiquetas de las que depende.
+        versions (list[str]): Versión de cada etiqueta al generar la respuesta.
+    """
+
+    def __init__(self, content, content_type, tags, versions):
+        self.content = content
+        self.content_type = content_type
+        self.tags = tags
+        self.versions = versions
+
+    def is_fresh(self):
+        tokens, _ = get_versions(self.tags)
+        return tokens == self.versions
+
+
+def get_entry(key):
+    return cache.get(f'{KEY_PREFIX}{key}')
+
+
+def wait_for_entry(key):
+    """
+    Espera a que otro proceso termine de generar `key` (`RESPONSE_CACHE_WAIT` segundos como máximo).
+
+    Returns:
+        CachedEntry | None: La entrada recién generada o `None` si no llegó a tiempo.
+    """
+    deadline = time.monotonic() + getattr(settings, 'RESPONSE_CACHE_WAIT', 2)
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = get_entry(key)
+        if entry is not None and entry.is_fresh():
+            return entry
+        if cache.get(f'{LOCK_PREFIX}{key}') is None:
+            return None
+    return None
+
+
+def acquire(key):
+    """
+    Reserva el recálculo de `key` para este proceso. Solo una petición a la vez regenera cada clave.
+    """
+    return cache.add(f'{LOCK_PREFIX}{key}', 1, timeout=getattr(settings, 'RESPONSE_CACHE_LOCK_TIMEOUT', 10))
+
+
+def release(key):
+    cache.delete(f'{LOCK_PREFIX}{key}')
+
+
+def compute(key, render, get_tags):
+    """
+    Genera la respuesta de `key` y la guarda si ninguna escritura de recetas ocurrió mientras tanto.
+
+    Las etiquetas de una página (sus recetas y autores) solo se conocen tras leerla, así que su versión se
+    lee después de los datos. Si entre medias se confirmó un cambio, la versión leída podría ser ya la
+    nueva y la respuesta, la antigua: por eso se compara la versión global de recetas antes y después y,
+    si cambió, la respuesta se devuelve sin guardarla.
+
+    Args:
+        key (str): Clave de la respuesta.
+        render (callable): Devuelve `(response, content, content_type)`; `content` es `None` si la
+            respuesta no debe guardarse (por ejemplo un 404).
+        get_tags (callable): Recibe los datos de la respuesta y devuelve sus etiquetas.
+
+    Returns:
+        tuple: El resultado de `render`.
+    """
+    guard, _ = get_versions([RECIPES])
+    response, content, content_type = render()
+    if content is not None:
+        tags = sorted(set(get_tags(response.data)) | {CATALOG_TAG})
+        versions, _ = get_versions(tags)
+        if get_versions([RECIPES])[0] == guard:
+            cache.set(
+                f'{KEY_PREFIX}{key}', CachedEntry(content, content_type, tags, versions),
+                timeout=getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300),
+            )
+    return response, content, content_type
@@ -0,0 +1,137 @@
+from django.apps import apps
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from api.response_cache import CATALOG_TAG, RECIPE_LIST_TAG, image_tags, recipe_tag, user_tag
+from api.versioning import CATEGORIES, CATEGORY_TREE, INGREDIENTS, RECIPES, UNIT_TYPES, UNITS, bump_versions
+from recipes.signals import recipe_changed
+
+# Modelo -> ámbitos cuya representación incluye sus datos (directamente, anidados o en contadores).
+SCOPES_BY_MODEL = {
+    settings.AUTH_RECIPE_MODEL: (RECIPES, CATEGORIES),
+    settings.AUTH_STEP_MODEL: (RECIPES,),
+    settings.AUTH_RECIPEINGREDIENT_MODEL: (RECIPES,),
+    settings.AUTH_CATEGORY_MODEL: (CATEGORIES, CATEGORY_TREE, RECIPES, INGREDIENTS),
+    settings.AUTH_INGREDIENT_MODEL: (INGREDIENTS, CATEGORIES),
+    settings.AUTH_UNIT_MODEL: (UNITS, UNIT_TYPES),
+    settings.AUTH_UNITTYPE_MODEL: (UNIT_TYPES, UNITS),
+    settings.AUTH_IMAGE_MODEL: (RECIPES,),
+    settings.AUTH_USER_MODEL: (RECIPES,),
+}
+
+# Relaciones muchos a muchos (modelo, campo) -> ámbitos.
+SCOPES_BY_RELATION = {
+    (settings.AUTH_RECIPE_MODEL, 'categories'): (RECIPES, CATEGORIES),
+    (settings.AUTH_INGREDIENT_MODEL, 'categories'): (INGREDIENTS, CATEGORIES),
+}
+
+
+def _bump_for_instance(scopes):
+    def receiver(sender, raw=False, **kwargs):
+        if not raw:
+            bump_versions(*scopes)
+    return receiver
+
+
+def _bump_for_relation(scopes):
+    def receiver(sender, action, **kwargs):
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            bump_versions(*scopes)
+    return receiver
+
+
+def _bump_recipes(sender, **kwargs):
+    bump_versions(RECIPES)
+
+
+def _tag_saved_recipe(sender, instance, created=False, raw=False, **kwargs):
+    if not raw:
+        # Una receta nueva cambia la composición de las páginas de listado.
+        bump_versions(recipe_tag(instance.pk), *([RECIPE_LIST_TAG] if created else []))
+
+
+def _tag_deleted_recipe(sender, instance, **kwargs):
+    bump_versions(recipe_tag(instance.pk), RECIPE_LIST_TAG)
+
+
+def _tag_recipe_of_line(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_versions(recipe_tag(instance.recipe_id))
+
+
+def _tag_changed_recipes(sender, recipe_ids, **kwargs):
+    bump_versions(*(recipe_tag(recipe_id) for recipe_id in recipe_ids))
+
+
+def _tag_recipe_categories(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        tags = [recipe_tag(instance.pk)]
+    elif pk_set:
+        tags = [recipe_tag(recipe_id) for recipe_id in pk_set]
+    else:
+        # `category.recipes.clear()` no informa de qué recetas pierden la categoría.
+        tags = [CATALOG_TAG]
+    # Los listados filtrados por categoría cambian de composición.
+    bump_versions(*tags, RECIPE_LIST_TAG)
+
+
+def _tag_deleted_category(sender, instance, **kwargs):
+    # El borrado elimina filas de la tabla intermedia sin enviar m2m_changed.
+    bump_versions(CATALOG_TAG)
+
+
+def _tag_image(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_versions(*image_tags(instance))
+
+
+def _tag_user(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_versions(user_tag(instance.pk))
+
+
+def connect_signals():
+    """
+    Conecta los receptores que invalidan las versiones de `api.versioning` al cambiar los modelos.
+    Los cambios en bloque que no disparan señales (`bulk_update`, `QuerySet.update`) invalidan
+    su ámbito explícitamente o a través de `recipe_changed`.
+    """
+    for label, scopes in SCOPES_BY_MODEL.items():
+        model = apps.get_model(label)
+        receiver = _bump_for_instance(scopes)
+        post_save.connect(receiver, sender=model, weak=False, dispatch_uid=f'versions-save-{label}')
+        post_delete.connect(receiver, sender=model, weak=False, dispatch_uid=f'versions-delete-{label}')
+
+    for (label, field), scopes in SCOPES_BY_RELATION.items():
+        through = getattr(apps.get_model(label), field).through
+        m2m_changed.connect(
+            _bump_for_relation(scopes), sender=through, weak=False, dispatch_uid=f'versions-m2m-{label}.{field}'
+        )
+
+    recipe_changed.connect(_bump_recipes, dispatch_uid='versions-recipe-changed')
+    connect_response_cache_signals()
+
+
+def connect_response_cache_signals():
+    """
+    Conecta los receptores que renuevan las etiquetas de `api.response_cache`, de modo que un cambio solo
+    invalida las respuestas guardadas que lo muestran.
+    """
+    recipe = apps.get_model(settings.AUTH_RECIPE_MODEL)
+    post_save.connect(_tag_saved_recipe, sender=recipe, dispatch_uid='tags-save-recipe')
+    post_delete.connect(_tag_deleted_recipe, sender=recipe, dispatch_uid='tags-delete-recipe')
+    for label in (settings.AUTH_STEP_MODEL, settings.AUTH_RECIPEINGREDIENT_MODEL):
+        model = apps.get_model(label)
+        post_save.connect(_tag_recipe_of_line, sender=model, dispatch_uid=f'tags-save-{label}')
+        post_delete.connect(_tag_recipe_of_line, sender=model, dispatch_uid=f'tags-delete-{label}')
+    recipe_changed.connect(_tag_changed_recipes, dispatch_uid='tags-recipe-changed')
+    m2m_changed.connect(_tag_recipe_categories, sender=recipe.categories.through, dispatch_uid='tags-recipe-categories')
+    post_delete.connect(
+        _tag_deleted_category, sender=apps.get_model(settings.AUTH_CATEGORY_MODEL), dispatch_uid='tags-delete-category'
+    )
+    for label, receiver in ((settings.AUTH_IMAGE_MODEL, _tag_image), (settings.AUTH_USER_MODEL, _tag_user)):
+        model = apps.get_model(label)
+        post_save.connect(receiver, sender=model, dispatch_uid=f'tags-save-{label}')
+        post_delete.connect(receiver, sender=model, dispatch_uid=f'tags-delete-{label}')
@@ -0,0 +1,92 @@
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import connection
+
+from api.commit_batches import CommitBatch
+
+# Ámbitos de versión: cada uno agrupa los recursos cuya representación cambia junta.
+RECIPES = 'recipes'
+CATEGORIES = 'categories'
+# Estructura del árbol de categorías (nombre, padre, ruta), sin los contadores que cambian con las recetas.
+CATEGORY_TREE = 'category_tree'
+INGREDIENTS = 'ingredients'
+UNITS = 'units'
+UNIT_TYPES = 'unit_types'
+
+KEY_PREFIX = 'resource-version:'
+
+
+def _key(scope):
+    return f'{KEY_PREFIX}{scope}'
+
+
+def _new_stamp():
+    return uuid.uuid4().hex, time.time()
+
+
+def _write_stamps(scopes):
+    cache.set_many({_key(scope): _new_stamp() for scope in scopes}, timeout=None)
+
+
+# Ámbitos invalidados en la transacción en curso, que se vuelven a renovar al confirmarse.
+_pending_scopes = CommitBatch('resource_versions', _write_stamps)
+
+
+def bump_versions(*scopes):
+    """
+    Invalida la versión de los ámbitos indicados.
+
+    La versión se renueva al momento y otra vez al confirmarse la transacción en curso: un lector que
+    consulte entre ambos instantes puede ver aún los datos anteriores, y la segunda renovación impide que
+    se quede con ellos bajo la versión nueva. Los ámbitos se acumulan por transacción, con un único
+    callback de commit.
+
+    Args:
+        *scopes (str): Ámbitos a invalidar (`RECIPES`, `CATEGORIES`, ...).
+    """
+    scopes = set(scopes)
+    if not scopes:
+        return
+    _write_stamps(scopes)
+    if connection.in_atomic_block:
+        _pending_scopes.add(scopes)
+
+
+def has_pending(scope):
+    """
+    Indica si la transacción en curso ha invalidado `scope` y todavía no se ha confirmado.
+
+    Los datos que lea esa transacción pueden no llegar a confirmarse, así que no deben guardarse
+    en caché bajo la versión actual.
+    """
+    return scope in _pending_scopes.pending()
+
+
+def get_versions(scopes):
+    """
+    Devuelve la versión actual de los ámbitos indicados con una sola lectura de la caché.
+
+    Un ámbito sin versión (caché vacía o expulsada) recibe una nueva, de modo que perder la caché
+    nunca produce un 304 con datos antiguos, solo una descarga de más.
+
+    Args:
+        scopes (iterable[str]): Ámbitos de los que depende la respuesta.
+
+    Returns:
+        tuple: `(tokens, last_modified)`, con un token por ámbito en el orden recibido y la fecha
+        (timestamp) del último cambio entre todos ellos.
+    """
+    scopes = list(scopes)
+    stamps = cache.get_many([_key(scope) for scope in scopes])
+    for scope in scopes:
+        if _key(scope) not in stamps:
+            stamp = _new_stamp()
+            if not cache.add(_key(scope), stamp, timeout=None):
+                # Otro proceso la creó a la vez: se usa la suya.
+                stamp = cache.get(_key(scope)) or stamp
+            stamps[_key(scope)] = stamp
+    tokens = [stamps[_key(scope)][0] for scope in scopes]
+    last_modified = max((stamps[_key(scope)][1] for scope in scopes), default=None)
+    return tokens, last_modified
@@ -129,6 +129,34 @@ REST_FRAMEWORK = {
     )
 }
 
+# Caché. Guarda, entre otras cosas, las versiones de recursos (api.versioning) que validan los ETag de las
+# lecturas condicionales. LocMemCache solo es coherente dentro de un proceso: con varios workers debe
+# apuntar a una caché compartida (Redis o Memcached) para que todos vean las mismas versiones.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'cookflow',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+# Datos de referencia (unidades, tipos de unidad, categorías e ingredientes aprobados, api.reference_cache).
+# Cada proceso guarda en un LRU las últimas REFERENCE_CACHE_LOCAL_SIZE tablas leídas de CACHES; las versiones
+# las invalidan al cambiar, por lo que la caducidad (None: sin caducidad) solo libera memoria.
+REFERENCE_CACHE_LOCAL_SIZE = 16
+REFERENCE_CACHE_TIMEOUT = None
+
+# Caché de respuestas de lectura anónimas (api.response_cache). Las entradas se invalidan por etiquetas
+# (receta, autor, listado); la caducidad solo acota la memoria. Mientras una petición recalcula una clave,
+# las demás esperan como mucho RESPONSE_CACHE_WAIT segundos antes de calcularla por su cuenta.
+RESPONSE_CACHE_TIMEOUT = 300
+RESPONSE_CACHE_LOCK_TIMEOUT = 10
+RESPONSE_CACHE_WAIT = 2
+
+# Serialización de listados con planes precompilados (api.compiled_serializers). La salida es la misma que
+# la de los serializers de DRF; False vuelve al camino estándar (por ejemplo para comparar en un benchmark).
+COMPILED_SERIALIZERS = True
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -230,6 +258,53 @@ MEDIA_ROOT = BASE_DIR / 'media'  # Carpeta donde se guardan los archivos
 # Carpeta específica para imágenes (usada en imageViewSet.py)
 MEDIA_IMG_PATH = MEDIA_ROOT / 'img'
 
+# Pipeline de procesamiento de imágenes (media.services.image_pipeline).
+# Las subidas se guardan en bruto en MEDIA_PENDING_PATH y un backend las convierte a WEBP fuera de la petición.
+# 'LocalQueueBackend' usa una cola en memoria con hilos; 'SyncBackend' procesa en línea (útil en tests).
+# Puede sustituirse por cualquier clase con un método `enqueue(image_id)` que delegue en un broker.
+MEDIA_PENDING_PATH = MEDIA_IMG_PATH / 'pending'
+IMAGE_PIPELINE_BACKEND = 'media.services.image_pipeline.LocalQueueBackend'
+IMAGE_PIPELINE_WORKERS = 2
+# Hilos con los que se guardan las subidas de un lote (por ejemplo la foto de una receta y las de sus pasos)
+# y se convierten las imágenes de un mismo trabajo del pipeline. Pillow libera el GIL al codificar.
+IMAGE_ENCODE_WORKERS = 4
+# Número máximo de imágenes por petición en la subida en lote (POST /api/media/images/batch/).
+IMAGE_UPLOAD_BATCH_MAX = 50
+
+# Almacenamiento por contenido: las subidas con los mismos bytes comparten un único ImageBlob
+# ('blobs/<hh>/<sha256>.webp') con contador de referencias y no se vuelven a convertir.
+# Con False cada subida se guarda en '<user_id>/<uuid>.webp'.
+IMAGE_CONTENT_ADDRESSED = True
+
+# Límites de las subidas de imágenes. Las dimensiones se leen de la cabecera antes de decodificar:
+# se rechaza lo que supere IMAGE_MAX_UPLOAD_BYTES o IMAGE_MAX_PIXELS. Los JPEG mayores que el tamaño
+# 'full' de IMAGE_VARIANTS se decodifican ya reducidos (draft); PNG y WEBP se decodifican siempre enteros
+# (unos 4 bytes por píxel), así que su límite es IMAGE_MAX_FULL_DECODE_PIXELS.
+IMAGE_MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+IMAGE_MAX_PIXELS = 50_000_000
+IMAGE_MAX_FULL_DECODE_PIXELS = 16_000_000
+
+# Variantes generadas para cada imagen: nombre -> lado mayor máximo en píxeles.
+# 'full' es el propio archivo de `url`; el resto se guarda como '<uuid>_<variante>.webp'.
+IMAGE_VARIANTS = {
+    'thumb': 160,
+    'card': 480,
+    'full': 1600,
+}
+
+# Entrega de imágenes procesadas (media.services.image_delivery), en MEDIA_IMAGE_URL.
+# Los nombres de archivo no se reutilizan nunca (hash del contenido o uuid), así que se sirven con
+# `Cache-Control: immutable`. MEDIA_SERVE_MODE:
+#   'python'     -> Django envía el archivo (admite Range, If-None-Match e If-Range).
+#   'x-accel'    -> nginx lo envía desde la location interna MEDIA_ACCEL_REDIRECT_PREFIX (alias de MEDIA_IMG_PATH).
+#   'x-sendfile' -> Apache/lighttpd lo envían a partir de la ruta absoluta.
+MEDIA_IMAGE_URL = '/api/media/img/'
+MEDIA_SERVE_MODE = 'python'
+MEDIA_ACCEL_REDIRECT_PREFIX = '/_protected/img/'
+
+# Configuración de texto de PostgreSQL para la búsqueda de recetas (recipes.services.recipe_search).
+RECIPE_SEARCH_CONFIG = 'spanish'
+
 # API Documentación
 SPECTACULAR_SETTINGS = {
     'TITLE': 'CookFlow API',
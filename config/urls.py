@@ -26,6 +26,7 @@ urlpatterns = [
     path('api/recipes/', include('recipes.urls')),
     path('api/shopping/', include('shopping.urls')),
     path('api/measurements/', include('measurements.urls')),    
+    path('api/media/', include('media.urls')),
     path('api/', include('users.urls')),
 
     # API Documentation URLs for drf-spectacular:
@@ -10,6 +10,16 @@ from recipes.models.recipe import Recipe
 from recipes.models.recipeIngredient import RecipeIngredient
 from recipes.models.step import Step
 from media.models.image import Image
+from django.core.cache import cache
+from api.reference_cache import reference_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Empties the shared cache and the in-process reference cache so no test sees another's data."""
+    cache.clear()
+    reference_cache.clear()
+    yield
 
 
 # --- User Fixtures ---
@@ -8,13 +8,16 @@ Author:
 """
 from rest_framework import viewsets
 from rest_framework.permissions import IsAdminUser, SAFE_METHODS
+from api import reference_cache
+from api.mixins import ConditionalGetMixin, ReferenceReadMixin
+from api.versioning import UNIT_TYPES, UNITS
 from measurements.models.unit import Unit
 from measurements.models.unitType import UnitType
 from measurements.serializers.unitSerializer import UnitSerializer, UnitAdminSerializer
 from measurements.serializers.unitTypeSerializer import UnitTypeSerializer, UnitTypeAdminSerializer
 from django_filters.rest_framework import DjangoFilterBackend
 
-class UnitViewSet(viewsets.ModelViewSet):
+class UnitViewSet(ConditionalGetMixin, ReferenceReadMixin, viewsets.ModelViewSet):
     """ViewSet para manejar las operaciones CRUD de las unidades de medida. 
     Args:  
         - `viewsets (ModelViewSet)`: Clase base de Django REST Framework para manejar vistas basadas en conjuntos de datos.  
@@ -26,6 +29,8 @@ class UnitViewSet(viewsets.ModelViewSet):
     queryset = Unit.objects.all()
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['unit_type', 'id']
+    conditional_scopes = (UNITS,)
+    reference_table = reference_cache.units
 
     def get_serializer_class(self):
         """Determina qué clase de serializador usar según el método HTTP y los permisos del usuario.
@@ -43,7 +48,7 @@ class UnitViewSet(viewsets.ModelViewSet):
             return []
         return [IsAdminUser()]
 
-class UnitTypeViewSet(viewsets.ModelViewSet):
+class UnitTypeViewSet(ConditionalGetMixin, ReferenceReadMixin, viewsets.ModelViewSet):
     """ViewSet para manejar las operaciones CRUD de los tipos de unidades.
     Args:  
         - `viewsets (ModelViewSet)`: Clase base de Django REST Framework para manejar vistas basadas en conjuntos de datos.
@@ -53,6 +58,8 @@ class UnitTypeViewSet(viewsets.ModelViewSet):
         - `UnitTypeViewSet`: Un conjunto de vistas que permite realizar operaciones CRUD sobre el modelo UnitType.
     """
     queryset = UnitType.objects.all()
+    conditional_scopes = (UNIT_TYPES,)
+    reference_table = reference_cache.unit_types
 
     def get_serializer_class(self):
         """Determina qué clase de serializador usar según el método HTTP y los permisos del usuario.
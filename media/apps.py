@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MediaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'media'
+
+    def ready(self):
+        # Registra los receptores que liberan los archivos de las imágenes borradas.
+        from media import signals  # noqa: F401
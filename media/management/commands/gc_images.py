@@ -0,0 +1,94 @@
+import json
+import os
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from media.services.image_gc import delete_images, iter_orphan_files, iter_orphan_images
+from media.services.image_service import remove_relative_file
+
+
+class Command(BaseCommand):
+    help = (
+        'Elimina las imágenes cuyo objeto (receta, paso o usuario) ya no existe y los archivos de '
+        'MEDIA_IMG_PATH sin fila. Recorre las tablas por lotes y las carpetas con os.scandir.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Filas o archivos comprobados por lote.')
+        parser.add_argument('--dry-run', action='store_true', help='Solo informa de lo que se borraría.')
+        parser.add_argument(
+            '--grace-hours', type=float, default=24,
+            help='No toca filas ni archivos más recientes (subidas y procesamientos en curso).',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Archivo JSON con el progreso: si existe se reanuda desde él; se borra al terminar.',
+        )
+        parser.add_argument('--skip-rows', action='store_true', help='No revisa la tabla de imágenes.')
+        parser.add_argument('--skip-files', action='store_true', help='No revisa los archivos.')
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.verbosity = options['verbosity']
+        self.checkpoint_path = options['checkpoint']
+        self.progress = self.load_checkpoint()
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        prefix = '[dry-run] ' if self.dry_run else ''
+
+        if not options['skip_rows']:
+            by_type = self.collect_rows(options['batch_size'], cutoff)
+            detail = ', '.join(f'{image_type}: {count}' for image_type, count in sorted(by_type.items()))
+            self.stdout.write(f"{prefix}Imágenes huérfanas: {sum(by_type.values())}" + (f' ({detail}).' if detail else '.'))
+
+        if not options['skip_files']:
+            count, size = self.collect_files(options['batch_size'], cutoff.timestamp())
+            self.stdout.write(f'{prefix}Archivos huérfanos: {count} ({size} bytes).')
+
+        if self.checkpoint_path and not self.dry_run and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        self.stdout.write(self.style.SUCCESS('Revisión de imágenes terminada.'))
+
+    def collect_rows(self, batch_size, cutoff):
+        by_type = Counter()
+        for last_id, orphans in iter_orphan_images(batch_size, self.progress.get('image_id', 0), cutoff):
+            for image in orphans:
+                by_type[image.type] += 1
+                if self.verbosity > 1:
+                    self.stdout.write(f'  imagen {image.id} ({image.type} {image.external_id})')
+            if not self.dry_run:
+                if orphans:
+                    delete_images(orphans)
+                self.save_checkpoint(image_id=last_id)
+        return by_type
+
+    def collect_files(self, batch_size, cutoff):
+        count = size = 0
+        for directory, orphans, done in iter_orphan_files(batch_size, self.progress.get('directory'), cutoff):
+            for path, file_size in orphans:
+                count += 1
+                size += file_size
+                if self.verbosity > 1:
+                    self.stdout.write(f'  archivo {path} ({file_size} bytes)')
+                if not self.dry_run:
+                    remove_relative_file(path)
+            if done and not self.dry_run:
+                self.save_checkpoint(directory=directory)
+        return count, size
+
+    def load_checkpoint(self):
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return {}
+        with open(self.checkpoint_path) as checkpoint:
+            progress = json.load(checkpoint)
+        self.stdout.write(f'Reanudando desde {progress}.')
+        return progress
+
+    def save_checkpoint(self, **progress):
+        if not self.checkpoint_path:
+            return
+        self.progress.update(progress)
+        with open(self.checkpoint_path, 'w') as checkpoint:
+            json.dump(self.progress, checkpoint)
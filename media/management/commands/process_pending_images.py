@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from media.models.image import Image
+from media.services.image_pipeline import process_image, requeue_stale_processing
+
+
+class Command(BaseCommand):
+    help = (
+        'Procesa las imágenes que siguen en estado UPLOADED (por ejemplo tras reiniciar el servidor con trabajos en '
+        'cola) y las que llevan demasiado tiempo en PROCESSING (trabajos interrumpidos).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true', help='Vuelve a intentar también las imágenes en estado FAILED.')
+        parser.add_argument(
+            '--stale-minutes', type=float, default=30,
+            help='Minutos en PROCESSING tras los que una imagen se considera interrumpida y se vuelve a procesar.',
+        )
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_processing(timezone.now() - timedelta(minutes=options['stale_minutes']))
+        if requeued:
+            self.stdout.write(f'Imágenes interrumpidas en PROCESSING: {requeued}.')
+        if options['retry_failed']:
+            Image.objects.filter(
+                processing_status=Image.ImageStatus.FAILED, source_path__isnull=False
+            ).update(processing_status=Image.ImageStatus.UPLOADED)
+
+        pending = Image.objects.filter(
+            processing_status=Image.ImageStatus.UPLOADED, source_path__isnull=False
+        ).values_list('id', flat=True)
+
+        processed = failed = 0
+        for image_id in pending.iterator():
+            if process_image(image_id):
+                processed += 1
+            else:
+                failed += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Imágenes procesadas: {processed}. Con error u omitidas: {failed}.'))
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:45
+
+from django.db import migrations, models
+
+
+def backfill_storage_path(apps, schema_editor):
+    """
+    Rellena `storage_path` (`<user_id>/<url>`) en las imágenes existentes, infiriendo el usuario
+    propietario a partir del tipo: el propio usuario, el autor de la receta o el de la receta del paso.
+    """
+    Image = apps.get_model('media', 'Image')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Step = apps.get_model('recipes', 'Step')
+
+    images = list(Image.objects.filter(storage_path__isnull=True, url__isnull=False).exclude(url=''))
+    ids_by_type = {}
+    for image in images:
+        ids_by_type.setdefault(image.type, set()).add(image.external_id)
+
+    owners = {
+        'USER': {external_id: external_id for external_id in ids_by_type.get('USER', ())},
+        'RECIPE': dict(Recipe.objects.filter(id__in=ids_by_type.get('RECIPE', ())).values_list('id', 'user_id')),
+        'STEP': dict(Step.objects.filter(id__in=ids_by_type.get('STEP', ())).values_list('id', 'recipe__user_id')),
+    }
+
+    to_update = []
+    for image in images:
+        owner_id = owners.get(image.type, {}).get(image.external_id)
+        if owner_id is not None:
+            image.storage_path = f"{owner_id}/{image.url}"
+            to_update.append(image)
+    Image.objects.bulk_update(to_update, ['storage_path'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0002_alter_image_external_id_alter_image_url'),
+        ('recipes', '0005_recipe_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='source_path',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='storage_path',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.RunPython(backfill_storage_path, migrations.RunPython.noop),
+    ]
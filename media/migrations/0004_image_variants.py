@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0003_image_storage_paths'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_owners(apps, schema_editor):
+    """
+    Rellena la clave ajena del propietario de las imágenes existentes a partir de `(type, external_id)`,
+    con un `UPDATE` por tipo. Las imágenes cuyo objeto ya no existe quedan sin propietario.
+    """
+    Image = apps.get_model('media', 'Image')
+    targets = {
+        'RECIPE': ('recipe_id', apps.get_model('recipes', 'Recipe')),
+        'STEP': ('step_id', apps.get_model('recipes', 'Step')),
+        'USER': ('user_id', apps.get_model(settings.AUTH_USER_MODEL)),
+    }
+    for image_type, (column, model) in targets.items():
+        Image.objects.filter(type=image_type, external_id__in=model.objects.values('pk')).update(
+            **{column: models.F('external_id')}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0005_image_blobs'),
+        ('recipes', '0009_recipe_card'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='recipe',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='images', to='recipes.recipe'),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='step',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='images', to='recipes.step'),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='images', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['type', 'external_id'], name='image_type_external_idx'),
+        ),
+        migrations.RunPython(backfill_owners, migrations.RunPython.noop),
+    ]
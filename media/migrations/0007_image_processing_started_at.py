@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0006_image_owners'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='processing_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1 +1,2 @@
-from .image import Image
\ No newline at end of file
+from .image import Image
+from .imageBlob import ImageBlob
@@ -1,5 +1,25 @@
+from django.conf import settings
 from django.db import models
 
+
+class ImageQuerySet(models.QuerySet):
+    """
+    QuerySet de Image con los accesos por objeto propietario (receta, paso o usuario).
+    """
+
+    def for_owners(self, image_type, owner_ids):
+        """
+        Imágenes de `image_type` de los objetos `owner_ids`, por la clave ajena (indexada) del propietario.
+        """
+        return self.filter(**{f'{Image.OWNER_FIELDS[image_type]}_id__in': owner_ids})
+
+    def with_owners(self):
+        """
+        Carga con la misma consulta el objeto propietario de cada imagen (`image.recipe`, `image.step`, `image.user`).
+        """
+        return self.select_related(*Image.OWNER_FIELDS.values())
+
+
 class Image(models.Model):
     """Modelo de Image, representa una imagen almacenada.  
 
@@ -11,6 +31,15 @@ class Image(models.Model):
         `processing_status (Choice)`: Incica el status de procesamiento de la imagen y los valores que admite son [UPLOADED, PROCESSING, COMPLETED, FAILED].
         `type (Choice)`: Incica el tipo de tabla a la que tiene que esta asociada la imagen y los valores que admite son [USER, RECIPE, STEP].
         `external_id (AutoField)`: Id de la tabla externa a la que hace referencia la imagen.
+        `storage_path (str)`: Ruta del WEBP final relativa a `MEDIA_IMG_PATH` (por ejemplo `3/<uuid>.webp`).
+        `source_path (str)`: Ruta relativa a `MEDIA_IMG_PATH` del archivo original pendiente de procesar, vacía una vez procesado.
+        `variants (dict)`: Archivos WEBP generados por tamaño (`thumb`, `card`, `full`), en la misma carpeta que `storage_path`.
+        `content_hash (str)`: SHA-256 de los bytes originales cuando se usa el almacenamiento por contenido.
+        `blob (ImageBlob)`: Contenido compartido al que apunta la imagen en el almacenamiento por contenido.
+        `recipe`, `step`, `user` (ForeignKey): Propietario de la imagen según `type`, el mismo objeto que `external_id`.
+            Solo se rellena el del tipo de la imagen (y solo si el objeto existe); al borrarlo se borra la imagen.
+        `processing_started_at (DateTimeField)`: Momento en que el pipeline reclamó la imagen (`PROCESSING`); permite
+            recuperar las que se quedaron a medias si el proceso terminó durante la conversión.
         `created_at (DateTimeField)`: Fecha y hora de creación del registro, se establece automáticamente al crear el objeto.  
     Author:  
     {Jose Barreiro}
@@ -36,8 +65,26 @@ class Image(models.Model):
         default="uploaded"
     )
     external_id = models.BigIntegerField(null=True, blank=True)
+    storage_path = models.CharField(max_length=255, null=True, blank=True)
+    source_path = models.CharField(max_length=255, null=True, blank=True)
+    variants = models.JSONField(default=dict, blank=True)
+    content_hash = models.CharField(max_length=64, null=True, blank=True)
+    blob = models.ForeignKey('media.ImageBlob', null=True, blank=True, on_delete=models.SET_NULL, related_name='images')
+    recipe = models.ForeignKey('recipes.Recipe', null=True, blank=True, on_delete=models.CASCADE, related_name='images')
+    step = models.ForeignKey('recipes.Step', null=True, blank=True, on_delete=models.CASCADE, related_name='images')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.CASCADE, related_name='images')
+    processing_started_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ImageQuerySet.as_manager()
+
+    # Tipo de imagen -> clave ajena de su propietario.
+    OWNER_FIELDS = {
+        ImageType.RECIPE: 'recipe',
+        ImageType.STEP: 'step',
+        ImageType.USER: 'user',
+    }
+
     class Meta:
         """
         Meta clase para definir metadatos del modelo Image.
@@ -45,4 +92,33 @@ class Image(models.Model):
         Args:  
             db_table (str): Nombre de la tabla en la base de datos, en este caso 'images'.
         """
-        db_table = 'images'
\ No newline at end of file
+        db_table = 'images'
+        indexes = [
+            models.Index(fields=['type', 'external_id'], name='image_type_external_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.sync_owner()
+        super().save(*args, **kwargs)
+
+    def sync_owner(self):
+        """
+        Rellena la clave ajena del propietario a partir de `(type, external_id)` y vacía las demás.
+
+        `external_id` puede apuntar a un objeto inexistente (la API de imágenes no lo valida), así que la
+        clave solo se rellena si el objeto existe; si no, la imagen queda como huérfana (ver `gc_images`).
+        """
+        owner = self.OWNER_FIELDS.get(self.type)
+        for field in self.OWNER_FIELDS.values():
+            if field != owner:
+                setattr(self, f'{field}_id', None)
+        if owner is None:
+            return
+        if self.external_id is None:
+            setattr(self, f'{owner}_id', None)
+            return
+        if getattr(self, f'{owner}_id') == self.external_id:
+            return
+        model = self._meta.get_field(owner).related_model
+        exists = model._default_manager.filter(pk=self.external_id).exists()
+        setattr(self, f'{owner}_id', self.external_id if exists else None)
\ No newline at end of file
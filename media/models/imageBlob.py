@@ -0,0 +1,33 @@
+from django.db import models
+
+class ImageBlob(models.Model):
+    """Modelo de ImageBlob, representa un contenido de imagen almacenado una sola vez.
+
+    Las filas de `Image` con el mismo contenido (mismo hash de los bytes originales) apuntan al mismo blob,
+    que solo se borra del disco cuando deja de referenciarlo la última imagen.
+
+    Args:
+        models (Model): Clase base de Django para modelos.
+    Attributes:
+        `hash (str)`: SHA-256 en hexadecimal de los bytes originales subidos, único.
+        `storage_path (str)`: Ruta del WEBP `full` relativa a `MEDIA_IMG_PATH` (`blobs/<hh>/<hash>.webp`).
+        `variants (dict)`: Archivos WEBP por tamaño, en la misma carpeta que `storage_path`.
+        `ref_count (int)`: Número de imágenes que referencian el blob.
+        `created_at (DateTimeField)`: Fecha y hora de creación del registro, se establece automáticamente al crear el objeto.
+    """
+    hash = models.CharField(max_length=64, unique=True)
+    storage_path = models.CharField(max_length=255)
+    variants = models.JSONField(default=dict, blank=True)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        """
+        Meta clase para definir metadatos del modelo ImageBlob.
+        Args:
+            db_table (str): Nombre de la tabla en la base de datos, en este caso 'image_blobs'.
+        """
+        db_table = 'image_blobs'
+
+    def __str__(self):
+        return self.hash
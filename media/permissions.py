@@ -0,0 +1,57 @@
+from rest_framework.permissions import BasePermission
+
+from media.models.image import Image
+
+
+def owner_queryset(image_type):
+    """
+    Queryset de los objetos propietarios de un tipo de imagen, con lo necesario para `owner_user_id`.
+    """
+    model = Image._meta.get_field(Image.OWNER_FIELDS[image_type]).related_model
+    queryset = model._default_manager.all()
+    if image_type == Image.ImageType.STEP:
+        queryset = queryset.select_related('recipe')
+    return queryset
+
+
+def load_owner(image_type, external_id):
+    """
+    Devuelve el objeto propietario (receta, paso o usuario) de una imagen, o `None` si no existe.
+    """
+    if image_type not in Image.OWNER_FIELDS:
+        return None
+    try:
+        return owner_queryset(image_type).filter(pk=external_id).first()
+    except (TypeError, ValueError):
+        return None
+
+
+def owner_user_id(image_type, owner):
+    """
+    Id del usuario al que pertenece el objeto `owner`: el autor de la receta (o de la receta del paso)
+    o el propio usuario.
+    """
+    if image_type == Image.ImageType.USER:
+        return owner.pk
+    if image_type == Image.ImageType.STEP:
+        return owner.recipe.user_id_id
+    return owner.user_id_id
+
+
+def can_manage_image(user, image_type, owner):
+    """
+    Indica si `user` puede subir, sustituir o borrar la imagen de `owner`: solo su dueño o el staff.
+    """
+    return bool(user and user.is_authenticated and (user.is_staff or owner_user_id(image_type, owner) == user.pk))
+
+
+class IsImageOwnerOrAdmin(BasePermission):
+    """
+    Permiso de objeto para las imágenes: solo el dueño del objeto al que pertenece la imagen o el staff
+    pueden modificarla.
+    """
+    message = "No tienes permiso para modificar esta imagen."
+
+    def has_object_permission(self, request, view, obj):
+        owner = load_owner(obj.type, obj.external_id)
+        return owner is not None and can_manage_image(request.user, obj.type, owner)
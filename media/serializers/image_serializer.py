@@ -1,5 +1,7 @@
 from rest_framework import serializers
+from api.compiled_serializers import CompiledSerializer
 from media.models.image import Image
+from media.services.image_service import image_urls
 """"
 ------------------------------------------------------------------------------
  Serializer de solo lectura para mostrar detalles completos de una imagen.
@@ -52,6 +54,9 @@ class ImageWriteSerializer(serializers.ModelSerializer):
  Ideal para vistas tipo "galería" o listados con rendimiento optimizado.
  ------------------------------------------------------------------------------"""
 class ImageListSerializer(serializers.ModelSerializer):
+    """ URLs inmutables de cada variante ({'thumb': '/api/media/img/...', ...}), vacío hasta que se procesa."""
+    urls = serializers.SerializerMethodField()
+
     class Meta:
         model = Image
         fields = [
@@ -59,6 +64,29 @@ class ImageListSerializer(serializers.ModelSerializer):
             'url',
             'type',
             'external_id',
-            'processing_status'
+            'processing_status',
+            # Nombres de archivo por tamaño ({'thumb': ..., 'card': ..., 'full': ...}), vacío hasta que se procesa.
+            'variants',
+            'urls'
         ]
         read_only_fields = fields
+
+    def get_urls(self, obj):
+        return image_urls(obj)
+
+
+
+_image_list_plan = None
+
+
+def image_list_data(image):
+    """
+    Representación de `image` con `ImageListSerializer`, igual a `ImageListSerializer(image).data`.
+
+    Se usa desde los serializers que muestran una imagen por objeto (recetas, pasos): el plan compilado se
+    construye una sola vez por proceso en lugar de crear un serializer por imagen.
+    """
+    global _image_list_plan
+    if _image_list_plan is None:
+        _image_list_plan = CompiledSerializer(ImageListSerializer())
+    return _image_list_plan.to_representation(image)
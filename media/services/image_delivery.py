@@ -0,0 +1,159 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+# Un año: el máximo que respetan los navegadores y proxies para `max-age`.
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def resolve_image_file(relative_path):
+    """
+    Ruta absoluta de un archivo servible de `MEDIA_IMG_PATH`, o `Http404`.
+
+    Solo se sirven archivos ya procesados: se rechazan las rutas que salen de la carpeta (`..`, enlaces
+    simbólicos) y los originales pendientes de `MEDIA_PENDING_PATH`, que no son inmutables.
+    """
+    root = os.path.realpath(settings.MEDIA_IMG_PATH)
+    absolute = os.path.realpath(os.path.join(root, relative_path))
+    pending = os.path.realpath(settings.MEDIA_PENDING_PATH)
+    if os.path.commonpath([root, absolute]) != root or os.path.commonpath([pending, absolute]) == pending:
+        raise Http404('Imagen no encontrada.')
+    if not os.path.isfile(absolute):
+        raise Http404('Imagen no encontrada.')
+    return absolute
+
+
+def file_etag(stat):
+    """
+    ETag fuerte de un archivo a partir de su tamaño y fecha de modificación.
+    """
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def parse_range(header, size):
+    """
+    Interpreta una cabecera `Range` de un solo intervalo (RFC 9110 §14.2).
+
+    Returns:
+        tuple | None | bool: `(inicio, fin)` inclusivos, `None` si la cabecera no aplica (ausente, con varios
+        intervalos, mal formada o invertida como `bytes=500-100`: se responde el archivo completo) o `False`
+        si no se puede satisfacer.
+    """
+    match = RANGE_PATTERN.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Sufijo: los últimos `last` bytes.
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        # Un intervalo con el final antes del inicio no es válido y se ignora (RFC 9110 §14.1.1).
+        return None
+    if start >= size:
+        return False
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+def _read_range(path, start, end):
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = handle.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _cache_headers(response, etag, stat):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    # Los archivos servidos no cambian nunca: su nombre es el hash del contenido (blobs) o único por subida.
+    response['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def _handoff(absolute, relative_path, content_type):
+    """
+    Respuesta sin cuerpo que delega el envío del archivo en el servidor web, o `None` en modo `python`.
+    """
+    mode = getattr(settings, 'MEDIA_SERVE_MODE', 'python')
+    if mode == 'x-accel':
+        response = HttpResponse(content_type=content_type)
+        prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '/_protected/img/')
+        response['X-Accel-Redirect'] = prefix + quote(relative_path.replace(os.sep, '/'))
+        return response
+    if mode == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = absolute
+        return response
+    return None
+
+
+def serve_image_file(request, relative_path):
+    """
+    Responde a la petición de un archivo de imagen con validadores y caché inmutable.
+
+    Con `MEDIA_SERVE_MODE` `x-accel` (nginx) o `x-sendfile` (Apache, lighttpd) la vista solo resuelve la
+    ruta y las cabeceras, y el servidor web envía los bytes (y atiende `Range`). En modo `python` el archivo
+    se envía desde Django: admite `If-None-Match`/`If-Modified-Since` (304), `Range` de un intervalo (206,
+    o 416 si no se puede satisfacer) e `If-Range`.
+
+    Args:
+        request (HttpRequest): Petición GET o HEAD.
+        relative_path (str): Ruta relativa a `MEDIA_IMG_PATH`.
+
+    Returns:
+        HttpResponse: Respuesta con el archivo, parcial, sin cuerpo (304 o traspaso al servidor web) o 416.
+    """
+    absolute = resolve_image_file(relative_path)
+    stat = os.stat(absolute)
+    etag = file_etag(stat)
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = {tag.removeprefix('W/') for tag in parse_etags(if_none_match)}
+        if '*' in etags or etag in etags:
+            return _cache_headers(HttpResponseNotModified(), etag, stat)
+    else:
+        # `Last-Modified` tiene resolución de segundos: se compara con la fecha del archivo truncada.
+        if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE') or '')
+        if if_modified_since is not None and int(stat.st_mtime) <= if_modified_since:
+            return _cache_headers(HttpResponseNotModified(), etag, stat)
+
+    content_type = mimetypes.guess_type(absolute)[0] or 'application/octet-stream'
+    handoff = _handoff(absolute, relative_path, content_type)
+    if handoff is not None:
+        return _cache_headers(handoff, etag, stat)
+
+    byte_range = None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range or if_range.strip() == etag:
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), stat.st_size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return _cache_headers(response, etag, stat)
+    if byte_range is None:
+        return _cache_headers(FileResponse(open(absolute, 'rb'), content_type=content_type), etag, stat)
+
+    start, end = byte_range
+    response = StreamingHttpResponse(_read_range(absolute, start, end), status=206, content_type=content_type)
+    response['Content-Length'] = str(end - start + 1)
+    response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    return _cache_headers(response, etag, stat)
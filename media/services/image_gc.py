@@ -0,0 +1,182 @@
+import os
+from collections import defaultdict
+from itertools import chain
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from media.models import Image, ImageBlob
+
+# Carpeta de los blobs del almacenamiento por contenido (ver `image_service.blob_storage_path`).
+BLOBS_DIRECTORY = 'blobs'
+
+
+def image_targets():
+    """
+    Modelo al que apunta cada tipo de imagen a través de `external_id`.
+    """
+    return {
+        Image.ImageType.RECIPE: apps.get_model('recipes', 'Recipe'),
+        Image.ImageType.STEP: apps.get_model('recipes', 'Step'),
+        Image.ImageType.USER: get_user_model(),
+    }
+
+
+def orphan_images(images):
+    """
+    Filtra de `images` las que apuntan a un objeto que ya no existe (o a ninguno).
+
+    Hace una consulta por tipo de imagen, con los `external_id` del lote. Las imágenes de un tipo
+    desconocido se conservan.
+    """
+    targets = image_targets()
+    ids_by_type = defaultdict(set)
+    for image in images:
+        if image.external_id is not None:
+            ids_by_type[image.type].add(image.external_id)
+    existing = {
+        image_type: set(targets[image_type]._default_manager.filter(pk__in=ids).values_list('pk', flat=True))
+        for image_type, ids in ids_by_type.items()
+        if image_type in targets
+    }
+    return [
+        image for image in images
+        if image.type in targets and (image.external_id is None or image.external_id not in existing.get(image.type, ()))
+    ]
+
+
+def iter_orphan_images(batch_size=500, after_id=0, created_before=None):
+    """
+    Recorre la tabla de imágenes por lotes de `batch_size` filas, en orden de id.
+
+    Args:
+        batch_size (int): Filas leídas por consulta.
+        after_id (int): Último id ya revisado (para reanudar un recorrido anterior).
+        created_before (datetime | None): Solo se consideran huérfanas las imágenes creadas antes.
+
+    Yields:
+        tuple: `(último id del lote, imágenes huérfanas del lote)`.
+    """
+    while True:
+        batch = list(Image.objects.filter(id__gt=after_id).order_by('id')[:batch_size])
+        if not batch:
+            return
+        after_id = batch[-1].id
+        if created_before is not None:
+            batch = [image for image in batch if image.created_at < created_before]
+        yield after_id, orphan_images(batch)
+
+
+def delete_images(images):
+    """
+    Borra las filas de `images`; sus archivos (o su referencia al blob compartido) se liberan en el
+    post_delete de cada imagen (`media.signals`).
+    """
+    with transaction.atomic():
+        Image.objects.filter(pk__in=[image.pk for image in images]).delete()
+
+
+def managed_directories():
+    """
+    Carpetas de primer nivel de `MEDIA_IMG_PATH` con archivos gestionados por las imágenes, ordenadas:
+    las de cada usuario (`<user_id>/`), los blobs y los originales pendientes. El resto de archivos de
+    `MEDIA_IMG_PATH` (por ejemplo los estáticos de la propia carpeta) no se tocan.
+    """
+    pending = os.path.relpath(settings.MEDIA_PENDING_PATH, settings.MEDIA_IMG_PATH)
+    if not os.path.isdir(settings.MEDIA_IMG_PATH):
+        return []
+    with os.scandir(settings.MEDIA_IMG_PATH) as entries:
+        return sorted(
+            entry.name for entry in entries
+            if entry.is_dir(follow_symlinks=False)
+            and (entry.name.isdigit() or entry.name in (BLOBS_DIRECTORY, pending))
+        )
+
+
+def referenced_files(directory, names):
+    """
+    Devuelve cuáles de los archivos `names` de `directory` (relativa a `MEDIA_IMG_PATH`) tienen una fila.
+
+    Un archivo está referenciado si es el WEBP (`storage_path`) o una variante de una imagen o un blob,
+    el original pendiente (`source_path`) de una imagen o, en las filas antiguas sin `storage_path`,
+    el archivo `<user_id>/<url>`. Las variantes se buscan por su archivo principal (`<nombre>_<variante>.webp`
+    -> `<nombre>.webp`), así que basta una consulta por tabla para todo el lote.
+    """
+    paths = [os.path.join(directory, name) for name in names]
+    owners = set(paths)
+    for name in names:
+        stem = os.path.splitext(name)[0]
+        if '_' in stem:
+            owners.add(os.path.join(directory, f"{stem.rsplit('_', 1)[0]}.webp"))
+
+    referenced = set(Image.objects.filter(source_path__in=paths).values_list('source_path', flat=True))
+    rows = chain(
+        Image.objects.filter(storage_path__in=owners).values_list('storage_path', 'variants'),
+        ImageBlob.objects.filter(storage_path__in=owners).values_list('storage_path', 'variants'),
+    )
+    for storage_path, variants in rows:
+        referenced.add(storage_path)
+        folder = os.path.dirname(storage_path)
+        referenced.update(os.path.join(folder, filename) for filename in (variants or {}).values())
+    if directory.isdigit():
+        legacy = Image.objects.filter(storage_path__isnull=True, url__in=names).values_list('url', flat=True)
+        referenced.update(os.path.join(directory, url) for url in legacy)
+    return referenced
+
+
+def _walk(relative, after, batch_size):
+    """
+    Recorre `relative` en profundidad con `os.scandir`, con las subcarpetas en orden, saltando lo ya revisado
+    hasta la carpeta `after` (tupla de componentes). Produce los archivos en lotes de como mucho `batch_size`
+    `(carpeta, entradas, carpeta terminada)`; en memoria solo quedan el lote y los nombres de subcarpetas.
+    """
+    parts = tuple(relative.split(os.sep))
+    if after and parts < after and after[:len(parts)] != parts:
+        # Todo el subárbol es anterior al punto de reanudación.
+        return
+    include_files = not after or parts > after
+    subdirectories = []
+    batch = []
+    with os.scandir(os.path.join(settings.MEDIA_IMG_PATH, relative)) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirectories.append(entry.name)
+            elif include_files and entry.is_file(follow_symlinks=False):
+                batch.append(entry)
+                if len(batch) >= batch_size:
+                    yield relative, batch, False
+                    batch = []
+    if include_files:
+        yield relative, batch, True
+    for name in sorted(subdirectories):
+        yield from _walk(os.path.join(relative, name), after, batch_size)
+
+
+def iter_orphan_files(batch_size=500, after_directory=None, modified_before=None):
+    """
+    Recorre los archivos gestionados de `MEDIA_IMG_PATH` y localiza los que no tienen ninguna fila.
+
+    Args:
+        batch_size (int): Archivos comprobados por consulta.
+        after_directory (str | None): Última carpeta ya revisada por completo (para reanudar).
+        modified_before (float | None): Marca de tiempo; solo se consideran huérfanos los archivos
+            modificados antes (el pipeline escribe los archivos antes de guardar la fila).
+
+    Yields:
+        tuple: `(carpeta, [(ruta relativa, bytes)], carpeta terminada)`.
+    """
+    after = tuple(after_directory.split(os.sep)) if after_directory else None
+    for top in managed_directories():
+        for directory, entries, done in _walk(top, after, batch_size):
+            referenced = referenced_files(directory, [entry.name for entry in entries]) if entries else set()
+            orphans = []
+            for entry in entries:
+                path = os.path.join(directory, entry.name)
+                if path in referenced:
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+                if modified_before is None or stat.st_mtime < modified_before:
+                    orphans.append((path, stat.st_size))
+            yield directory, orphans, done
@@ -0,0 +1,299 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from api.response_cache import image_tags
+from api.versioning import RECIPES, bump_versions
+from media.models import Image
+from media.services.image_service import (
+    absolute_image_path,
+    acquire_blob,
+    release_blob,
+    remove_files_for_image,
+    remove_relative_file,
+    render_variants,
+)
+from media.signals import image_processed
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def process_image(image_id):
+    """
+    Convierte a WEBP el original pendiente de una imagen, genera sus variantes y avanza su estado.
+
+    La fila se reclama con un `UPDATE` condicionado a `UPLOADED -> PROCESSING`, de modo que si el mismo id
+    se encola dos veces (o lo procesan dos workers) solo uno de ellos hace el trabajo.
+    Al terminar la imagen queda en `COMPLETED` o, si la conversión falla, en `FAILED`. Ese último `UPDATE`
+    también va condicionado (a `PROCESSING` y al mismo `source_path`): si mientras tanto la imagen se ha
+    vuelto a subir o se ha borrado, el resultado se descarta y la fila queda para el trabajo de la subida nueva.
+
+    Si la imagen tiene `content_hash` (almacenamiento por contenido) y otro worker ya generó el blob de ese
+    contenido, se enlaza a él sin volver a convertir; si no, se convierte y se crea el blob.
+
+    Args:
+        image_id (int): Id de la imagen a procesar.
+
+    Returns:
+        bool: `True` si la imagen se procesó correctamente.
+    """
+    return process_images([image_id]).get(image_id, False)
+
+
+def _claim(image_id):
+    claimed = Image.objects.filter(
+        pk=image_id, processing_status=Image.ImageStatus.UPLOADED
+    ).update(processing_status=Image.ImageStatus.PROCESSING, processing_started_at=timezone.now())
+    return Image.objects.get(pk=image_id) if claimed else None
+
+
+def _render(image_obj):
+    # Solo Pillow y disco, sin base de datos: se puede ejecutar en cualquier hilo.
+    return render_variants(absolute_image_path(image_obj.source_path), image_obj.storage_path)
+
+
+def process_images(image_ids):
+    """
+    Procesa un lote de imágenes como `process_image`, con la conversión en paralelo.
+
+    Las filas se reclaman, se enlazan a sus blobs y se actualizan en el hilo que llama; solo la
+    conversión (`render_variants`, en la que Pillow libera el GIL) se reparte en un pool de como mucho
+    `IMAGE_ENCODE_WORKERS` hilos. Las imágenes del lote con el mismo contenido se convierten una sola vez.
+    El error de una imagen la deja en `FAILED` sin afectar al resto.
+
+    Args:
+        image_ids (iterable[int]): Ids de las imágenes a procesar.
+
+    Returns:
+        dict: Mapa `id -> bool` con el resultado de cada imagen reclamada (`False` también si no se reclamó).
+    """
+    results = {}
+    claimed = []
+    for image_id in dict.fromkeys(image_ids):
+        image_obj = _claim(image_id)
+        if image_obj is None:
+            results[image_id] = False
+        else:
+            claimed.append(image_obj)
+
+    # Un trabajo de conversión por contenido: las imágenes sin hash se convierten cada una por separado.
+    jobs = {}
+    blobs = {}
+    for image_obj in claimed:
+        blob = acquire_blob(image_obj.content_hash) if image_obj.content_hash else None
+        if blob is not None:
+            blobs[image_obj.pk] = blob
+        else:
+            jobs.setdefault(image_obj.content_hash or image_obj.pk, image_obj)
+
+    rendered = {}
+    if len(jobs) == 1:
+        key, image_obj = next(iter(jobs.items()))
+        rendered[key] = _attempt(_render, image_obj)
+    elif jobs:
+        workers = min(getattr(settings, 'IMAGE_ENCODE_WORKERS', 4), len(jobs))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image-encode') as pool:
+            futures = {key: pool.submit(_attempt, _render, image_obj) for key, image_obj in jobs.items()}
+        rendered = {key: future.result() for key, future in futures.items()}
+
+    for image_obj in claimed:
+        blob = blobs.get(image_obj.pk)
+        if blob is not None:
+            variants = blob.variants
+        else:
+            variants, error = rendered[image_obj.content_hash or image_obj.pk]
+            if error is not None:
+                logger.error(f"Error procesando la imagen {image_obj.pk} ({image_obj.source_path}): {error}", exc_info=error)
+                _fail(image_obj)
+                results[image_obj.pk] = False
+                continue
+            if image_obj.content_hash:
+                # La primera imagen de cada contenido crea el blob; las siguientes suman una referencia.
+                blob = acquire_blob(image_obj.content_hash, variants)
+        remove_relative_file(image_obj.source_path)
+        results[image_obj.pk] = _complete(image_obj, variants, blob)
+    return results
+
+
+def _attempt(function, *args):
+    try:
+        return function(*args), None
+    except Exception as e:
+        return None, e
+
+
+def _claimed_row(image_obj):
+    # La fila sigue siendo la que se reclamó: ni se ha vuelto a subir (otro `source_path`), ni se ha borrado,
+    # ni la ha reclamado otro trabajo tras darla por interrumpida (otro `processing_started_at`).
+    return Image.objects.filter(
+        pk=image_obj.pk,
+        processing_status=Image.ImageStatus.PROCESSING,
+        source_path=image_obj.source_path,
+        processing_started_at=image_obj.processing_started_at,
+    )
+
+
+def _fail(image_obj):
+    if _claimed_row(image_obj).update(processing_status=Image.ImageStatus.FAILED):
+        bump_versions(RECIPES, *image_tags(image_obj))
+
+
+def _complete(image_obj, variants, blob):
+    updated = _claimed_row(image_obj).update(
+        processing_status=Image.ImageStatus.COMPLETED, source_path=None, variants=variants, blob=blob
+    )
+    if not updated:
+        # La imagen se sustituyó o borró durante la conversión: lo generado no lo usa ninguna fila.
+        logger.info(f"La imagen {image_obj.pk} cambió durante su conversión; se descarta el resultado.")
+        if blob is not None:
+            release_blob(blob.pk)
+        elif not Image.objects.filter(pk=image_obj.pk, storage_path=image_obj.storage_path).exists():
+            # Si la fila sigue apuntando a esta ruta, la ha vuelto a convertir otro trabajo: los archivos son suyos.
+            remove_files_for_image(Image(url=image_obj.url, storage_path=image_obj.storage_path, variants=variants))
+        return False
+    # `update()` no dispara post_save: las recetas que muestran la imagen cambian de versión aquí.
+    bump_versions(RECIPES, *image_tags(image_obj))
+    image_processed.send(sender=Image, instance=image_obj)
+    return True
+
+
+class SyncBackend:
+    """
+    Backend que procesa la imagen en el mismo hilo que la encola. Útil en tests y en scripts.
+    """
+
+    def enqueue(self, image_id):
+        process_image(image_id)
+
+    def enqueue_many(self, image_ids):
+        process_images(image_ids)
+
+
+class LocalQueueBackend:
+    """
+    Backend que procesa las imágenes en un pool de hilos alimentado por una cola en memoria.
+
+    Sustituye a un broker en despliegues de un solo proceso: los trabajos no sobreviven a un reinicio,
+    pero las imágenes siguen en `UPLOADED` y pueden recuperarse con `process_pending_images`.
+
+    Attributes:
+        `workers (int)`: Número de hilos del pool (`IMAGE_PIPELINE_WORKERS`).
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or getattr(settings, 'IMAGE_PIPELINE_WORKERS', 2)
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def _ensure_workers(self):
+        # Los hilos se arrancan con el primer trabajo, no al importar el módulo.
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f'image-pipeline-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self):
+        while True:
+            # Un trabajo es un id o una tupla de ids (`enqueue_many`), que se procesa junta con la conversión en paralelo.
+            job = self._queue.get()
+            try:
+                close_old_connections()
+                if isinstance(job, tuple):
+                    process_images(job)
+                else:
+                    process_image(job)
+            except Exception as e:
+                logger.error(f"Error inesperado en el worker de imágenes para {job}: {e}", exc_info=True)
+            finally:
+                close_old_connections()
+                self._queue.task_done()
+
+    def enqueue(self, image_id):
+        self._ensure_workers()
+        self._queue.put(image_id)
+
+    def enqueue_many(self, image_ids):
+        self._ensure_workers()
+        self._queue.put(tuple(image_ids))
+
+    def join(self):
+        """
+        Espera a que se vacíe la cola.
+        """
+        self._queue.join()
+
+
+def requeue_stale_processing(older_than):
+    """
+    Devuelve a `UPLOADED` las imágenes que llevan en `PROCESSING` desde antes de `older_than`.
+
+    Los trabajos del `LocalQueueBackend` viven en memoria: si el proceso termina durante una conversión, la
+    fila se queda reclamada para siempre. Al volver a `UPLOADED` se pueden procesar de nuevo; si el trabajo
+    original sigue vivo, su `UPDATE` final (condicionado a `PROCESSING`) no encuentra la fila y descarta
+    su resultado.
+
+    Args:
+        older_than (datetime): Límite del momento en que se reclamaron.
+
+    Returns:
+        int: Número de imágenes devueltas a `UPLOADED`.
+    """
+    return Image.objects.filter(
+        processing_status=Image.ImageStatus.PROCESSING, source_path__isnull=False
+    ).filter(
+        Q(processing_started_at__lt=older_than) | Q(processing_started_at__isnull=True)
+    ).update(processing_status=Image.ImageStatus.UPLOADED, processing_started_at=None)
+
+
+_backend = None
+_backend_path = None
+
+
+def get_backend():
+    """
+    Devuelve la instancia (única por proceso) del backend configurado en `IMAGE_PIPELINE_BACKEND`.
+    """
+    global _backend, _backend_path
+    path = settings.IMAGE_PIPELINE_BACKEND
+    if _backend is None or _backend_path != path:
+        _backend = import_string(path)()
+        _backend_path = path
+    return _backend
+
+
+def submit(image_id):
+    """
+    Encola una imagen en el backend configurado cuando se confirme la transacción en curso.
+    """
+    transaction.on_commit(lambda: get_backend().enqueue(image_id))
+
+
+def submit_many(image_ids):
+    """
+    Encola un lote de imágenes como un único trabajo cuando se confirme la transacción en curso.
+    Los backends sin `enqueue_many` reciben las imágenes una a una.
+    """
+    image_ids = list(image_ids)
+    if not image_ids:
+        return
+
+    def enqueue():
+        backend = get_backend()
+        if hasattr(backend, 'enqueue_many'):
+            backend.enqueue_many(image_ids)
+        else:
+            for image_id in image_ids:
+                backend.enqueue(image_id)
+    transaction.on_commit(enqueue)
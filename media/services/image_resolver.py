@@ -0,0 +1,82 @@
+from django.db.models import Prefetch
+
+from media.models import Image
+
+
+class ImageResolver:
+    """
+    Resuelve en bloque las imágenes asociadas a recetas, pasos o usuarios (`(type, external_id)`).
+
+    En lugar de lanzar un `Image.objects.filter(...).first()` por cada objeto serializado,
+    los serializers "preparan" (`prime`) todos los ids que van a necesitar y el resolver
+    los carga con una única consulta por tipo. Las consultas posteriores se sirven desde memoria.
+
+    Se comparte a través del `context` del serializer raíz, por lo que los serializers
+    anidados (por ejemplo los pasos de una receta) reutilizan la misma instancia.
+
+    Attributes:
+        `_images (dict)`: Mapa `(type, external_id) -> Image | None` con las imágenes ya resueltas.
+    """
+
+    def __init__(self):
+        self._images = {}
+
+    def prime(self, image_type, external_ids):
+        """
+        Carga con una sola consulta las imágenes de `image_type` para los ids aún no resueltos.
+        """
+        missing = {
+            external_id for external_id in external_ids
+            if external_id is not None and (image_type, external_id) not in self._images
+        }
+        if not missing:
+            return
+
+        for external_id in missing:
+            self._images[(image_type, external_id)] = None
+
+        # Se ordena por pk para conservar la semántica de `.first()` si hubiera duplicados.
+        images = Image.objects.for_owners(image_type, missing).order_by('pk')
+        for image in images:
+            key = (image_type, image.external_id)
+            if self._images[key] is None:
+                self._images[key] = image
+
+    def get(self, image_type, external_id):
+        """
+        Devuelve la imagen de `(image_type, external_id)` o `None` si no existe.
+        """
+        key = (image_type, external_id)
+        if key not in self._images:
+            self.prime(image_type, [external_id])
+        return self._images[key]
+
+
+def get_image_resolver(context):
+    """
+    Obtiene el `ImageResolver` del contexto del serializer, creándolo si todavía no existe.
+    """
+    resolver = context.get('image_resolver')
+    if resolver is None:
+        resolver = ImageResolver()
+        context['image_resolver'] = resolver
+    return resolver
+
+
+def owner_image(owner):
+    """
+    Primera imagen (por pk) de una receta, paso o usuario, o `None`.
+
+    Usa las imágenes precargadas con `prefetch_owner_images` si las hay; si no, hace una consulta.
+    """
+    cache = getattr(owner, '_prefetched_objects_cache', {})
+    if 'images' in cache:
+        return next(iter(cache['images']), None)
+    return owner.images.order_by('pk').first()
+
+
+def prefetch_owner_images():
+    """
+    `Prefetch` de las imágenes de un queryset de recetas, pasos o usuarios, para usar con `owner_image`.
+    """
+    return Prefetch('images', queryset=Image.objects.order_by('pk'))
@@ -1,8 +1,15 @@
+import hashlib
 import os
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
-from PIL import Image as PILImage
-from media.models import Image
+from django.db import transaction
+from django.db.models import F, Q
+from PIL import Image as PILImage, UnidentifiedImageError
+from api.response_cache import recipe_tag, user_tag
+from api.versioning import RECIPES, bump_versions
+from media.models import Image, ImageBlob
+from media.signals import image_processed
 from django.forms import ValidationError
 
 import logging
@@ -11,6 +18,8 @@ import logging
 logger = logging.getLogger(__name__)
 
 ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png', 'webp'}
+# Formatos cuyo decoder reduce la escala al decodificar (`draft()`); el resto se decodifica entero.
+DRAFT_FORMATS = {'JPEG', 'MPO'}
 
 def validate_extension(filename):
     ext = filename.split('.')[-1].lower()
@@ -19,13 +28,125 @@ def validate_extension(filename):
         raise ValidationError(f"Formato de imagen no permitido: .{ext}")
 
 
-def remove_image_file(user_id, filename):
-    if not filename:
-        logger.warning("No se proporcionó nombre de archivo para remove_image_file, omitiendo.")
+def check_image_header(source):
+    """
+    Lee solo la cabecera de una imagen (sin decodificar los píxeles) y comprueba sus dimensiones.
+
+    Args:
+        source (str | file): Ruta o archivo de la imagen.
+
+    Returns:
+        tuple: `(ancho, alto)` de la imagen.
+
+    Raises:
+        ValidationError: Si no es una imagen reconocible o supera su límite de píxeles (`_check_pixels`).
+    """
+    try:
+        with PILImage.open(source) as image:
+            size, image_format = image.size, image.format
+    except PILImage.DecompressionBombError:
+        raise ValidationError("La imagen es demasiado grande.")
+    except (UnidentifiedImageError, OSError):
+        raise ValidationError("El archivo no es una imagen válida.")
+    finally:
+        if hasattr(source, 'seek'):
+            source.seek(0)
+    _check_pixels(size, image_format)
+    return size
+
+
+def _check_pixels(size, image_format):
+    """
+    Rechaza las imágenes con más píxeles de los que se pueden decodificar con memoria acotada.
+
+    Los formatos de `DRAFT_FORMATS` se decodifican ya reducidos y admiten hasta `IMAGE_MAX_PIXELS`; el resto
+    (PNG, WEBP) se decodifica siempre a resolución completa, así que su límite es
+    `IMAGE_MAX_FULL_DECODE_PIXELS`.
+    """
+    width, height = size
+    limit = settings.IMAGE_MAX_PIXELS
+    if image_format not in DRAFT_FORMATS:
+        limit = min(limit, settings.IMAGE_MAX_FULL_DECODE_PIXELS)
+    if width * height > limit:
+        raise ValidationError(
+            f"La imagen es demasiado grande ({width}x{height}); máximo {limit} píxeles."
+        )
+
+
+def decode_bounded(image, max_side=None):
+    """
+    Decodifica una imagen abierta (aún sin decodificar) con memoria acotada.
+
+    Comprueba el número de píxeles de la cabecera antes de decodificar (`_check_pixels`) y, si la imagen es
+    mayor que `max_side`, la reduce: en JPEG `draft()` hace que el decoder trabaje directamente a 1/2, 1/4 o
+    1/8 de escala; el resto de formatos se decodifica entero (de ahí su límite de píxeles menor) y `reduce()`
+    lo reduce después por un factor entero. El ajuste final lo hace `thumbnail()`.
+
+    Args:
+        image (PIL.Image.Image): Imagen devuelta por `PILImage.open`.
+        max_side (int | None): Lado mayor que se necesita como máximo, o `None` para no reducir.
+
+    Returns:
+        PIL.Image.Image: Imagen decodificada, como mucho a un factor 2 de `max_side`.
+    """
+    _check_pixels(image.size, image.format)
+    if max_side and max(image.size) > max_side:
+        image.draft(image.mode, (max_side, max_side))
+        factor = max(image.size) // max_side
+        if factor >= 2:
+            return image.reduce(factor)
+    image.load()
+    return image
+
+
+def absolute_image_path(relative_path):
+    """
+    Convierte una ruta relativa a `MEDIA_IMG_PATH` (como `Image.storage_path`) en una ruta absoluta.
+    """
+    return os.path.join(settings.MEDIA_IMG_PATH, relative_path)
+
+
+def variant_path(image_obj, variant):
+    """
+    Ruta relativa a `MEDIA_IMG_PATH` de una variante de la imagen, o `None` si todavía no está procesada.
+    Las imágenes anteriores a las variantes solo tienen el archivo principal, que se usa para todas.
+    """
+    if image_obj.processing_status != Image.ImageStatus.COMPLETED or not image_obj.storage_path:
+        return None
+    filename = (image_obj.variants or {}).get(variant) or os.path.basename(image_obj.storage_path)
+    return os.path.join(os.path.dirname(image_obj.storage_path), filename)
+
+
+def media_url(relative_path):
+    """
+    URL pública de un archivo identificado por su ruta relativa a `MEDIA_IMG_PATH`.
+    """
+    if not relative_path:
+        return None
+    return f"{settings.MEDIA_IMAGE_URL}{relative_path.replace(os.sep, '/')}"
+
+
+def image_urls(image_obj):
+    """
+    URLs públicas de las variantes de una imagen procesada (`{'thumb': ..., 'card': ..., 'full': ...}`).
+
+    Las rutas son inmutables (hash del contenido o uuid por subida), así que las URLs pueden guardarse en
+    caché indefinidamente. Devuelve un diccionario vacío mientras la imagen no está procesada; las imágenes
+    anteriores a las variantes solo tienen `full`.
+    """
+    if image_obj.processing_status != Image.ImageStatus.COMPLETED or not image_obj.storage_path:
+        return {}
+    names = list(image_obj.variants or {}) or ['full']
+    return {name: media_url(variant_path(image_obj, name)) for name in names}
+
+
+def remove_relative_file(relative_path):
+    """
+    Elimina un archivo identificado por su ruta relativa a `MEDIA_IMG_PATH`, si existe.
+    """
+    if not relative_path:
         return
-    # Asumiendo que 'filename' es solo el nombre único del archivo, y la ruta se construye
-    # con 'MEDIA_IMG_PATH / user_id / filename'
-    path = os.path.join(settings.MEDIA_IMG_PATH, str(user_id), filename)
+    path = absolute_image_path(relative_path)
     if os.path.exists(path):
         try:
             os.remove(path)
@@ -33,19 +154,423 @@ def remove_image_file(user_id, filename):
             logger.error(f"Error al eliminar archivo {path}: {e}", exc_info=True)
 
 
-def save_file_to_disk(image_file, user_id):
+def remove_image_file(user_id, filename, blob_id=None):
+    if blob_id:
+        # En el almacenamiento por contenido el archivo se comparte: solo se borra con la última referencia.
+        release_blob(blob_id)
+        return
+    if not filename:
+        logger.warning("No se proporcionó nombre de archivo para remove_image_file, omitiendo.")
+        return
+    # Asumiendo que 'filename' es solo el nombre único del archivo, y la ruta se construye
+    # con 'MEDIA_IMG_PATH / user_id / filename'
+    remove_relative_file(os.path.join(str(user_id), filename))
+
+
+def remove_files_for_image(image_obj, user_id=None):
+    """
+    Elimina del disco el WEBP, sus variantes y, si todavía existe, el original pendiente de una imagen.
+    Usa `storage_path` cuando está disponible; para filas antiguas sin él recurre a `user_id/url`.
+    Si la imagen apunta a un blob compartido solo se libera su referencia (ver `release_blob`).
+    """
+    if image_obj.blob_id:
+        release_blob(image_obj.blob_id)
+    elif image_obj.content_hash:
+        # Pendiente de procesar en modo por contenido: la ruta final pertenece al (futuro) blob.
+        pass
+    elif image_obj.storage_path:
+        remove_relative_file(image_obj.storage_path)
+        directory = os.path.dirname(image_obj.storage_path)
+        for filename in (image_obj.variants or {}).values():
+            if filename != image_obj.url:
+                remove_relative_file(os.path.join(directory, filename))
+    elif user_id is not None:
+        remove_image_file(user_id, image_obj.url)
+    remove_relative_file(image_obj.source_path)
+
+
+def _remove_stored_files(storage_path, variants):
+    remove_relative_file(storage_path)
+    directory = os.path.dirname(storage_path)
+    for filename in (variants or {}).values():
+        remove_relative_file(os.path.join(directory, filename))
+
+
+def blob_storage_path(content_hash):
+    """
+    Ruta relativa a `MEDIA_IMG_PATH` del WEBP de un blob: `blobs/<hh>/<hash>.webp`.
+    """
+    return os.path.join('blobs', content_hash[:2], f"{content_hash}.webp")
+
+
+def acquire_blob(content_hash, variants=None):
+    """
+    Suma una referencia al blob de `content_hash` y lo devuelve.
+
+    Si el blob no existe y se indican `variants` (recién generadas en `blob_storage_path`), lo crea con una
+    referencia; sin `variants` devuelve `None`. La fila se bloquea para no competir con `release_blob`.
+    """
+    with transaction.atomic():
+        blob = ImageBlob.objects.select_for_update().filter(hash=content_hash).first()
+        if blob is not None:
+            ImageBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+            return blob
+        if variants is None:
+            return None
+        blob, created = ImageBlob.objects.get_or_create(
+            hash=content_hash,
+            defaults={'storage_path': blob_storage_path(content_hash), 'variants': variants, 'ref_count': 1},
+        )
+        if not created:
+            ImageBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+        return blob
+
+
+def acquire_existing_blobs(content_hashes):
+    """
+    Suma a cada blob ya existente tantas referencias como apariciones tiene su hash en `content_hashes`.
+
+    Es la versión en bloque de `acquire_blob` sin `variants`: una consulta bloquea todos los blobs y
+    después se hace un `UPDATE` por blob encontrado.
+
+    Returns:
+        dict: Mapa `hash -> ImageBlob` de los blobs existentes.
+    """
+    counts = {}
+    for content_hash in content_hashes:
+        counts[content_hash] = counts.get(content_hash, 0) + 1
+    if not counts:
+        return {}
+    with transaction.atomic():
+        blobs = {blob.hash: blob for blob in ImageBlob.objects.select_for_update().filter(hash__in=counts)}
+        for content_hash, blob in blobs.items():
+            ImageBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + counts[content_hash])
+    return blobs
+
+
+def release_blob(blob_id):
+    """
+    Resta una referencia a un blob y, si era la última, borra la fila y (al confirmar) sus archivos.
+    """
+    with transaction.atomic():
+        ImageBlob.objects.filter(pk=blob_id, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+        blob = ImageBlob.objects.select_for_update().filter(pk=blob_id, ref_count=0).first()
+        if blob is None:
+            return
+        content_hash, storage_path, variants = blob.hash, blob.storage_path, blob.variants
+        blob.delete()
+        transaction.on_commit(lambda: _remove_blob_files(content_hash, storage_path, variants))
+
+
+def _remove_blob_files(content_hash, storage_path, variants):
+    # Los archivos de un blob están en una ruta fija por su hash: si entretanto otro trabajo ha vuelto a
+    # generar ese contenido y ha creado su blob, los archivos son ya los suyos.
+    if ImageBlob.objects.filter(hash=content_hash).exists():
+        return
+    _remove_stored_files(storage_path, variants)
+
+
+def store_upload(image_file, user_id):
+    """
+    Guarda la subida tal cual, sin decodificarla, en `MEDIA_PENDING_PATH` para que la procese el pipeline.
+    Antes comprueba el tamaño en bytes y las dimensiones de la cabecera (`check_image_header`).
+
+    Args:
+        image_file (UploadedFile): Archivo subido.
+        user_id (int): Usuario en cuya carpeta se guardará el WEBP final.
+
+    Returns:
+        tuple: `(filename, storage_path, source_path, content_hash)` donde `filename` es el nombre del WEBP final,
+        `storage_path` su ruta relativa a `MEDIA_IMG_PATH`, `source_path` la del original pendiente y
+        `content_hash` el SHA-256 de los bytes subidos (calculado mientras se escriben).
+        Con `IMAGE_CONTENT_ADDRESSED` el WEBP final es el del blob (`blob_storage_path`).
+    """
+    validate_extension(image_file.name)
+    if image_file.size and image_file.size > settings.IMAGE_MAX_UPLOAD_BYTES:
+        raise ValidationError(f"La imagen supera el tamaño máximo de {settings.IMAGE_MAX_UPLOAD_BYTES} bytes.")
+    check_image_header(image_file)
+    ext = image_file.name.split('.')[-1].lower()
+    token = uuid.uuid4()
+
+    os.makedirs(settings.MEDIA_PENDING_PATH, exist_ok=True)
+    source_abs = os.path.join(settings.MEDIA_PENDING_PATH, f"{token}.{ext}")
+    digest = hashlib.sha256()
+    with open(source_abs, 'wb') as destination:
+        for chunk in image_file.chunks():
+            digest.update(chunk)
+            destination.write(chunk)
+    content_hash = digest.hexdigest()
+
+    if getattr(settings, 'IMAGE_CONTENT_ADDRESSED', False):
+        storage_path = blob_storage_path(content_hash)
+    else:
+        storage_path = os.path.join(str(user_id), f"{token}.webp")
+    filename = os.path.basename(storage_path)
+    source_path = os.path.relpath(source_abs, settings.MEDIA_IMG_PATH)
+    return filename, storage_path, source_path, content_hash
+
+
+def store_each_upload(image_files, user_id):
+    """
+    Guarda varias subidas con `store_upload` en paralelo, en un pool de como mucho `IMAGE_ENCODE_WORKERS` hilos.
+
+    La validación de la cabecera, el hash y la escritura de cada archivo son independientes (y liberan el
+    GIL), así que un lote de fotos no espera a que se guarde cada una.
+
+    Args:
+        image_files (list[UploadedFile]): Archivos subidos.
+        user_id (int): Usuario en cuya carpeta se guardarán los WEBP finales.
+
+    Returns:
+        list: Por cada archivo, en el mismo orden, el resultado de `store_upload` o la excepción que lanzó.
+    """
+    def attempt(image_file):
+        try:
+            return store_upload(image_file, user_id)
+        except Exception as e:
+            return e
+
+    if len(image_files) <= 1:
+        return [attempt(image_file) for image_file in image_files]
+    workers = min(getattr(settings, 'IMAGE_ENCODE_WORKERS', 4), len(image_files))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image-upload') as pool:
+        return list(pool.map(attempt, image_files))
+
+
+def store_uploads(image_files, user_id):
+    """
+    Guarda varias subidas en paralelo (`store_each_upload`) como un todo: si alguna falla se borran los
+    originales ya guardados del lote y se relanza el primer error.
+
+    Returns:
+        list[tuple]: El resultado de `store_upload` de cada archivo, en el mismo orden.
+    """
+    results = store_each_upload(image_files, user_id)
+    errors = [result for result in results if isinstance(result, Exception)]
+    if errors:
+        _remove_sources([result for result in results if not isinstance(result, Exception)])
+        raise errors[0]
+    return results
+
+
+def _remove_sources(stored):
+    for _filename, _storage_path, source_path, _content_hash in stored:
+        remove_relative_file(source_path)
+
+
+def owner_tags(uploads):
+    """
+    Etiquetas de `api.response_cache` de los propietarios de un lote `(image_file, image_type, owner)`,
+    sin consultas (ver `api.response_cache.image_tags`).
+    """
+    tags = set()
+    for _image_file, image_type, owner in uploads:
+        if image_type == Image.ImageType.STEP:
+            tags.add(recipe_tag(owner.recipe_id))
+        elif image_type == Image.ImageType.RECIPE:
+            tags.add(recipe_tag(owner.pk))
+        elif image_type == Image.ImageType.USER:
+            tags.add(user_tag(owner.pk))
+    return tags
+
+
+def create_images(uploads, user_id):
+    """
+    Crea las imágenes de un lote de objetos nuevos (por ejemplo la receta y sus pasos) con un único `bulk_create`.
+
+    Los archivos se guardan en paralelo (`store_uploads`) y las filas se insertan juntas, ya enlazadas a su
+    propietario; las que reutilizan un blob quedan `COMPLETED` y el resto se encola en el pipeline, que las
+    convierte en paralelo (`image_pipeline.process_images`). Si falla cualquier paso se borran los originales
+    guardados y se relanza el error, de modo que la transacción en curso se revierte sin dejar archivos.
+
+    A diferencia de `replace_images` no sustituye imágenes existentes: los propietarios no deben tener ya imagen.
+
+    Args:
+        uploads (list[tuple]): `(image_file, image_type, owner)` con el archivo, el tipo y el objeto propietario.
+        user_id (int): Usuario que sube las imágenes.
+
+    Returns:
+        list[Image]: Las imágenes creadas, en el mismo orden.
+    """
+    if not uploads:
+        return []
+    stored = store_uploads([image_file for image_file, _image_type, _owner in uploads], user_id)
     try:
-        folder = os.path.join(settings.MEDIA_IMG_PATH, str(user_id))
-        os.makedirs(folder, exist_ok=True)
+        images = _insert_images(uploads, stored)
+    except Exception:
+        _remove_sources(stored)
+        raise
+    _after_insert(images, stored)
+    return images
 
-        new_filename = f"{uuid.uuid4()}.webp"
-        full_path = os.path.join(folder, new_filename)
 
-        image = PILImage.open(image_file)
-        # Convierte a RGB si no lo está, ya que WebP típicamente no soporta RGBA para guardar
-        if image.mode == 'RGBA':
-            image = image.convert('RGB')
-        image.save(full_path, format="WEBP")
+def replace_images(uploads, stored):
+    """
+    Sustituye las imágenes de un lote de objetos por las subidas ya guardadas (`store_each_upload`).
+
+    En una transacción se insertan todas las imágenes nuevas con un `bulk_create` y se borran las
+    anteriores de esos objetos con un único `DELETE` (sus archivos se liberan en el post_delete de cada
+    imagen). Si falla se borran los originales guardados y se relanza el error.
+
+    Args:
+        uploads (list[tuple]): `(image_file, image_type, owner)`, como en `create_images`.
+        stored (list[tuple]): Resultado de `store_upload` de cada subida, en el mismo orden.
+
+    Returns:
+        list[Image]: Las imágenes creadas, en el mismo orden.
+    """
+    if not uploads:
+        return []
+    owners = Q()
+    for image_type in {image_type for _image_file, image_type, _owner in uploads}:
+        ids = [owner.pk for _image_file, owner_type, owner in uploads if owner_type == image_type]
+        owners |= Q(type=image_type, external_id__in=ids)
+    try:
+        with transaction.atomic():
+            previous = list(Image.objects.filter(owners).values_list('pk', flat=True))
+            images = _insert_images(uploads, stored)
+            # Se borran después de insertar: si la imagen nueva reutiliza el blob de la anterior, el blob
+            # no llega a quedarse sin referencias.
+            Image.objects.filter(pk__in=previous).delete()
+    except Exception:
+        _remove_sources(stored)
+        raise
+    _after_insert(images, stored)
+    return images
+
+
+def _insert_images(uploads, stored):
+    content_addressed = getattr(settings, 'IMAGE_CONTENT_ADDRESSED', False)
+    with transaction.atomic():
+        blobs = acquire_existing_blobs([item[3] for item in stored]) if content_addressed else {}
+        images = []
+        for (_image_file, image_type, owner), (filename, storage_path, source_path, content_hash) in zip(uploads, stored):
+            image = Image(
+                name=filename,
+                url=filename,
+                type=image_type,
+                external_id=owner.pk,
+                storage_path=storage_path,
+                source_path=source_path,
+                content_hash=content_hash if content_addressed else None,
+                processing_status=Image.ImageStatus.UPLOADED,
+                **{Image.OWNER_FIELDS[image_type]: owner},
+            )
+            blob = blobs.get(content_hash)
+            if blob is not None:
+                image.storage_path, image.source_path = blob.storage_path, None
+                image.variants, image.blob = blob.variants, blob
+                image.processing_status = Image.ImageStatus.COMPLETED
+            images.append(image)
+        # `bulk_create` no llama a `save()` ni dispara post_save: la clave del propietario ya va
+        # rellena y las respuestas que muestran las imágenes se invalidan aquí.
+        Image.objects.bulk_create(images)
+        bump_versions(RECIPES, *owner_tags(uploads))
+    return images
+
+
+def _after_insert(images, stored):
+    # Import diferido: el pipeline importa este módulo.
+    from media.services.image_pipeline import submit_many
+
+    for image, (_filename, _storage_path, source_path, _content_hash) in zip(images, stored):
+        if image.blob_id:
+            remove_relative_file(source_path)
+            image_processed.send(sender=Image, instance=image)
+    submit_many([image.id for image in images if image.blob_id is None])
+
+
+def _open_for_webp(image):
+    # Convierte a RGB si no lo está, ya que WebP típicamente no soporta RGBA para guardar
+    if image.mode == 'RGBA':
+        return image.convert('RGB')
+    return image
+
+
+def transcode_to_webp(source, destination):
+    """
+    Decodifica una imagen (ruta o archivo) y la guarda como WEBP en `destination`, creando la carpeta si hace falta.
+    """
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    with PILImage.open(source) as image:
+        full_side = settings.IMAGE_VARIANTS.get('full')
+        current = decode_bounded(image, full_side)
+        if full_side:
+            current.thumbnail((full_side, full_side))
+        _open_for_webp(current).save(destination, format="WEBP")
+
+
+def variant_filename(filename, variant):
+    """
+    Nombre del archivo de una variante: `<uuid>_<variant>.webp`. La variante `full` es el propio archivo.
+    """
+    if variant == 'full':
+        return filename
+    return f"{os.path.splitext(filename)[0]}_{variant}.webp"
+
+
+def render_variants(source, storage_path):
+    """
+    Decodifica la imagen una sola vez y genera todas las variantes de `IMAGE_VARIANTS` como WEBP.
+
+    La decodificación está acotada por `decode_bounded`: un JPEG mayor que `full` no llega a decodificarse
+    a resolución completa y el resto de formatos solo se admite hasta `IMAGE_MAX_FULL_DECODE_PIXELS`.
+    La variante `full` se guarda en `storage_path` (limitada a su tamaño máximo, si lo tiene) y el resto
+    junto a ella como `<uuid>_<variant>.webp`, cada una de forma atómica (`_save_webp`). Cada variante se reduce a partir de la anterior, de mayor
+    a menor, para no volver a escalar desde el original.
+
+    Args:
+        source (str): Ruta absoluta del original.
+        storage_path (str): Ruta relativa a `MEDIA_IMG_PATH` del WEBP final.
+
+    Returns:
+        dict: Mapa `variante -> nombre de archivo`, en la misma carpeta que `storage_path`.
+    """
+    sizes = dict(settings.IMAGE_VARIANTS)
+    full_side = sizes.pop('full', None)
+    directory, filename = os.path.split(storage_path)
+    os.makedirs(absolute_image_path(directory), exist_ok=True)
+
+    variants = {}
+    with PILImage.open(source) as image:
+        current = _open_for_webp(decode_bounded(image, full_side))
+        if full_side:
+            current.thumbnail((full_side, full_side))
+        _save_webp(current, absolute_image_path(storage_path))
+        variants['full'] = filename
+
+        for variant, max_side in sorted(sizes.items(), key=lambda item: item[1], reverse=True):
+            current = current.copy()
+            current.thumbnail((max_side, max_side))
+            name = variant_filename(filename, variant)
+            _save_webp(current, absolute_image_path(os.path.join(directory, name)))
+            variants[variant] = name
+    return variants
+
+
+def _save_webp(image, destination):
+    """
+    Guarda `image` como WEBP en `destination` de forma atómica: se escribe en un temporal de la misma carpeta
+    y se renombra con `os.replace`. Los archivos de los blobs tienen una ruta fija por su hash y se sirven
+    como inmutables, así que nunca debe verse (ni cachearse) uno a medio escribir por otro trabajo.
+    """
+    temporary = f"{destination}.{uuid.uuid4().hex}.tmp"
+    try:
+        image.save(temporary, format="WEBP")
+        os.replace(temporary, destination)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+def save_file_to_disk(image_file, user_id):
+    """
+    Convierte la imagen a WEBP de forma síncrona y la guarda en `MEDIA_IMG_PATH/<user_id>/<uuid>.webp`.
+    """
+    try:
+        new_filename = f"{uuid.uuid4()}.webp"
+        transcode_to_webp(image_file, absolute_image_path(os.path.join(str(user_id), new_filename)))
         return new_filename
     except Exception as e:
         logger.error(f"Error en save_file_to_disk para {image_file.name}: {e}", exc_info=True)
@@ -55,38 +580,71 @@ def save_file_to_disk(image_file, user_id):
 def update_image_for_instance(image_file, user_id, external_id, image_type):
     """
     Actualiza el archivo de una imagen ya existente. Si no existe, la crea.
+
+    La subida se guarda en bruto y la fila queda en estado `UPLOADED`; la conversión a WEBP la hace
+    el pipeline (`media.services.image_pipeline`) fuera de la petición una vez confirmada la transacción.
     """
     if not image_file:
         logger.warning("No se proporcionó image_file a update_image_for_instance. Retornando None.")
         return None
 
+    # Import diferido: el pipeline importa este módulo.
+    from media.services.image_pipeline import submit
+
     try:
-        validate_extension(image_file.name)
-        new_filename = save_file_to_disk(image_file, user_id)
+        filename, storage_path, source_path, content_hash = store_upload(image_file, user_id)
+        fields = {
+            'name': filename,
+            'url': filename, # URL debería ser la ruta relativa/nombre de archivo
+            'storage_path': storage_path,
+            'source_path': source_path,
+            'variants': {},
+            'content_hash': None,
+            'blob': None,
+            'processing_status': Image.ImageStatus.UPLOADED, # Usar la constante
+        }
 
-        try:
-            image_obj = Image.objects.get(external_id=external_id, type=image_type)
-            # Borra archivo anterior
-            remove_image_file(user_id, image_obj.url)
-            # Actualiza campos
-            image_obj.name = new_filename
-            image_obj.url = new_filename # URL debería ser la ruta relativa/nombre de archivo
-            image_obj.processing_status = Image.ImageStatus.COMPLETED # Usar la constante
-            image_obj.save()
-            return image_obj
-        except Image.DoesNotExist:
-            new_image_obj = Image.objects.create(
-                name=new_filename,
-                url=new_filename, # URL debería ser la ruta relativa/nombre de archivo
-                external_id=external_id,
-                type=image_type,
-                processing_status=Image.ImageStatus.COMPLETED # Usar la constante
+        blob = None
+        if getattr(settings, 'IMAGE_CONTENT_ADDRESSED', False):
+            fields['content_hash'] = content_hash
+            # Contenido ya conocido: se reutiliza el blob sin volver a convertir.
+            blob = acquire_blob(content_hash)
+            if blob is not None:
+                remove_relative_file(source_path)
+                fields.update({
+                    'storage_path': blob.storage_path,
+                    'source_path': None,
+                    'variants': blob.variants,
+                    'blob': blob,
+                    'processing_status': Image.ImageStatus.COMPLETED,
+                })
+
+        image_obj = Image.objects.filter(external_id=external_id, type=image_type).first()
+        if image_obj is not None:
+            # Borra archivo anterior cuando la transacción se confirme
+            previous = Image(
+                url=image_obj.url,
+                storage_path=image_obj.storage_path,
+                source_path=image_obj.source_path,
+                variants=image_obj.variants,
+                content_hash=image_obj.content_hash,
+                blob_id=image_obj.blob_id,
             )
-            return new_image_obj
+            transaction.on_commit(lambda: remove_files_for_image(previous, user_id))
+            for attr, value in fields.items():
+                setattr(image_obj, attr, value)
+            image_obj.save()
+        else:
+            image_obj = Image.objects.create(external_id=external_id, type=image_type, **fields)
+
+        # Se encola al confirmar la transacción: si se revierte, el original pendiente no llega a procesarse.
+        if blob is None:
+            submit(image_obj.id)
+        return image_obj
 
     except ValidationError as e:
         logger.error(f"Error de validación en update_image_for_instance: {e}", exc_info=True)
         raise # Vuelve a lanzar para asegurar que se propague a DRF
     except Exception as e:
         logger.error(f"Error general en update_image_for_instance para archivo {image_file.name}: {e}", exc_info=True)
-        return None
\ No newline at end of file
+        return None
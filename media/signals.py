@@ -0,0 +1,30 @@
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import Signal, receiver
+
+from media.models import Image
+
+# Se envía cuando el pipeline termina de procesar una imagen (la fila se actualiza con `update()`,
+# que no dispara post_save). Argumentos: `instance` (Image).
+image_processed = Signal()
+
+
+@receiver(post_delete, sender=Image)
+def release_image_files(sender, instance, **kwargs):
+    # Cubre también los borrados en cascada al borrar la receta, el paso o el usuario propietario.
+    # Import diferido: `image_service` importa este módulo.
+    from media.services.image_service import release_blob, remove_files_for_image
+
+    # La referencia al blob se libera en la transacción (si se revierte, vuelve con la fila) y los archivos
+    # solo se borran al confirmarse. Los archivos antiguos sin `storage_path` no se pueden localizar (su carpeta
+    # es la del usuario que los subió); los recoge `gc_images`.
+    if instance.blob_id:
+        release_blob(instance.blob_id)
+    files = Image(
+        url=instance.url,
+        storage_path=instance.storage_path,
+        source_path=instance.source_path,
+        variants=instance.variants,
+        content_hash=instance.content_hash,
+    )
+    transaction.on_commit(lambda: remove_files_for_image(files))
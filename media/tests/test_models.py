@@ -114,3 +114,50 @@ class TestImageModel:
         with pytest.raises(Exception): # Catching a general exception as Django might raise ValidationError or TruncationError
             baker.make(Image, url=long_url, name='short_name', type=Image.ImageType.USER, external_id=1)
 
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.models
+@pytest.mark.media_app
+class TestImageOwners:
+    """
+    Tests for the typed owner relations (recipe, step, user) of the Image model.
+    """
+
+    def test_save_links_owner_of_matching_type(self, test_recipe):
+        image = baker.make(Image, type=Image.ImageType.RECIPE, external_id=test_recipe.id)
+
+        assert image.recipe_id == test_recipe.id
+        assert image.step_id is None and image.user_id is None
+        assert list(test_recipe.images.all()) == [image]
+
+    def test_missing_owner_is_left_empty(self, test_recipe):
+        image = baker.make(Image, type=Image.ImageType.RECIPE, external_id=test_recipe.id + 1000)
+
+        assert image.recipe_id is None
+
+    def test_changing_type_moves_owner(self, test_recipe, test_user):
+        image = baker.make(Image, type=Image.ImageType.RECIPE, external_id=test_recipe.id)
+
+        image.type, image.external_id = Image.ImageType.USER, test_user.id
+        image.save()
+
+        assert image.recipe_id is None
+        assert image.user_id == test_user.id
+
+    def test_for_owners_and_with_owners(self, test_recipe, django_assert_num_queries):
+        image = baker.make(Image, type=Image.ImageType.RECIPE, external_id=test_recipe.id)
+        baker.make(Image, type=Image.ImageType.STEP, external_id=test_recipe.id)
+
+        with django_assert_num_queries(1):
+            images = list(Image.objects.for_owners(Image.ImageType.RECIPE, [test_recipe.id]).with_owners())
+            assert images == [image]
+            assert images[0].recipe.name == test_recipe.name
+
+    def test_deleting_owner_deletes_images(self, test_recipe):
+        image = baker.make(Image, type=Image.ImageType.RECIPE, external_id=test_recipe.id)
+
+        test_recipe.delete()
+
+        assert not Image.objects.filter(pk=image.pk).exists()
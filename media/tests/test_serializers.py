@@ -5,6 +5,7 @@ from django.utils import timezone
 from django.db import IntegrityError
 
 from media.models.image import Image
+from media.services.image_service import image_urls
 from media.serializers.image_serializer import (
     ImageAdminSerializer,
     ImageWriteSerializer,
@@ -203,7 +204,9 @@ class TestImageSerializers:
         assert data['type'] == image.type
         assert data['external_id'] == image.external_id
         assert data['processing_status'] == image.processing_status
-        assert len(data) == 5
+        assert data['variants'] == image.variants
+        assert data['urls'] == image_urls(image)
+        assert len(data) == 7
         assert 'name' not in data
         assert 'created_at' not in data
 
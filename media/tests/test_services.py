@@ -0,0 +1,853 @@
+import io
+import json
+import os
+import time
+from datetime import timedelta
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+from django.forms import ValidationError
+from model_bakery import baker
+from PIL import Image as PILImage
+from rest_framework.test import APIClient
+
+from media.models.image import Image
+from media.models.imageBlob import ImageBlob
+from media.services import image_pipeline
+from media.services.image_service import (
+    absolute_image_path,
+    create_images,
+    decode_bounded,
+    remove_files_for_image,
+    render_variants,
+    store_uploads,
+    update_image_for_instance,
+)
+
+
+def make_upload(name='photo.png', size=(32, 24), mode='RGBA', image_format='PNG'):
+    buffer = io.BytesIO()
+    PILImage.new(mode, size, color=(200, 100, 50, 255)[:len(mode)]).save(buffer, format=image_format)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f'image/{image_format.lower()}')
+
+
+@pytest.fixture
+def media_dirs(settings, tmp_path):
+    settings.MEDIA_IMG_PATH = tmp_path
+    settings.MEDIA_PENDING_PATH = tmp_path / 'pending'
+    settings.IMAGE_PIPELINE_BACKEND = 'media.services.image_pipeline.SyncBackend'
+    settings.IMAGE_VARIANTS = {'thumb': 16, 'card': 48, 'full': 96}
+    settings.IMAGE_CONTENT_ADDRESSED = False
+    return tmp_path
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+@pytest.mark.media_app
+class TestImagePipeline:
+    """
+    Comprueba que la subida solo guarda el original y que el pipeline lo convierte tras el commit.
+    """
+
+    def test_upload_is_stored_raw_and_left_uploaded(self, media_dirs, test_user, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            image = update_image_for_instance(make_upload(), test_user.id, 10, Image.ImageType.RECIPE)
+
+        assert image.processing_status == Image.ImageStatus.UPLOADED
+        assert os.path.exists(absolute_image_path(image.source_path))
+        assert not os.path.exists(absolute_image_path(image.storage_path))
+        assert image.storage_path == f'{test_user.id}/{image.url}'
+        assert len(callbacks) == 1
+
+    def test_commit_transcodes_and_completes(self, media_dirs, test_user, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            image = update_image_for_instance(make_upload(), test_user.id, 10, Image.ImageType.RECIPE)
+        source = absolute_image_path(image.source_path)
+
+        image.refresh_from_db()
+        assert image.processing_status == Image.ImageStatus.COMPLETED
+        assert image.source_path is None
+        assert not os.path.exists(source)
+        with PILImage.open(absolute_image_path(image.storage_path)) as result:
+            assert result.format == 'WEBP'
+
+    def test_variants_are_generated_once_by_size(self, media_dirs, test_user, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            image = update_image_for_instance(make_upload(size=(200, 100)), test_user.id, 15, Image.ImageType.RECIPE)
+
+        image.refresh_from_db()
+        assert set(image.variants) == {'thumb', 'card', 'full'}
+        assert image.variants['full'] == image.url
+        directory = os.path.dirname(image.storage_path)
+        sizes = {}
+        for variant, filename in image.variants.items():
+            with PILImage.open(absolute_image_path(os.path.join(directory, filename))) as result:
+                sizes[variant] = result.size
+        assert sizes == {'thumb': (16, 8), 'card': (48, 24), 'full': (96, 48)}
+
+    def test_remove_files_deletes_variants(self, media_dirs, test_user, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            image = update_image_for_instance(make_upload(), test_user.id, 16, Image.ImageType.RECIPE)
+        image.refresh_from_db()
+        directory = absolute_image_path(os.path.dirname(image.storage_path))
+        assert len(os.listdir(directory)) == 3
+
+        remove_files_for_image(image)
+
+        assert os.listdir(directory) == []
+
+    def test_corrupt_source_is_marked_failed(self, media_dirs, test_user, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=False):
+            image = update_image_for_instance(make_upload(), test_user.id, 11, Image.ImageType.STEP)
+        with open(absolute_image_path(image.source_path), 'wb') as source:
+            source.write(b'not an image')
+
+        assert image_pipeline.process_image(image.id) is False
+        image.refresh_from_db()
+        assert image.processing_status == Image.ImageStatus.FAILED
+
+    def test_replacing_image_removes_previous_file(self, media_dirs, test_user, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            first = update_image_for_instance(make_upload(), test_user.id, 12, Image.ImageType.RECIPE)
+        first.refresh_from_db()
+        old_path = absolute_image_path(first.storage_path)
+        assert os.path.exists(old_path)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            second = update_image_for_instance(make_upload(), test_user.id, 12, Image.ImageType.RECIPE)
+
+        assert second.pk == first.pk
+        assert not os.path.exists(old_path)
+        assert os.path.exists(absolute_image_path(Image.objects.get(pk=first.pk).storage_path))
+
+    def test_process_image_only_claims_uploaded_rows(self, media_dirs, test_user, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            image = update_image_for_instance(make_upload(), test_user.id, 13, Image.ImageType.RECIPE)
+
+        assert image_pipeline.process_image(image.id) is False
+
+    @pytest.mark.parametrize('content_addressed', [False, True])
+    def test_reupload_during_processing_discards_stale_result(self, settings, media_dirs, test_user, monkeypatch,
+                                                              django_capture_on_commit_callbacks, content_addressed):
+        settings.IMAGE_CONTENT_ADDRESSED = content_addressed
+        with django_capture_on_commit_callbacks(execute=False):
+            first = update_image_for_instance(make_upload(), test_user.id, 14, Image.ImageType.RECIPE)
+        render = image_pipeline._render
+        replaced = []
+
+        def render_then_reupload(image_obj):
+            variants = render(image_obj)
+            if not replaced:
+                upload = make_upload(size=(40, 40))
+                replaced.append(update_image_for_instance(upload, test_user.id, 14, Image.ImageType.RECIPE))
+            return variants
+        monkeypatch.setattr(image_pipeline, '_render', render_then_reupload)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            assert image_pipeline.process_image(first.id) is False
+
+        image = Image.objects.get(pk=first.pk)
+        assert image.processing_status == Image.ImageStatus.COMPLETED
+        assert image.storage_path == replaced[0].storage_path
+        assert os.path.exists(absolute_image_path(image.storage_path))
+        assert not os.path.exists(absolute_image_path(first.storage_path))
+        assert list(ImageBlob.objects.values_list('hash', flat=True)) == ([image.content_hash] if content_addressed else [])
+        assert os.listdir(settings.MEDIA_PENDING_PATH) == []
+
+    def test_pending_command_requeues_interrupted_processing(self, media_dirs, test_user,
+                                                             django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=False):
+            stale = update_image_for_instance(make_upload(), test_user.id, 17, Image.ImageType.RECIPE)
+            running = update_image_for_instance(make_upload(), test_user.id, 18, Image.ImageType.RECIPE)
+        # `stale` lo reclamó un proceso que terminó hace una hora; `running` se está convirtiendo ahora.
+        Image.objects.filter(pk=stale.pk).update(
+            processing_status=Image.ImageStatus.PROCESSING, processing_started_at=timezone.now() - timedelta(hours=1)
+        )
+        Image.objects.filter(pk=running.pk).update(
+            processing_status=Image.ImageStatus.PROCESSING, processing_started_at=timezone.now()
+        )
+
+        call_command('process_pending_images', stdout=io.StringIO())
+
+        assert Image.objects.get(pk=stale.pk).processing_status == Image.ImageStatus.COMPLETED
+        assert Image.objects.get(pk=running.pk).processing_status == Image.ImageStatus.PROCESSING
+
+    def test_interrupted_job_finishing_late_keeps_requeued_result(self, media_dirs, test_user, monkeypatch,
+                                                                  django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=False):
+            image = update_image_for_instance(make_upload(), test_user.id, 19, Image.ImageType.RECIPE)
+        render = image_pipeline._render
+
+        def render_then_requeue(image_obj):
+            variants = render(image_obj)
+            if not image_pipeline.requeue_stale_processing(timezone.now() + timedelta(minutes=1)):
+                return variants
+            # Otro worker da el trabajo por interrumpido y lo completa mientras este sigue vivo.
+            monkeypatch.setattr(image_pipeline, '_render', render)
+            assert image_pipeline.process_image(image_obj.pk) is True
+            return variants
+        monkeypatch.setattr(image_pipeline, '_render', render_then_requeue)
+
+        assert image_pipeline.process_image(image.id) is False
+
+        image.refresh_from_db()
+        assert image.processing_status == Image.ImageStatus.COMPLETED
+        assert os.path.exists(absolute_image_path(image.storage_path))
+
+    def test_local_queue_backend_processes_in_worker(self, monkeypatch):
+        processed = []
+        monkeypatch.setattr(image_pipeline, 'process_image', processed.append)
+        backend = image_pipeline.LocalQueueBackend(workers=2)
+
+        for image_id in (1, 2, 3):
+            backend.enqueue(image_id)
+        backend.join()
+
+        assert sorted(processed) == [1, 2, 3]
+        assert len(backend._threads) == 2
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.media_app
+class TestImageSizeGuards:
+    """
+    Comprueba los límites de tamaño de las subidas y la decodificación reducida.
+    """
+
+    def test_rejects_upload_over_byte_limit(self, media_dirs, settings, test_user):
+        settings.IMAGE_MAX_UPLOAD_BYTES = 10
+        with pytest.raises(ValidationError):
+            update_image_for_instance(make_upload(), test_user.id, 1, Image.ImageType.RECIPE)
+        assert not Image.objects.exists()
+
+    def test_rejects_upload_over_pixel_limit_from_header(self, media_dirs, settings, test_user):
+        settings.IMAGE_MAX_PIXELS = 100
+        with pytest.raises(ValidationError):
+            update_image_for_instance(make_upload(size=(20, 20)), test_user.id, 1, Image.ImageType.RECIPE)
+        assert not Image.objects.exists()
+        assert not os.path.exists(settings.MEDIA_PENDING_PATH) or os.listdir(settings.MEDIA_PENDING_PATH) == []
+
+    def test_full_decode_formats_have_lower_pixel_limit(self, media_dirs, settings, test_user):
+        settings.IMAGE_MAX_FULL_DECODE_PIXELS = 100
+        with pytest.raises(ValidationError):
+            update_image_for_instance(make_upload(size=(20, 20)), test_user.id, 1, Image.ImageType.RECIPE)
+
+        jpeg = make_upload('photo.jpg', size=(20, 20), mode='RGB', image_format='JPEG')
+        assert update_image_for_instance(jpeg, test_user.id, 1, Image.ImageType.RECIPE) is not None
+
+    def test_decode_bounded_rejects_full_decode_over_limit(self, settings):
+        settings.IMAGE_MAX_FULL_DECODE_PIXELS = 100
+        buffer = io.BytesIO()
+        PILImage.new('RGB', (20, 20)).save(buffer, format='PNG')
+        buffer.seek(0)
+
+        with PILImage.open(buffer) as image:
+            with pytest.raises(ValidationError):
+                decode_bounded(image, 10)
+
+    def test_rejects_non_image_upload(self, media_dirs, test_user):
+        upload = SimpleUploadedFile('broken.jpg', b'not an image', content_type='image/jpeg')
+        with pytest.raises(ValidationError):
+            update_image_for_instance(upload, test_user.id, 1, Image.ImageType.RECIPE)
+
+    @pytest.mark.parametrize('image_format', ['JPEG', 'PNG'])
+    def test_decode_bounded_downscales_while_decoding(self, image_format):
+        buffer = io.BytesIO()
+        PILImage.new('RGB', (1600, 800)).save(buffer, format=image_format)
+        buffer.seek(0)
+
+        with PILImage.open(buffer) as image:
+            decoded = decode_bounded(image, 100)
+
+        assert 100 <= max(decoded.size) < 200
+
+    def test_decode_bounded_keeps_small_images(self):
+        buffer = io.BytesIO()
+        PILImage.new('RGB', (40, 20)).save(buffer, format='PNG')
+        buffer.seek(0)
+
+        with PILImage.open(buffer) as image:
+            assert decode_bounded(image, 100).size == (40, 20)
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+@pytest.mark.media_app
+class TestContentAddressedStorage:
+    """
+    Comprueba el almacenamiento por contenido: un blob por contenido, reutilizado y con contador de referencias.
+    """
+
+    @pytest.fixture(autouse=True)
+    def content_mode(self, media_dirs, settings):
+        settings.IMAGE_CONTENT_ADDRESSED = True
+
+    def upload(self, callbacks_fixture, user, external_id, **kwargs):
+        with callbacks_fixture(execute=True) as callbacks:
+            image = update_image_for_instance(make_upload(**kwargs), user.id, external_id, Image.ImageType.STEP)
+        image.refresh_from_db()
+        return image, callbacks
+
+    def test_same_content_is_stored_once(self, settings, test_user, django_capture_on_commit_callbacks):
+        first, _ = self.upload(django_capture_on_commit_callbacks, test_user, 1)
+        second, callbacks = self.upload(django_capture_on_commit_callbacks, test_user, 2)
+
+        assert ImageBlob.objects.count() == 1
+        blob = ImageBlob.objects.get()
+        assert blob.ref_count == 2
+        assert first.blob_id == second.blob_id == blob.id
+        assert second.storage_path == first.storage_path == blob.storage_path
+        assert second.processing_status == Image.ImageStatus.COMPLETED
+        # El segundo no se encola: el contenido ya estaba convertido.
+        assert callbacks == []
+        assert os.listdir(settings.MEDIA_PENDING_PATH) == []
+
+    def test_different_content_gets_its_own_blob(self, test_user, django_capture_on_commit_callbacks):
+        self.upload(django_capture_on_commit_callbacks, test_user, 1)
+        self.upload(django_capture_on_commit_callbacks, test_user, 2, size=(10, 10))
+
+        assert ImageBlob.objects.count() == 2
+
+    def test_blob_is_removed_with_its_last_reference(self, test_user, django_capture_on_commit_callbacks):
+        first, _ = self.upload(django_capture_on_commit_callbacks, test_user, 1)
+        second, _ = self.upload(django_capture_on_commit_callbacks, test_user, 2)
+        path = absolute_image_path(first.storage_path)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            remove_files_for_image(first)
+        assert os.path.exists(path)
+        assert ImageBlob.objects.get().ref_count == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            remove_files_for_image(second)
+        assert not os.path.exists(path)
+        assert not ImageBlob.objects.exists()
+
+    def test_replacing_with_same_content_keeps_blob(self, test_user, django_capture_on_commit_callbacks):
+        first, _ = self.upload(django_capture_on_commit_callbacks, test_user, 1)
+        again, _ = self.upload(django_capture_on_commit_callbacks, test_user, 1)
+
+        assert again.pk == first.pk
+        blob = ImageBlob.objects.get()
+        assert blob.ref_count == 1
+        assert os.path.exists(absolute_image_path(blob.storage_path))
+
+    def test_released_blob_files_survive_if_content_is_rendered_again(self, test_user,
+                                                                     django_capture_on_commit_callbacks):
+        first, _ = self.upload(django_capture_on_commit_callbacks, test_user, 1)
+        blob = ImageBlob.objects.get()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            remove_files_for_image(first)
+            # Otro trabajo vuelve a generar el mismo contenido antes de que se confirme la liberación.
+            ImageBlob.objects.create(hash=blob.hash, storage_path=blob.storage_path, variants=blob.variants, ref_count=1)
+
+        directory = os.path.dirname(absolute_image_path(blob.storage_path))
+        assert sorted(os.listdir(directory)) == sorted(blob.variants.values())
+
+    def test_render_replaces_blob_files_atomically(self, media_dirs, test_user, django_capture_on_commit_callbacks):
+        image, _ = self.upload(django_capture_on_commit_callbacks, test_user, 1)
+        source = media_dirs / 'source.png'
+        source.write_bytes(make_upload().read())
+        directory = os.path.dirname(absolute_image_path(image.storage_path))
+        inode = os.stat(absolute_image_path(image.storage_path)).st_ino
+
+        render_variants(str(source), image.storage_path)
+
+        assert sorted(os.listdir(directory)) == sorted(image.variants.values())
+        assert os.stat(absolute_image_path(image.storage_path)).st_ino != inode
+
+
+@pytest.fixture
+def served_file(media_dirs):
+    folder = media_dirs / 'blobs' / 'ab'
+    folder.mkdir(parents=True)
+    (folder / 'abcdef.webp').write_bytes(bytes(range(100)))
+    (media_dirs / 'pending').mkdir()
+    (media_dirs / 'pending' / 'raw.png').write_bytes(b'raw')
+    return '/api/media/img/blobs/ab/abcdef.webp'
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+@pytest.mark.media_app
+class TestImageDelivery:
+    """
+    Comprueba la entrega de imágenes: caché inmutable, peticiones condicionales, rangos y traspaso al servidor web.
+    """
+
+    def test_serves_file_with_immutable_cache(self, client, served_file):
+        response = client.get(served_file)
+
+        assert response.status_code == 200
+        assert b''.join(response.streaming_content) == bytes(range(100))
+        assert response['Content-Type'] == 'image/webp'
+        assert response['Cache-Control'] == 'public, max-age=31536000, immutable'
+        assert response['Accept-Ranges'] == 'bytes'
+        assert response['ETag']
+
+    def test_matching_etag_returns_not_modified(self, client, served_file):
+        etag = client.get(served_file)['ETag']
+
+        response = client.get(served_file, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+
+    def test_if_modified_since_compares_dates(self, client, served_file):
+        last_modified = client.get(served_file)['Last-Modified']
+
+        assert client.get(served_file, HTTP_IF_MODIFIED_SINCE=last_modified).status_code == 304
+        for header in ('Mon, 01 Jan 2001 00:00:00 GMT', 'no es una fecha'):
+            response = client.get(served_file, HTTP_IF_MODIFIED_SINCE=header)
+            assert response.status_code == 200, header
+            assert b''.join(response.streaming_content) == bytes(range(100))
+
+    @pytest.mark.parametrize('header, content_range, body', [
+        ('bytes=10-19', 'bytes 10-19/100', bytes(range(10, 20))),
+        ('bytes=95-', 'bytes 95-99/100', bytes(range(95, 100))),
+        ('bytes=-3', 'bytes 97-99/100', bytes(range(97, 100))),
+        ('bytes=90-500', 'bytes 90-99/100', bytes(range(90, 100))),
+    ])
+    def test_range_returns_partial_content(self, client, served_file, header, content_range, body):
+        response = client.get(served_file, HTTP_RANGE=header)
+
+        assert response.status_code == 206
+        assert response['Content-Range'] == content_range
+        assert response['Content-Length'] == str(len(body))
+        assert b''.join(response.streaming_content) == body
+
+    def test_unsatisfiable_range_returns_416(self, client, served_file):
+        response = client.get(served_file, HTTP_RANGE='bytes=100-')
+
+        assert response.status_code == 416
+        assert response['Content-Range'] == 'bytes */100'
+
+    def test_inverted_range_is_ignored(self, client, served_file):
+        response = client.get(served_file, HTTP_RANGE='bytes=50-10')
+
+        assert response.status_code == 200
+        assert b''.join(response.streaming_content) == bytes(range(100))
+
+    def test_stale_if_range_returns_full_file(self, client, served_file):
+        response = client.get(served_file, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"otro"')
+
+        assert response.status_code == 200
+        assert b''.join(response.streaming_content) == bytes(range(100))
+
+    @pytest.mark.parametrize('mode, header, value', [
+        ('x-accel', 'X-Accel-Redirect', '/_protected/img/blobs/ab/abcdef.webp'),
+        ('x-sendfile', 'X-Sendfile', None),
+    ])
+    def test_handoff_modes_delegate_to_web_server(self, client, settings, served_file, mode, header, value):
+        settings.MEDIA_SERVE_MODE = mode
+
+        response = client.get(served_file)
+
+        assert response.status_code == 200
+        assert response.content == b''
+        assert response[header] == (value or str(settings.MEDIA_IMG_PATH / 'blobs' / 'ab' / 'abcdef.webp'))
+        assert response['Cache-Control'] == 'public, max-age=31536000, immutable'
+
+    @pytest.mark.parametrize('path', ['pending/raw.png', '../outside.webp', 'blobs/ab/missing.webp'])
+    def test_pending_missing_or_outside_files_are_not_served(self, client, served_file, media_dirs, path):
+        (media_dirs.parent / 'outside.webp').write_bytes(b'secret')
+
+        assert client.get(f'/api/media/img/{path}').status_code == 404
+
+    def test_list_serializer_urls_point_to_served_files(self, client, media_dirs, test_user, django_capture_on_commit_callbacks):
+        from media.serializers.image_serializer import ImageListSerializer
+
+        with django_capture_on_commit_callbacks(execute=True):
+            image = update_image_for_instance(make_upload(), test_user.id, 10, Image.ImageType.RECIPE)
+        image.refresh_from_db()
+
+        urls = ImageListSerializer(image).data['urls']
+
+        assert set(urls) == {'thumb', 'card', 'full'}
+        for url in urls.values():
+            assert client.get(url).status_code == 200
+
+
+@pytest.fixture
+def gc_images(media_dirs, test_user, django_capture_on_commit_callbacks):
+    """
+    Imagen de una receta existente, imagen de una receta borrada y un archivo sin fila.
+    """
+    recipe = baker.make('recipes.Recipe', user_id=test_user)
+    with django_capture_on_commit_callbacks(execute=True):
+        live = update_image_for_instance(make_upload(), test_user.id, recipe.id, Image.ImageType.RECIPE)
+        orphan = update_image_for_instance(make_upload(), test_user.id, recipe.id + 1000, Image.ImageType.RECIPE)
+    live.refresh_from_db()
+    orphan.refresh_from_db()
+    stray = media_dirs / str(test_user.id) / 'stray.webp'
+    stray.write_bytes(b'x' * 10)
+    (media_dirs / 'banner.webp').write_bytes(b'static')
+    old = time.time() - 3600
+    for path in media_dirs.rglob('*.webp'):
+        os.utime(path, (old, old))
+    return {'live': live, 'orphan': orphan, 'stray': stray, 'root': media_dirs}
+
+
+def image_files(image):
+    return [absolute_image_path(os.path.join(os.path.dirname(image.storage_path), name)) for name in image.variants.values()]
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+@pytest.mark.media_app
+class TestImageGarbageCollector:
+    """
+    Comprueba que `gc_images` borra las filas sin objeto y los archivos sin fila, y nada más.
+    """
+
+    def test_dry_run_reports_without_deleting(self, gc_images):
+        out = io.StringIO()
+
+        call_command('gc_images', '--dry-run', '--grace-hours=0', stdout=out)
+
+        assert '[dry-run] Imágenes huérfanas: 1 (RECIPE: 1).' in out.getvalue()
+        assert '[dry-run] Archivos huérfanos: 1 (10 bytes).' in out.getvalue()
+        assert Image.objects.filter(pk=gc_images['orphan'].pk).exists()
+        assert gc_images['stray'].exists()
+
+    def test_removes_orphan_rows_and_files(self, gc_images):
+        live, orphan = gc_images['live'], gc_images['orphan']
+
+        call_command('gc_images', '--grace-hours=0', '--batch-size=1', stdout=io.StringIO())
+
+        assert list(Image.objects.values_list('pk', flat=True)) == [live.pk]
+        assert all(os.path.exists(path) for path in image_files(live))
+        assert not any(os.path.exists(path) for path in image_files(orphan))
+        assert not gc_images['stray'].exists()
+        assert (gc_images['root'] / 'banner.webp').exists()
+
+    def test_grace_period_keeps_recent_rows_and_files(self, gc_images):
+        call_command('gc_images', stdout=io.StringIO())
+
+        assert Image.objects.filter(pk=gc_images['orphan'].pk).exists()
+        assert gc_images['stray'].exists()
+
+    def test_shared_blob_is_only_released(self, settings, media_dirs, test_user, django_capture_on_commit_callbacks):
+        settings.IMAGE_CONTENT_ADDRESSED = True
+        recipe = baker.make('recipes.Recipe', user_id=test_user)
+        with django_capture_on_commit_callbacks(execute=True):
+            live = update_image_for_instance(make_upload(), test_user.id, recipe.id, Image.ImageType.RECIPE)
+        with django_capture_on_commit_callbacks(execute=True):
+            update_image_for_instance(make_upload(), test_user.id, recipe.id + 1000, Image.ImageType.RECIPE)
+            call_command('gc_images', '--grace-hours=0', stdout=io.StringIO())
+        live.refresh_from_db()
+
+        assert Image.objects.count() == 1
+        assert ImageBlob.objects.get().ref_count == 1
+        assert all(os.path.exists(path) for path in image_files(live))
+
+    def test_checkpoint_skips_reviewed_rows_and_directories(self, gc_images, test_user, tmp_path_factory):
+        checkpoint = tmp_path_factory.mktemp('gc') / 'progress.json'
+        checkpoint.write_text(json.dumps({'image_id': gc_images['orphan'].pk, 'directory': str(test_user.id)}))
+        later = gc_images['root'] / 'blobs' / 'ff'
+        later.mkdir(parents=True)
+        (later / 'stray.webp').write_bytes(b'x')
+        os.utime(later / 'stray.webp', (time.time() - 3600,) * 2)
+
+        call_command('gc_images', '--grace-hours=0', f'--checkpoint={checkpoint}', stdout=io.StringIO())
+
+        assert Image.objects.filter(pk=gc_images['orphan'].pk).exists()
+        assert gc_images['stray'].exists()
+        assert not (later / 'stray.webp').exists()
+        assert not checkpoint.exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+@pytest.mark.media_app
+class TestImageOwnerCascade:
+    """
+    Comprueba que borrar el propietario de una imagen borra la fila y libera sus archivos al confirmarse la transacción.
+    """
+
+    def test_deleting_recipe_removes_image_and_files(self, media_dirs, test_user, django_capture_on_commit_callbacks):
+        recipe = baker.make('recipes.Recipe', user_id=test_user)
+        with django_capture_on_commit_callbacks(execute=True):
+            image = update_image_for_instance(make_upload(), test_user.id, recipe.id, Image.ImageType.RECIPE)
+        image.refresh_from_db()
+        files = [absolute_image_path(os.path.join(os.path.dirname(image.storage_path), name)) for name in image.variants.values()]
+        assert image.recipe_id == recipe.id and all(os.path.exists(path) for path in files)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            recipe.delete()
+
+        assert not Image.objects.filter(pk=image.pk).exists()
+        assert not any(os.path.exists(path) for path in files)
+
+    def test_rolled_back_delete_keeps_files(self, media_dirs, test_user, django_capture_on_commit_callbacks):
+        recipe = baker.make('recipes.Recipe', user_id=test_user)
+        with django_capture_on_commit_callbacks(execute=True):
+            image = update_image_for_instance(make_upload(), test_user.id, recipe.id, Image.ImageType.RECIPE)
+        image.refresh_from_db()
+
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            with pytest.raises(RuntimeError):
+                with transaction.atomic():
+                    recipe.delete()
+                    raise RuntimeError
+
+        assert callbacks == []
+        assert Image.objects.filter(pk=image.pk).exists()
+        assert os.path.exists(absolute_image_path(image.storage_path))
+
+    def test_deleting_user_releases_shared_blob_reference(self, settings, media_dirs, test_user, another_custom_user,
+                                                          django_capture_on_commit_callbacks):
+        settings.IMAGE_CONTENT_ADDRESSED = True
+        with django_capture_on_commit_callbacks(execute=True):
+            update_image_for_instance(make_upload(), test_user.id, test_user.id, Image.ImageType.USER)
+            update_image_for_instance(make_upload(), another_custom_user.id, another_custom_user.id, Image.ImageType.USER)
+        assert ImageBlob.objects.get().ref_count == 2
+
+        with django_capture_on_commit_callbacks(execute=True):
+            another_custom_user.delete()
+
+        blob = ImageBlob.objects.get()
+        assert blob.ref_count == 1
+        assert os.path.exists(absolute_image_path(blob.storage_path))
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+@pytest.mark.media_app
+class TestImageBatches:
+    """
+    Comprueba la creación de imágenes en lote y su conversión en paralelo.
+    """
+
+    @pytest.fixture
+    def recipe(self, test_user):
+        return baker.make('recipes.Recipe', user_id=test_user)
+
+    def test_store_uploads_failure_removes_stored_files(self, media_dirs, test_user):
+        uploads = [make_upload(), SimpleUploadedFile('broken.png', b'nope'), make_upload(size=(8, 8))]
+
+        with pytest.raises(ValidationError):
+            store_uploads(uploads, test_user.id)
+
+        assert not any((media_dirs / 'pending').iterdir())
+
+    def test_create_images_links_owners_and_processes_batch(self, media_dirs, test_user, recipe,
+                                                            django_capture_on_commit_callbacks, monkeypatch):
+        steps = baker.make('recipes.Step', recipe=recipe, _quantity=3)
+        batches = []
+        monkeypatch.setattr(image_pipeline, 'process_images', lambda ids: batches.append(ids) or {})
+        uploads = [(make_upload(), Image.ImageType.RECIPE, recipe)]
+        uploads += [(make_upload(size=(10 + i, 10)), Image.ImageType.STEP, step) for i, step in enumerate(steps)]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            images = create_images(uploads, test_user.id)
+
+        assert [image.recipe_id for image in images] == [recipe.id, None, None, None]
+        assert [image.step_id for image in images[1:]] == [step.id for step in steps]
+        assert batches == [[image.id for image in images]]
+
+    def test_process_images_renders_shared_content_once(self, settings, media_dirs, test_user, recipe,
+                                                        django_capture_on_commit_callbacks, monkeypatch):
+        settings.IMAGE_CONTENT_ADDRESSED = True
+        steps = baker.make('recipes.Step', recipe=recipe, _quantity=2)
+        rendered = []
+        render = image_pipeline.render_variants
+        monkeypatch.setattr(image_pipeline, 'render_variants', lambda *args: rendered.append(args) or render(*args))
+        uploads = [(make_upload(), Image.ImageType.STEP, step) for step in steps]
+        uploads.append((make_upload(size=(20, 20)), Image.ImageType.RECIPE, recipe))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            images = create_images(uploads, test_user.id)
+
+        assert len(rendered) == 2
+        assert set(Image.objects.values_list('processing_status', flat=True)) == {Image.ImageStatus.COMPLETED}
+        shared = ImageBlob.objects.get(hash=images[0].content_hash)
+        assert shared.ref_count == 2
+        assert not any((media_dirs / 'pending').iterdir())
+
+    def test_process_images_failure_only_fails_that_image(self, media_dirs, test_user, recipe,
+                                                          django_capture_on_commit_callbacks):
+        steps = baker.make('recipes.Step', recipe=recipe, _quantity=2)
+        with django_capture_on_commit_callbacks(execute=False):
+            images = create_images([(make_upload(), Image.ImageType.STEP, step) for step in steps], test_user.id)
+        with open(absolute_image_path(images[0].source_path), 'wb') as source:
+            source.write(b'corrupt')
+
+        results = image_pipeline.process_images([image.id for image in images])
+
+        assert results == {images[0].id: False, images[1].id: True}
+        assert Image.objects.get(pk=images[0].id).processing_status == Image.ImageStatus.FAILED
+        assert Image.objects.get(pk=images[1].id).processing_status == Image.ImageStatus.COMPLETED
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+@pytest.mark.media_app
+class TestImageUploadViews:
+    """
+    Comprueba las vistas de subida de una imagen: 400 a los archivos rechazados y 403 a quien no es dueño
+    del objeto de la imagen.
+    """
+
+    @pytest.fixture
+    def client(self, test_user):
+        client = APIClient()
+        client.force_authenticate(user=test_user)
+        return client
+
+    @pytest.fixture
+    def recipe(self, test_user):
+        return baker.make('recipes.Recipe', user_id=test_user)
+
+    def test_oversized_image_upload_is_bad_request(self, client, settings, media_dirs, recipe):
+        settings.IMAGE_MAX_PIXELS = 100
+        data = {'type': Image.ImageType.RECIPE, 'id': recipe.id, 'file': make_upload(size=(20, 20))}
+
+        response = client.post('/api/media/images/', data, format='multipart')
+
+        assert response.status_code == 400
+        assert 'file' in response.data
+
+    def test_oversized_profile_image_is_bad_request(self, client, settings, media_dirs):
+        settings.IMAGE_MAX_PIXELS = 100
+
+        response = client.put('/api/users/me/image/', {'image': make_upload(size=(20, 20))}, format='multipart')
+
+        assert response.status_code == 400
+        assert 'image' in response.data
+        assert not Image.objects.exists()
+
+    @pytest.mark.parametrize('image_type', [Image.ImageType.RECIPE, Image.ImageType.STEP, Image.ImageType.USER])
+    def test_cannot_upload_image_of_another_user(self, client, media_dirs, another_custom_user, image_type):
+        foreign_recipe = baker.make('recipes.Recipe', user_id=another_custom_user)
+        owner = {
+            Image.ImageType.RECIPE: foreign_recipe,
+            Image.ImageType.STEP: baker.make('recipes.Step', recipe=foreign_recipe),
+            Image.ImageType.USER: another_custom_user,
+        }[image_type]
+
+        response = client.post('/api/media/images/', {'type': image_type, 'id': owner.pk, 'file': make_upload()},
+                               format='multipart')
+
+        assert response.status_code == 403
+        assert not Image.objects.exists()
+
+    def test_staff_can_upload_image_of_another_user(self, media_dirs, test_superuser, recipe,
+                                                    django_capture_on_commit_callbacks):
+        client = APIClient()
+        client.force_authenticate(user=test_superuser)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post('/api/media/images/', {'type': Image.ImageType.RECIPE, 'id': recipe.id,
+                                                          'file': make_upload()}, format='multipart')
+
+        assert response.status_code == 201
+        assert Image.objects.get().recipe_id == recipe.id
+
+
+BATCH_URL = '/api/media/images/batch/'
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+@pytest.mark.media_app
+class TestImageBatchUpload:
+    """
+    Comprueba la subida de varias imágenes en una sola petición.
+    """
+
+    @pytest.fixture
+    def client(self, test_user):
+        client = APIClient()
+        client.force_authenticate(user=test_user)
+        return client
+
+    @pytest.fixture
+    def recipe(self, test_user):
+        return baker.make('recipes.Recipe', user_id=test_user)
+
+    def test_valid_batch_replaces_previous_images(self, client, media_dirs, test_user, recipe,
+                                                  django_capture_on_commit_callbacks):
+        steps = baker.make('recipes.Step', recipe=recipe, _quantity=2)
+        with django_capture_on_commit_callbacks(execute=True):
+            previous = update_image_for_instance(make_upload(), test_user.id, recipe.id, Image.ImageType.RECIPE)
+        previous_file = absolute_image_path(Image.objects.get(pk=previous.pk).storage_path)
+        data = {'type_0': Image.ImageType.RECIPE, 'id_0': recipe.id, 'file_0': make_upload(size=(20, 20))}
+        for index, step in enumerate(steps, start=1):
+            data.update({f'type_{index}': Image.ImageType.STEP, f'id_{index}': step.id,
+                         f'file_{index}': make_upload(size=(10 + index, 10))})
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post(BATCH_URL, data, format='multipart')
+
+        assert response.status_code == 201
+        assert [result['status'] for result in response.data['results']] == [201, 201, 201]
+        assert not Image.objects.filter(pk=previous.pk).exists()
+        assert not os.path.exists(previous_file)
+        assert Image.objects.get(recipe=recipe).id == response.data['results'][0]['image']['id']
+        assert set(Image.objects.filter(step__in=steps).values_list('processing_status', flat=True)) == {
+            Image.ImageStatus.COMPLETED
+        }
+
+    def test_mixed_batch_reports_each_item(self, client, media_dirs, recipe, django_capture_on_commit_callbacks):
+        data = {
+            'type_0': Image.ImageType.RECIPE, 'id_0': recipe.id, 'file_0': make_upload(),
+            'type_1': Image.ImageType.STEP, 'id_1': 999999, 'file_1': make_upload(),
+            'type_2': Image.ImageType.RECIPE, 'id_2': recipe.id, 'file_2': make_upload(),
+        }
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post(BATCH_URL, data, format='multipart')
+
+        assert response.status_code == 207
+        assert [result['status'] for result in response.data['results']] == [201, 400, 400]
+        assert Image.objects.count() == 1
+
+    def test_foreign_owners_are_forbidden_per_item(self, client, media_dirs, recipe, another_custom_user,
+                                                   django_capture_on_commit_callbacks):
+        foreign_recipe = baker.make('recipes.Recipe', user_id=another_custom_user)
+        foreign_step = baker.make('recipes.Step', recipe=foreign_recipe)
+        with django_capture_on_commit_callbacks(execute=True):
+            previous = update_image_for_instance(make_upload(), another_custom_user.id, foreign_recipe.id,
+                                                 Image.ImageType.RECIPE)
+        data = {
+            'type_0': Image.ImageType.RECIPE, 'id_0': recipe.id, 'file_0': make_upload(),
+            'type_1': Image.ImageType.RECIPE, 'id_1': foreign_recipe.id, 'file_1': make_upload(),
+            'type_2': Image.ImageType.STEP, 'id_2': foreign_step.id, 'file_2': make_upload(),
+            'type_3': Image.ImageType.USER, 'id_3': another_custom_user.id, 'file_3': make_upload(),
+        }
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post(BATCH_URL, data, format='multipart')
+
+        assert response.status_code == 207
+        assert [result['status'] for result in response.data['results']] == [201, 403, 403, 403]
+        assert Image.objects.filter(pk=previous.pk, storage_path=previous.storage_path).exists()
+        assert not Image.objects.filter(step=foreign_step).exists()
+        assert not Image.objects.filter(user=another_custom_user).exists()
+
+    def test_invalid_batch_stores_nothing(self, client, media_dirs, recipe):
+        data = {
+            'type_0': Image.ImageType.RECIPE, 'id_0': recipe.id, 'file_0': SimpleUploadedFile('broken.png', b'nope'),
+            'type_1': 'unknown', 'id_1': recipe.id, 'file_1': make_upload(),
+        }
+
+        response = client.post(BATCH_URL, data, format='multipart')
+
+        assert response.status_code == 400
+        assert [result['status'] for result in response.data['results']] == [400, 400]
+        assert not Image.objects.exists()
+        assert not (media_dirs / 'pending').exists() or not any((media_dirs / 'pending').iterdir())
+
+    def test_empty_or_oversized_batch_is_rejected(self, client, settings, media_dirs, recipe):
+        settings.IMAGE_UPLOAD_BATCH_MAX = 1
+        data = {f'{field}_{index}': value for index in range(2)
+                for field, value in (('type', Image.ImageType.RECIPE), ('id', recipe.id))}
+
+        assert client.post(BATCH_URL, {}, format='multipart').status_code == 400
+        assert client.post(BATCH_URL, data, format='multipart').status_code == 400
@@ -1,7 +1,14 @@
-from media.views.imageViewSet import ImageWriteDeleteViewSet
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
+from media.views.imageServeView import serve_image
+from media.views.imageViewSet import ImageWriteDeleteViewSet
+
 router = DefaultRouter()
 router.register(r'images', ImageWriteDeleteViewSet, basename='image-write')
 
+urlpatterns = [
+    path('img/<path:path>', serve_image, name='media-image'),
+]
+
 urlpatterns += router.urls
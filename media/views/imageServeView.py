@@ -0,0 +1,14 @@
+from django.views.decorators.http import require_safe
+
+from media.services.image_delivery import serve_image_file
+
+
+@require_safe
+def serve_image(request, path):
+    """
+    Sirve un archivo de imagen procesada (`MEDIA_IMAGE_URL<path>`) con caché inmutable.
+
+    Es una vista de Django sin DRF: no hay negociación de contenido ni autenticación que hacer, y así la
+    respuesta puede ser un `FileResponse` o un traspaso al servidor web (`MEDIA_SERVE_MODE`).
+    """
+    return serve_image_file(request, path)
@@ -1,18 +1,26 @@
-import os
-import uuid
-from PIL import Image as PILImage
-from django.conf import settings
+import re
+
 from django.forms import ValidationError
 from rest_framework import viewsets,mixins,status
 from rest_framework.permissions import AllowAny, IsAdminUser,IsAuthenticated
 from media.models.image import Image
+from media.permissions import IsImageOwnerOrAdmin, can_manage_image, load_owner, owner_queryset
 from media.serializers.image_serializer import (
     ImageListSerializer,
     ImageAdminSerializer,
     ImageWriteSerializer
 )
+from media.services.image_service import replace_images, store_each_upload, update_image_for_instance
+from django.conf import settings
+from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError as RequestValidationError
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+BATCH_FIELD = re.compile(r'^(file|type|id)_(\d+)$')
 
 def filter_and_order_images(queryset, params):
     image_type = params.get('type')
@@ -33,6 +41,62 @@ def filter_and_order_images(queryset, params):
 
     return queryset.order_by(orderby)
 
+def parse_batch_items(request):
+    """
+    Agrupa por índice los campos `type_<n>`, `id_<n>` y `file_<n>` de una subida en lote, en orden de índice.
+    """
+    items = {}
+    for source in (request.data, request.FILES):
+        for key in source:
+            match = BATCH_FIELD.match(key)
+            if match:
+                field, index = match.groups()
+                items.setdefault(int(index), {'index': int(index)})[field] = source.get(key)
+    return [items[index] for index in sorted(items)]
+
+
+def validate_batch_items(items, user):
+    """
+    Comprueba cada elemento de una subida en lote y le asigna su objeto propietario (`item['owner']`),
+    con una consulta por tipo de imagen. `user` solo puede subir imágenes de sus objetos, salvo que sea staff.
+
+    Returns:
+        dict: Mapa `índice -> (estado HTTP, lista de errores)` de los elementos no válidos.
+    """
+    errors = {}
+    ids_by_type = {}
+    for item in items:
+        item_errors = []
+        if not item.get('file'):
+            item_errors.append(f"Falta el archivo 'file_{item['index']}'.")
+        if item.get('type') not in Image.OWNER_FIELDS:
+            item_errors.append(f"Tipo de imagen no válido: {item.get('type')!r}.")
+        try:
+            item['id'] = int(item.get('id'))
+        except (TypeError, ValueError):
+            item_errors.append(f"Falta el id numérico 'id_{item['index']}'.")
+        if item_errors:
+            errors[item['index']] = (status.HTTP_400_BAD_REQUEST, item_errors)
+        else:
+            ids_by_type.setdefault(item['type'], set()).add(item['id'])
+
+    owners = {image_type: owner_queryset(image_type).in_bulk(ids) for image_type, ids in ids_by_type.items()}
+    seen = set()
+    for item in items:
+        if item['index'] in errors:
+            continue
+        key = (item['type'], item['id'])
+        item['owner'] = owners[item['type']].get(item['id'])
+        if item['owner'] is None:
+            errors[item['index']] = (status.HTTP_400_BAD_REQUEST, [f"No existe el objeto {item['type']} con id {item['id']}."])
+        elif not can_manage_image(user, item['type'], item['owner']):
+            errors[item['index']] = (status.HTTP_403_FORBIDDEN, [IsImageOwnerOrAdmin.message])
+        elif key in seen:
+            errors[item['index']] = (status.HTTP_400_BAD_REQUEST, ["Ya hay otra imagen para el mismo objeto en esta petición."])
+        seen.add(key)
+    return errors
+
+
 class ImageViewSet(viewsets.ReadOnlyModelViewSet):
     """
     Vista de solo lectura accesible para cualquier usuario.
@@ -62,49 +126,18 @@ class ImageAdminViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         return filter_and_order_images(super().get_queryset(), self.request.query_params)
 
-ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png', 'webp'}
-
-def validate_extension(filename):
-    ext = filename.split('.')[-1].lower()
-    if ext not in ALLOWED_EXTENSIONS:
-        raise ValidationError(f"Formato de imagen no permitido: .{ext}")
-
-def delete_old_image_file(user_id, external_id, image_type):
-    """
-    Elimina archivos y registros previos asociados al mismo external_id y type.
-    """
-    old_images = Image.objects.filter(external_id=external_id, type=image_type)
-    for img in old_images:
-        if img.url:
-            old_path = os.path.join(settings.MEDIA_IMG_PATH, str(user_id), img.url)
-            if os.path.exists(old_path):
-                os.remove(old_path)
-    old_images.delete()
-
-def save_image_to_webp(image_file, user_id):
-    """
-    Convierte la imagen a WEBP y la guarda en media/{user_id}/uuid.webp
-    """
-    validate_extension(image_file.name)
-    
-    user_folder = os.path.join(settings.MEDIA_IMG_PATH, str(user_id))
-    os.makedirs(user_folder, exist_ok=True)
-
-    new_filename = f"{uuid.uuid4()}.webp"
-    new_path = os.path.join(user_folder, new_filename)
-
-    image = PILImage.open(image_file)
-    image.save(new_path, format="WEBP")
-    return new_filename
-
 class ImageWriteDeleteViewSet(
     mixins.CreateModelMixin,
     mixins.UpdateModelMixin,
     mixins.DestroyModelMixin,
     viewsets.GenericViewSet
 ):
+    """
+    Subida, sustitución y borrado de imágenes. Solo el dueño del objeto al que pertenece la imagen (autor de
+    la receta o del paso, o el propio usuario) o el staff pueden modificarla (`media.permissions`).
+    """
     serializer_class = ImageWriteSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, IsImageOwnerOrAdmin]
 
     def get_queryset(self):
         return Image.objects.all()
@@ -113,55 +146,104 @@ class ImageWriteDeleteViewSet(
         external_id = self.kwargs.get("id")
         image_type = self.kwargs.get("type")
         try:
-            return Image.objects.get(external_id=external_id, type=image_type)
+            image = Image.objects.get(external_id=external_id, type=image_type)
         except Image.DoesNotExist:
             raise NotFound("Imagen no encontrada con ese id y type.")
+        self.check_object_permissions(self.request, image)
+        return image
 
     def create(self, request, *args, **kwargs):
         image_file = request.FILES.get("file")
         if not image_file:
-            raise ValidationError("Debes adjuntar un archivo de imagen con el campo 'file'.")
+            raise RequestValidationError("Debes adjuntar un archivo de imagen con el campo 'file'.")
 
         external_id = request.data.get("id")
         image_type = request.data.get("type")
 
         if not external_id or not image_type:
-            raise ValidationError("Faltan campos 'id' o 'type' en la solicitud.")
-
-        delete_old_image_file(request.user.id, external_id, image_type)
-        filename = save_image_to_webp(image_file, request.user.id)
-
-        image = Image.objects.create(
-            name=filename,
-            url=filename,
-            external_id=external_id,
-            type=image_type,
-            processing_status='UPLOADED',
-        )
+            raise RequestValidationError("Faltan campos 'id' o 'type' en la solicitud.")
+        owner = load_owner(image_type, external_id)
+        if owner is None:
+            raise NotFound("No existe el objeto de esa imagen.")
+        if not can_manage_image(request.user, image_type, owner):
+            raise PermissionDenied(IsImageOwnerOrAdmin.message)
+
+        # Guarda el original y deja la imagen en UPLOADED; la conversión a WEBP la hace el pipeline.
+        try:
+            image = update_image_for_instance(image_file, request.user.id, external_id, image_type)
+        except ValidationError as e:
+            raise RequestValidationError({'file': e.messages})
+        if image is None:
+            return Response({'detail': 'No se pudo guardar la imagen.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         serializer = self.get_serializer(image)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=['post'], url_path='batch')
+    def batch(self, request):
+        """
+        Sube varias imágenes en una sola petición multipart con los campos `type_<n>`, `id_<n>` y `file_<n>`.
+
+        Los archivos se guardan en paralelo y las imágenes válidas sustituyen a las anteriores de sus objetos
+        con un único borrado y una única inserción (`image_service.replace_images`). Cada elemento tiene su
+        propio resultado (403 si el objeto no es del usuario y este no es staff); la respuesta es 201 si se
+        han subido todos, 207 si solo algunos y 400 si ninguno.
+        """
+        items = parse_batch_items(request)
+        max_items = getattr(settings, 'IMAGE_UPLOAD_BATCH_MAX', 50)
+        if not items:
+            raise RequestValidationError("Debes adjuntar al menos una imagen con los campos 'type_<n>', 'id_<n>' y 'file_<n>'.")
+        if len(items) > max_items:
+            raise RequestValidationError(f"Se admiten como mucho {max_items} imágenes por petición.")
+
+        errors = validate_batch_items(items, request.user)
+        valid = [item for item in items if item['index'] not in errors]
+        uploads, stored = [], []
+        for item, result in zip(valid, store_each_upload([item['file'] for item in valid], request.user.id)):
+            if isinstance(result, ValidationError):
+                errors[item['index']] = (status.HTTP_400_BAD_REQUEST, result.messages)
+            elif isinstance(result, Exception):
+                logger.error(f"Error guardando la imagen {item['index']} del lote: {result}", exc_info=result)
+                errors[item['index']] = (status.HTTP_500_INTERNAL_SERVER_ERROR, ['No se pudo guardar la imagen.'])
+            else:
+                item['position'] = len(uploads)
+                uploads.append((item['file'], item['type'], item['owner']))
+                stored.append(result)
+        images = replace_images(uploads, stored)
+
+        results = []
+        for item in items:
+            if item['index'] in errors:
+                item_status, messages = errors[item['index']]
+                results.append({'index': item['index'], 'status': item_status, 'errors': messages})
+            else:
+                image_data = ImageListSerializer(images[item['position']]).data
+                results.append({'index': item['index'], 'status': status.HTTP_201_CREATED, 'image': image_data})
+        if not errors:
+            response_status = status.HTTP_201_CREATED
+        elif images:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({'results': results}, status=response_status)
+
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
         image_file = request.FILES.get("file")
         if not image_file:
-            raise ValidationError("Debes adjuntar un archivo de imagen con el campo 'file'.")
-
-        delete_old_image_file(request.user.id, instance.external_id, instance.type)
-        filename = save_image_to_webp(image_file, request.user.id)
+            raise RequestValidationError("Debes adjuntar un archivo de imagen con el campo 'file'.")
 
-        instance.name = filename
-        instance.url = filename
-        instance.processing_status = 'UPLOADED'
-        instance.save()
+        try:
+            instance = update_image_for_instance(image_file, request.user.id, instance.external_id, instance.type)
+        except ValidationError as e:
+            raise RequestValidationError({'file': e.messages})
+        if instance is None:
+            return Response({'detail': 'No se pudo guardar la imagen.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        file_path = os.path.join(settings.MEDIA_IMG_PATH, str(request.user.id), instance.url)
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        # Los archivos se liberan en el post_delete de la imagen (`media.signals`).
         instance.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class RecipesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipes'
+
+    def ready(self):
+        # Registra los receptores que mantienen el índice de búsqueda de recetas.
+        from recipes import signals  # noqa: F401
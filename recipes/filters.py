@@ -0,0 +1,49 @@
+import django_filters
+
+from recipes.models.recipe import Recipe
+from recipes.models.recipeCard import RecipeCard
+
+
+class RecipeFilter(django_filters.FilterSet):
+    """
+    Filtros del listado de recetas.
+
+    Attributes:
+        `user_id (int)`: Recetas de un usuario.
+        `id (int)`: Receta concreta.
+        `categories__descendant_of (int)`: Recetas de una categoría o de cualquiera de sus subcategorías.
+            Se resuelve con una sola consulta por prefijo sobre el índice de `Category.path`.
+    """
+    categories__descendant_of = django_filters.NumberFilter(method='filter_descendant_of')
+
+    class Meta:
+        model = Recipe
+        fields = ['user_id', 'id']
+
+    def filter_descendant_of(self, queryset, name, value):
+        return queryset.in_category(value, descendants=True)
+
+
+class RecipeCardFilter(django_filters.FilterSet):
+    """
+    Filtros del listado de tarjetas de receta, con los mismos nombres que `RecipeFilter`.
+
+    Attributes:
+        `user_id (int)`: Tarjetas de un usuario (columna `author_id` de la tarjeta).
+        `categories (int)`: Tarjetas de una categoría.
+        `categories__descendant_of (int)`: Tarjetas de una categoría o de cualquiera de sus subcategorías.
+        Las categorías se resuelven con una subconsulta sobre la tabla intermedia, dentro de la misma consulta.
+    """
+    user_id = django_filters.NumberFilter(field_name='author_id')
+    categories = django_filters.NumberFilter(method='filter_category')
+    categories__descendant_of = django_filters.NumberFilter(method='filter_descendant_of')
+
+    class Meta:
+        model = RecipeCard
+        fields = []
+
+    def filter_category(self, queryset, name, value):
+        return queryset.filter(recipe_id__in=Recipe.objects.in_category(value).values('id'))
+
+    def filter_descendant_of(self, queryset, name, value):
+        return queryset.filter(recipe_id__in=Recipe.objects.in_category(value, descendants=True).values('id'))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models.recipe import Recipe
+from recipes.services.recipe_cards import refresh_cards
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye las tarjetas de todas las recetas (por ejemplo tras migrar o cargar datos en bruto).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Número de recetas procesadas por lote.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        total = 0
+        while True:
+            ids = list(
+                Recipe.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            refresh_cards(ids)
+            total += len(ids)
+            last_id = ids[-1]
+
+        self.stdout.write(self.style.SUCCESS(f'Tarjetas reconstruidas: {total}.'))
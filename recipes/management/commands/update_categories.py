@@ -27,11 +27,15 @@ categories_data = [
     {"id": 23, "name": "Americana", "parent_category_id": 3, "user_id": 1}
 ]
 
-# Recorrer cada categoría y actualizarla en la base de datos
-for category_data in categories_data:
-    category = Category.objects.get(id=category_data["id"])  # Obtiene la categoría por ID
+# Actualiza padres y usuarios con un único bulk_update y recalcula después las rutas materializadas
+# (bulk_update no pasa por Category.save(), que es quien mantiene `path` y `depth`).
+data_by_id = {category_data["id"]: category_data for category_data in categories_data}
+categories = list(Category.objects.filter(id__in=data_by_id))
+for category in categories:
+    category_data = data_by_id[category.id]
     category.parent_category_id_id = category_data["parent_category_id"]  # Actualiza el parent_category_id
-    category.user_id = category_data["user_id"]  # Actualiza el user_id
-    category.save()  # Guarda la categoría actualizada
+    category.user_id_id = category_data["user_id"]  # Actualiza el user_id
+Category.objects.bulk_update(categories, ["parent_category_id", "user_id"])
+Category.objects.rebuild_paths()
 
 print("Categorías actualizadas correctamente.")
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:53
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_vector_index(apps, schema_editor):
+    # El índice GIN sobre tsvector solo existe en PostgreSQL; en otras bases se usa recipe_search_terms.
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS recipe_search_vector_gin ON recipe_search_documents USING GIN (vector)'
+        )
+
+
+def drop_vector_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS recipe_search_vector_gin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeSearchDocument',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='recipes.recipe')),
+                ('name', models.TextField(blank=True, default='')),
+                ('ingredients', models.TextField(blank=True, default='')),
+                ('description', models.TextField(blank=True, default='')),
+                ('steps', models.TextField(blank=True, default='')),
+                ('vector', django.contrib.postgres.search.SearchVectorField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'recipe_search_documents',
+            },
+        ),
+        migrations.CreateModel(
+            name='RecipeSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.FloatField()),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='recipes.recipe')),
+            ],
+            options={
+                'db_table': 'recipe_search_terms',
+                'constraints': [models.UniqueConstraint(fields=('term', 'recipe'), name='recipe_search_term_uniq')],
+            },
+        ),
+        migrations.RunPython(create_vector_index, drop_vector_index),
+    ]
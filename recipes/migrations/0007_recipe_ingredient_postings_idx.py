@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('measurements', '0003_alter_unit_unit_type'),
+        ('recipes', '0006_recipe_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipeingredient',
+            index=models.Index(fields=['ingredient', 'recipe'], name='recipe_ing_ingredient_idx'),
+        ),
+    ]
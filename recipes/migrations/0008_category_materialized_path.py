@@ -0,0 +1,55 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_paths(apps, schema_editor):
+    """
+    Calcula `path` y `depth` de las categorías existentes recorriendo la jerarquía en memoria.
+    """
+    Category = apps.get_model('recipes', 'Category')
+    parents = dict(Category.objects.values_list('id', 'parent_category_id_id'))
+    paths = {}
+
+    def resolve(category_id, seen=()):
+        if category_id not in paths:
+            parent_id = parents.get(category_id)
+            if parent_id is None or parent_id not in parents or parent_id in seen:
+                prefix = '/'
+            else:
+                prefix = resolve(parent_id, seen + (category_id,))
+            paths[category_id] = f"{prefix}{category_id}/"
+        return paths[category_id]
+
+    categories = list(Category.objects.only('id'))
+    for category in categories:
+        category.path = resolve(category.id)
+        category.depth = category.path.count('/') - 2
+    Category.objects.bulk_update(categories, ['path', 'depth'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_ingredient_postings_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['path'], name='categories_path_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
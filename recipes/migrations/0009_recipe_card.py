@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_category_materialized_path'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeCard',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='recipes.recipe')),
+                ('author_username', models.CharField(max_length=150)),
+                ('name', models.CharField(max_length=50)),
+                ('duration_minutes', models.IntegerField()),
+                ('commensals', models.IntegerField()),
+                ('thumbnail_path', models.CharField(blank=True, max_length=255, null=True)),
+                ('category_ids', models.JSONField(blank=True, default=list)),
+                ('ingredient_count', models.PositiveIntegerField(default=0)),
+                ('step_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipe_cards', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'recipe_cards',
+                'indexes': [models.Index(fields=['-created_at', '-recipe'], name='recipe_cards_created_idx'), models.Index(fields=['author', '-created_at', '-recipe'], name='recipe_cards_author_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+from recipes.services.recipe_search import FIELD_WEIGHTS, build_document, tokenize
+
+BATCH_SIZE = 500
+
+
+def backfill_search_documents(apps, schema_editor):
+    """
+    Crea el documento de búsqueda de las recetas existentes, por lotes de `BATCH_SIZE` recetas en orden de id.
+    Repite `recipe_search.index_recipes` con los modelos históricos de la migración.
+    """
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeSearchDocument = apps.get_model('recipes', 'RecipeSearchDocument')
+    RecipeSearchTerm = apps.get_model('recipes', 'RecipeSearchTerm')
+    use_vector = schema_editor.connection.vendor == 'postgresql'
+
+    last_id = 0
+    while True:
+        recipes = list(
+            Recipe.objects.filter(id__gt=last_id).order_by('id')
+            .prefetch_related('step_set', 'recipe_ingredients__ingredient')[:BATCH_SIZE]
+        )
+        if not recipes:
+            break
+        last_id = recipes[-1].id
+        recipe_ids = [recipe.id for recipe in recipes]
+        documents = [RecipeSearchDocument(recipe=recipe, **build_document(recipe)) for recipe in recipes]
+        RecipeSearchDocument.objects.bulk_create(
+            documents, update_conflicts=True, unique_fields=['recipe'], update_fields=list(FIELD_WEIGHTS),
+        )
+
+        if use_vector:
+            vector = None
+            for field, (weight, _) in FIELD_WEIGHTS.items():
+                part = SearchVector(field, weight=weight, config=settings.RECIPE_SEARCH_CONFIG)
+                vector = part if vector is None else vector + part
+            RecipeSearchDocument.objects.filter(recipe_id__in=recipe_ids).update(vector=vector)
+            continue
+
+        terms = []
+        for document in documents:
+            weights = defaultdict(float)
+            for field, (_, weight) in FIELD_WEIGHTS.items():
+                for term in tokenize(getattr(document, field)):
+                    weights[term] += weight
+            terms += [
+                RecipeSearchTerm(term=term, recipe_id=document.recipe_id, weight=weight)
+                for term, weight in weights.items()
+            ]
+        RecipeSearchTerm.objects.filter(recipe_id__in=recipe_ids).delete()
+        RecipeSearchTerm.objects.bulk_create(terms, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_recipe_card'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+    ]
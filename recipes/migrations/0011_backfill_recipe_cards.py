@@ -0,0 +1,76 @@
+from django.db import migrations
+from django.db.models import Count
+
+from media.services.image_service import variant_path
+from recipes.services.recipe_cards import CARD_FIELDS, THUMBNAIL_VARIANT
+
+BATCH_SIZE = 500
+
+
+def backfill_cards(apps, schema_editor):
+    """
+    Crea la tarjeta de las recetas existentes, por lotes de `BATCH_SIZE` recetas en orden de id.
+    Repite `recipe_cards.refresh_cards` con los modelos históricos de la migración.
+    """
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeCard = apps.get_model('recipes', 'RecipeCard')
+    Image = apps.get_model('media', 'Image')
+    RecipeCategory = Recipe._meta.get_field('categories').remote_field.through
+
+    last_id = 0
+    while True:
+        recipes = list(
+            Recipe.objects.filter(id__gt=last_id).order_by('id')
+            .select_related('user_id')
+            .annotate(
+                ingredient_total=Count('recipe_ingredients', distinct=True),
+                step_total=Count('step', distinct=True),
+            )[:BATCH_SIZE]
+        )
+        if not recipes:
+            break
+        last_id = recipes[-1].id
+        recipe_ids = [recipe.id for recipe in recipes]
+
+        category_ids = {}
+        links = RecipeCategory.objects.filter(recipe_id__in=recipe_ids).order_by('category_id')
+        for recipe_id, category_id in links.values_list('recipe_id', 'category_id'):
+            category_ids.setdefault(recipe_id, []).append(category_id)
+        thumbnails = {}
+        for image in Image.objects.filter(type='RECIPE', recipe_id__in=recipe_ids).order_by('pk'):
+            thumbnails.setdefault(image.recipe_id, variant_path(image, THUMBNAIL_VARIANT))
+
+        RecipeCard.objects.bulk_create(
+            [
+                RecipeCard(
+                    recipe=recipe,
+                    author_id=recipe.user_id_id,
+                    author_username=recipe.user_id.username,
+                    name=recipe.name,
+                    duration_minutes=recipe.duration_minutes,
+                    commensals=recipe.commensals,
+                    thumbnail_path=thumbnails.get(recipe.id),
+                    category_ids=category_ids.get(recipe.id, []),
+                    ingredient_count=recipe.ingredient_total,
+                    step_count=recipe.step_total,
+                    created_at=recipe.created_at,
+                )
+                for recipe in recipes
+            ],
+            update_conflicts=True,
+            unique_fields=['recipe'],
+            update_fields=CARD_FIELDS,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_backfill_recipe_search'),
+        # Las miniaturas se leen por la clave ajena `Image.recipe`.
+        ('media', '0006_image_owners'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_cards, migrations.RunPython.noop),
+    ]
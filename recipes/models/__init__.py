@@ -3,3 +3,5 @@ from .step import Step
 from .category import Category
 from .ingredient import Ingredient
 from .recipe import Recipe
+from .recipeSearch import RecipeSearchDocument, RecipeSearchTerm
+from .recipeCard import RecipeCard
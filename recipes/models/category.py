@@ -1,10 +1,92 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Concat, Substr
 from django.conf import settings
 
+from api.versioning import CATEGORIES, CATEGORY_TREE, bump_versions
+
+PATH_SEPARATOR = '/'
+
 
 def default_user():
     return 1
 
+def build_path(parent_path, pk):
+    """
+    Construye la ruta materializada de una categoría a partir de la de su padre (vacía si es raíz).
+    """
+    return f"{parent_path or PATH_SEPARATOR}{pk}{PATH_SEPARATOR}"
+
+
+def _count_subquery(through):
+    counts = (
+        through.objects.filter(category_id=OuterRef('pk'))
+        .values('category_id')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=models.IntegerField()), 0)
+
+
+class CategoryQuerySet(models.QuerySet):
+
+    def with_counts(self):
+        """
+        Anota `recipe_count` e `ingredient_count` con una subconsulta correlacionada por tabla intermedia,
+        sin los JOIN que multiplicarían filas al contar las dos relaciones a la vez.
+        """
+        return self.annotate(
+            recipe_count=_count_subquery(Category.recipes.through),
+            ingredient_count=_count_subquery(Category.ingredients.through),
+        )
+
+    def descendants_of(self, category_id, include_self=True):
+        """
+        Categorías del subárbol de `category_id`, filtradas por el prefijo de su `path`.
+
+        La ruta se lee antes (una consulta por pk) para que el filtro sea un `LIKE 'prefijo%'` constante, que
+        puede usar el índice de `path`; con una subconsulta el patrón no se conoce al planificar y se recorre
+        la tabla. Si la categoría no existe (o aún no tiene ruta) devuelve un queryset vacío.
+        """
+        path = Category.objects.filter(pk=category_id).values_list('path', flat=True).first()
+        if not path:
+            return self.none()
+        queryset = self.filter(path__startswith=path)
+        if not include_self:
+            queryset = queryset.exclude(pk=category_id)
+        return queryset
+
+    def rebuild_paths(self):
+        """
+        Recalcula `path` y `depth` de todas las categorías en memoria y los guarda con un `bulk_update`.
+        Útil tras cambios masivos de `parent_category_id` que no pasan por `save()`.
+        """
+        categories = {category.pk: category for category in Category.objects.only('id', 'parent_category_id', 'path', 'depth')}
+        resolved = {}
+
+        def resolve(category, seen=()):
+            if category.pk in resolved:
+                return resolved[category.pk]
+            parent = categories.get(category.parent_category_id_id)
+            if parent is None or parent.pk in seen:
+                parent_path = ''
+            else:
+                parent_path = resolve(parent, seen + (category.pk,))
+            resolved[category.pk] = build_path(parent_path, category.pk)
+            return resolved[category.pk]
+
+        changed = []
+        for category in categories.values():
+            path = resolve(category)
+            depth = path.count(PATH_SEPARATOR) - 2
+            if category.path != path or category.depth != depth:
+                category.path, category.depth = path, depth
+                changed.append(category)
+        Category.objects.bulk_update(changed, ['path', 'depth'], batch_size=500)
+        bump_versions(CATEGORIES, CATEGORY_TREE)
+        return len(changed)
+
+
 class Category(models.Model):
     """Modelo de Category, representa las diferentes categorias.  
 
@@ -14,6 +96,8 @@ class Category(models.Model):
         `name(str)`: Nombre de la unidad, debe ser único y tener una longitud máxima de 50 caracteres.  
         `user_id(ForeingKey)`: Relacion con el modelo User, que define el usuario.  
         `parent_category_id(ForeingKey)`: Id de la categoria padre a la que va asociada la categoria en cuestión.  
+        `path(str)`: Ruta materializada con los ids desde la raíz, por ejemplo `/1/4/`. Se mantiene al guardar.  
+        `depth(int)`: Profundidad en el árbol, 0 para las categorías raíz.  
         `created_at (DateTimeField)`: Fecha y hora de creación del registro, se establece automáticamente al crear el objeto.          
         se actualiza automáticamente al modificar el objeto.    
     Author:  
@@ -22,10 +106,18 @@ class Category(models.Model):
     name = models.CharField(max_length=50, unique=True)
     user_id = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_DEFAULT, default=default_user)
     parent_category_id = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True)
+    path = models.CharField(max_length=255, default='', blank=True, editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = CategoryQuerySet.as_manager()
+
     class Meta:
         db_table = 'categories'
+        indexes = [
+            # varchar_pattern_ops permite usar el índice en `path LIKE '/1/4/%'` en PostgreSQL.
+            models.Index(fields=['path'], name='categories_path_idx', opclasses=['varchar_pattern_ops']),
+        ]
 
     """
         Meta clase para definir metadatos del modelo Category.  
@@ -36,3 +128,51 @@ class Category(models.Model):
 
     def __str__(self):
         return self.name  
+
+    def save(self, *args, **kwargs):
+        """
+        Guarda la categoría y mantiene su `path`/`depth` y los de todo su subárbol.
+
+        Si cambia el padre, el subárbol se reescribe con un único `UPDATE` que sustituye el prefijo de la ruta.
+
+        Raises:
+            ValueError: Si el nuevo padre es la propia categoría o uno de sus descendientes.
+        """
+        with transaction.atomic():
+            # La ruta guardada se lee antes de `save()`, que escribe la de memoria (quizá desactualizada).
+            old_path = ''
+            if self.pk is not None:
+                old_path = Category.objects.filter(pk=self.pk).values_list('path', flat=True).first() or ''
+            super().save(*args, **kwargs)
+
+            parent_path = ''
+            if self.parent_category_id_id is not None:
+                parent_path = Category.objects.filter(pk=self.parent_category_id_id).values_list('path', flat=True).first() or ''
+            new_path = build_path(parent_path, self.pk)
+            if new_path == old_path:
+                return
+
+            if old_path and parent_path.startswith(old_path):
+                raise ValueError("Una categoría no puede ser hija de sí misma ni de sus descendientes.")
+
+            new_depth = new_path.count(PATH_SEPARATOR) - 2
+            Category.objects.filter(pk=self.pk).update(path=new_path, depth=new_depth)
+            if old_path:
+                old_depth = old_path.count(PATH_SEPARATOR) - 2
+                Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                    path=Concat(Value(new_path), Substr('path', len(old_path) + 1)),
+                    depth=F('depth') + (new_depth - old_depth),
+                )
+            self.path, self.depth = new_path, new_depth
+
+    def detach_descendants(self):
+        """
+        Convierte en raíces los hijos de esta categoría (ya borrada) reescribiendo las rutas de su subárbol
+        con un único `UPDATE`. Refleja el `SET_NULL` de `parent_category_id`.
+        """
+        if not self.path:
+            return
+        Category.objects.filter(path__startswith=self.path).exclude(pk=self.pk).update(
+            path=Concat(Value(PATH_SEPARATOR), Substr('path', len(self.path) + 1)),
+            depth=F('depth') - (self.depth + 1),
+        )
@@ -2,6 +2,58 @@ from django.db import models
 from django.conf import settings
 from recipes.models.category import Category 
 
+
+class RecipeQuerySet(models.QuerySet):
+    """
+    QuerySet de Recipe con el plan de carga de relaciones usado por los endpoints de lectura.
+    """
+
+    # Relación anidada de `RecipeSerializer` -> (select_related, prefetch_related) que necesita.
+    # `image` no aparece: las imágenes se resuelven en bloque en el propio serializer.
+    RELATION_PLAN = {
+        'user': ('user_id', None),
+        'categories': (None, 'categories'),
+        'steps': (None, 'step_set'),
+        'ingredients': (None, 'recipe_ingredients'),
+    }
+
+    def with_relations(self, relations=None):
+        """
+        Aplica el plan de precarga de las relaciones anidadas que serializa `RecipeSerializer`:
+        el autor (`select_related`) y categorías, pasos e ingredientes (`prefetch_related`).
+        Las imágenes de recetas y pasos se resuelven en bloque en el propio serializer.
+
+        Args:
+            relations (iterable[str] | None): Relaciones de la respuesta (`user`, `categories`, `steps`,
+                `ingredients`); las demás no se precargan. `None` precarga todas.
+
+        Returns:
+            QuerySet: El queryset con un número de consultas constante e independiente del número de recetas.
+        """
+        relations = self.RELATION_PLAN if relations is None else relations
+        plans = [self.RELATION_PLAN[name] for name in relations if name in self.RELATION_PLAN]
+        queryset = self
+        select = [related for related, _ in plans if related]
+        prefetch = [related for _, related in plans if related]
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+    def in_category(self, category_id, descendants=False):
+        """
+        Recetas de una categoría o, con `descendants`, de cualquiera de sus subcategorías.
+        El subárbol se resuelve por prefijo sobre `Category.path` (`descendants_of`), sin JOIN que duplique recetas.
+        """
+        if descendants:
+            categories = Category.objects.descendants_of(category_id).values('pk')
+            links = Recipe.categories.through.objects.filter(category_id__in=categories)
+        else:
+            links = Recipe.categories.through.objects.filter(category_id=category_id)
+        return self.filter(id__in=links.values('recipe_id'))
+
+
 class Recipe(models.Model):
     """
     Modelo de la tabla recipes
@@ -36,15 +88,21 @@ class Recipe(models.Model):
 		db_table='categories_recipes'
 	)
 
+    objects = RecipeQuerySet.as_manager()
+
     class Meta:
         """
         Meta clase para definir metadatos del modelo Recipe.
         Esta clase define el nombre de la tabla en la base de datos.  
         Args:  
             db_table (str): Nombre de la tabla en la base de datos, en este caso 'recipes'.
+            indexes (list): Índice compuesto `(created_at, id)` que respalda la paginación por cursor.
         """
         
         db_table = 'recipes'
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='recipes_created_id_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.db import models
+from recipes.models.recipe import Recipe
+
+
+class RecipeCard(models.Model):
+    """
+    Modelo de RecipeCard, proyección desnormalizada de una receta con lo que muestran los listados.
+
+    Se mantiene desde `recipes.services.recipe_cards` al cambiar la receta, sus categorías, pasos,
+    líneas de ingredientes, su imagen o el nombre de su autor, de modo que el listado de tarjetas se lee
+    con una sola consulta sobre esta tabla, sin JOIN ni precargas.
+
+    Args:
+        models (Model): Clase base de Django para modelos.
+    Attributes:
+        `recipe (OneToOne)`: Receta proyectada, también es su clave primaria.
+        `author (ForeignKey)`: Autor de la receta (solo se lee su id).
+        `author_username (str)`: Nombre de usuario del autor.
+        `name (str)`: Nombre de la receta.
+        `duration_minutes (int)`: Duración de la receta.
+        `commensals (int)`: Comensales de la receta.
+        `thumbnail_path (str)`: Ruta relativa de la miniatura de la imagen de la receta, nula hasta que se procesa.
+        `category_ids (list)`: Ids de las categorías de la receta.
+        `ingredient_count (int)`: Número de líneas de ingredientes.
+        `step_count (int)`: Número de pasos.
+        `created_at (DateTimeField)`: Fecha de creación de la receta (orden del listado).
+        `updated_at (DateTimeField)`: Fecha de la última actualización de la tarjeta.
+    """
+    recipe = models.OneToOneField(Recipe, on_delete=models.CASCADE, primary_key=True, related_name='card')
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='recipe_cards')
+    author_username = models.CharField(max_length=150)
+    name = models.CharField(max_length=50)
+    duration_minutes = models.IntegerField()
+    commensals = models.IntegerField()
+    thumbnail_path = models.CharField(max_length=255, null=True, blank=True)
+    category_ids = models.JSONField(default=list, blank=True)
+    ingredient_count = models.PositiveIntegerField(default=0)
+    step_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """
+        Metadatos del modelo RecipeCard.
+        Args:
+            db_table (str): Nombre de la tabla en la base de datos, en este caso 'recipe_cards'.
+            indexes (list): Orden del listado `(created_at, recipe)` descendente, general y por autor.
+        """
+        db_table = 'recipe_cards'
+        indexes = [
+            models.Index(fields=['-created_at', '-recipe'], name='recipe_cards_created_idx'),
+            models.Index(fields=['author', '-created_at', '-recipe'], name='recipe_cards_author_idx'),
+        ]
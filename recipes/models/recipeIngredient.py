@@ -31,8 +31,13 @@ class RecipeIngredient(models.Model):
         """
         Metadatos del modelo RecipeIngredient.
         Define el nombre exacto de la tabla en la base de datos.
+        El índice `(ingredient, recipe)` es el índice invertido ingrediente -> recetas que usa
+        `recipes.services.pantry_matcher` sin tener que leer la tabla.
         """
         db_table = 'recipe_ingredients'
+        indexes = [
+            models.Index(fields=['ingredient', 'recipe'], name='recipe_ing_ingredient_idx'),
+        ]
 
     def __str__(self):
         return f"{self.quantity} {self.unit.name} of {self.ingredient.name} for {self.recipe.name}"
@@ -0,0 +1,66 @@
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models
+from recipes.models.recipe import Recipe
+
+class RecipeSearchDocument(models.Model):
+    """
+    Modelo de RecipeSearchDocument, documento de búsqueda precalculado de una receta.
+
+    Se mantiene desde `recipes.services.recipe_search` cada vez que cambia la receta, sus pasos o sus
+    líneas de ingredientes. En PostgreSQL `vector` guarda el tsvector ponderado (índice GIN creado en la
+    migración); en el resto de bases de datos se usan los términos de `RecipeSearchTerm`.
+
+    Args:
+        models (Model): Clase base de Django para modelos.
+    Attributes:
+        `recipe (OneToOne)`: Receta a la que pertenece el documento, también es su clave primaria.
+        `name (str)`: Nombre de la receta (peso A).
+        `ingredients (str)`: Nombres de los ingredientes de la receta (peso B).
+        `description (str)`: Descripción de la receta (peso C).
+        `steps (str)`: Descripciones de los pasos de la receta (peso D).
+        `vector (tsvector)`: Vector de búsqueda de PostgreSQL, nulo en otras bases de datos.
+        `updated_at (DateTimeField)`: Fecha de la última reindexación.
+    """
+    recipe = models.OneToOneField(Recipe, on_delete=models.CASCADE, primary_key=True, related_name='search_document')
+    name = models.TextField(blank=True, default='')
+    ingredients = models.TextField(blank=True, default='')
+    description = models.TextField(blank=True, default='')
+    steps = models.TextField(blank=True, default='')
+    vector = SearchVectorField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """
+        Metadatos del modelo RecipeSearchDocument.
+        Args:
+            db_table (str): Nombre de la tabla en la base de datos, en este caso 'recipe_search_documents'.
+        """
+        db_table = 'recipe_search_documents'
+
+
+class RecipeSearchTerm(models.Model):
+    """
+    Modelo de RecipeSearchTerm, entrada del índice invertido (término -> receta) para bases de datos sin tsvector.
+
+    Args:
+        models (Model): Clase base de Django para modelos.
+    Attributes:
+        `term (str)`: Término normalizado (minúsculas, sin acentos).
+        `recipe (ForeignKey)`: Receta que contiene el término.
+        `weight (float)`: Peso acumulado del término en la receta según el campo en que aparece.
+    """
+    term = models.CharField(max_length=64)
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='search_terms')
+    weight = models.FloatField()
+
+    class Meta:
+        """
+        Metadatos del modelo RecipeSearchTerm.
+        Args:
+            db_table (str): Nombre de la tabla en la base de datos, en este caso 'recipe_search_terms'.
+            constraints (list): Un término aparece una sola vez por receta; el índice sirve las búsquedas por término.
+        """
+        db_table = 'recipe_search_terms'
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'recipe'], name='recipe_search_term_uniq'),
+        ]
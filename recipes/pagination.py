@@ -0,0 +1,51 @@
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+
+class RecipeCursorPagination(CursorPagination):
+    """
+    Paginación por cursor (keyset) para el listado de recetas.
+
+    Recorre las recetas por `(created_at, id)` de forma descendente, por lo que cada página
+    cuesta lo mismo que la primera sin importar su profundidad y el tamaño de la respuesta
+    queda acotado por `max_page_size`. El ordenado lo respalda el índice compuesto
+    `recipes_created_id_idx` del modelo Recipe.
+
+    Attributes:
+        `page_size (int)`: Número de recetas por página por defecto.
+        `page_size_query_param (str)`: Parámetro para indicar el tamaño de página (`?limit=`).
+        `max_page_size (int)`: Tamaño de página máximo permitido.
+        `ordering (tuple)`: Ordenación por defecto, `id` desempata recetas con la misma fecha.
+    """
+    page_size = 20
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+
+class RecipeSearchPagination(LimitOffsetPagination):
+    """
+    Paginación por `limit`/`offset` para los resultados de búsqueda.
+
+    Los resultados se ordenan por relevancia, que no es una clave estable para un cursor,
+    por lo que se pagina por desplazamiento con un tamaño de página acotado.
+
+    Attributes:
+        `default_limit (int)`: Número de recetas por página por defecto.
+        `max_limit (int)`: Tamaño de página máximo permitido.
+    """
+    default_limit = 20
+    max_limit = 100
+
+
+class RecipeCardCursorPagination(RecipeCursorPagination):
+    """
+    Paginación por cursor para el listado de tarjetas de receta.
+
+    Mismo recorrido que `RecipeCursorPagination`, sobre `(created_at, recipe_id)` de `RecipeCard`,
+    respaldado por el índice `recipe_cards_created_idx` (o `recipe_cards_author_idx` al filtrar por autor).
+    """
+    ordering = ('-created_at', '-recipe_id')
+
+    def get_ordering(self, request, queryset, view):
+        # El orden de la vista (`OrderingFilter`) se refiere a Recipe, no a la tabla de tarjetas.
+        return self.ordering
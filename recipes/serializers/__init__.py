@@ -3,3 +3,4 @@ from .categorySerializer import CategorySerializer, CategoryAdminSerializer
 from .ingredientSerializer import IngredientSerializer, IngredientAdminSerializer
 from .recipeSerializer import RecipeSerializer, RecipeAdminSerializer
 from .recipeIngredientSerializer import RecipeIngredientSerializer, RecipeIngredientAdminSerializer
+from .recipeCardSerializer import RecipeCardSerializer
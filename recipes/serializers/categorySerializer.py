@@ -63,3 +63,28 @@ class CategoryAdminSerializer(serializers.ModelSerializer):
         model = Category
         fields = '__all__'
         read_only_fields = ['id', 'created_at']
+
+
+class CategorySummarySerializer(serializers.ModelSerializer):
+    """
+    Serializer de Category ligero para listados y menús: no embebe recetas ni ingredientes.
+
+    Los contadores vienen anotados por `Category.objects.with_counts()`; el contenido de las recetas
+    se obtiene paginado desde `categories/{id}/recipes/`.
+
+    Attributes:
+        `id (int)`: Identificador único de la categoría.
+        `name (str)`: Nombre de la categoría.
+        `user_id (int)`: Usuario creador de la categoría.
+        `parent_category_id (int)`: Categoría padre, o nulo si es raíz.
+        `depth (int)`: Profundidad en el árbol de categorías.
+        `recipe_count (int)`: Número de recetas de la categoría.
+        `ingredient_count (int)`: Número de ingredientes de la categoría.
+    """
+    recipe_count = serializers.IntegerField(read_only=True)
+    ingredient_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Category
+        fields = ['id', 'name', 'user_id', 'parent_category_id', 'depth', 'recipe_count', 'ingredient_count']
+        read_only_fields = fields
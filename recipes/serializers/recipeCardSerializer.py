@@ -0,0 +1,38 @@
+from rest_framework import serializers
+from recipes.models.recipeCard import RecipeCard
+from media.services.image_service import media_url
+
+
+class RecipeCardSerializer(serializers.ModelSerializer):
+    """
+    Serializer de solo lectura para las tarjetas de receta de los listados.
+
+    Todos los campos salen de la propia fila de `RecipeCard`, por lo que serializar una página no
+    hace ninguna consulta adicional.
+
+    Attributes:
+        id (int): Id de la receta.
+        user_id (int): Id del autor.
+        author_username (str): Nombre de usuario del autor.
+        thumbnail (str): URL de la miniatura de la imagen de la receta, `None` si no tiene o no está procesada.
+        categories (list[int]): Ids de las categorías de la receta.
+
+    Meta:
+        model (RecipeCard): Modelo RecipeCard.
+        fields (tuple): Campos a incluir en la representación JSON.
+    """
+    id = serializers.IntegerField(source='recipe_id', read_only=True)
+    user_id = serializers.IntegerField(source='author_id', read_only=True)
+    thumbnail = serializers.SerializerMethodField()
+    categories = serializers.ListField(source='category_ids', child=serializers.IntegerField(), read_only=True)
+
+    class Meta:
+        model = RecipeCard
+        fields = (
+            'id', 'name', 'duration_minutes', 'commensals', 'user_id', 'author_username', 'thumbnail',
+            'categories', 'ingredient_count', 'step_count', 'created_at',
+        )
+        read_only_fields = fields
+
+    def get_thumbnail(self, obj):
+        return media_url(obj.thumbnail_path)
@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from api.fields import ReferencePrimaryKeyRelatedField
+from api.reference_cache import approved_ingredients, units
 from recipes.models.recipeIngredient import RecipeIngredient
 from recipes.models.recipe import Recipe
 from recipes.models.ingredient import Ingredient
@@ -32,8 +34,8 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
     """
     
     recipe = serializers.PrimaryKeyRelatedField(queryset=Recipe.objects.all()) 
-    ingredient = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
-    unit = serializers.PrimaryKeyRelatedField(queryset=Unit.objects.all())  
+    ingredient = ReferencePrimaryKeyRelatedField(queryset=Ingredient.objects.all(), reference_table=approved_ingredients)
+    unit = ReferencePrimaryKeyRelatedField(queryset=Unit.objects.all(), reference_table=units)  
 
     class Meta:
         model = RecipeIngredient
@@ -66,8 +68,8 @@ class RecipeIngredientAdminSerializer(serializers.ModelSerializer):
     """
     
     recipe = serializers.PrimaryKeyRelatedField(queryset=Recipe.objects.all())  
-    ingredient = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all()) 
-    unit = serializers.PrimaryKeyRelatedField(queryset=Unit.objects.all())  
+    ingredient = ReferencePrimaryKeyRelatedField(queryset=Ingredient.objects.all(), reference_table=approved_ingredients) 
+    unit = ReferencePrimaryKeyRelatedField(queryset=Unit.objects.all(), reference_table=units)  
 
     class Meta:
         model = RecipeIngredient
@@ -1,26 +1,83 @@
 # recipes/serializers/recipeSerializer.py
 
+from django.db import transaction
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
+from api.compiled_serializers import CompiledListSerializer
+from api.fields import ReferencePrimaryKeyRelatedField
+from api.fieldsets import DynamicFieldsMixin
+from api.reference_cache import categories as category_table
 from recipes.models.recipe import Recipe
 from recipes.models.category import Category
-from recipes.models.recipeIngredient import RecipeIngredient
 from recipes.models.step import Step
-from recipes.models.ingredient import Ingredient
-from measurements.models.unit import Unit
 
 from recipes.serializers.stepSerializer import StepSerializer
 from users.serializers.userSerializer import CustomUserFrontSerializer
 from .recipeIngredientSerializer import RecipeIngredientSerializer
+from recipes.services.recipe_writer import create_recipe_lines, parse_ingredient_lines, parse_steps, update_recipe
 from media.models.image import Image
-from media.serializers.image_serializer import ImageListSerializer
+from media.serializers.image_serializer import image_list_data
+from media.services.image_resolver import get_image_resolver
 
 # Importa el servicio de imágenes
-from media.services.image_service import update_image_for_instance
+from media.services.image_service import create_images
 
 import json
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+def parse_nested_update_data(request):
+    """
+    Extrae y decodifica los JSON `ingredients` y `steps` de una petición de actualización de receta.
+
+    Returns:
+        tuple: `(ingredients, steps)`, cada uno `None` si no viene en la petición.
+    """
+    data = request.data if request is not None else {}
+
+    ingredients = data.get('ingredients')
+    if ingredients is not None:
+        try:
+            ingredients = json.loads(ingredients)
+        except json.JSONDecodeError:
+            raise serializers.ValidationError({"ingredients": "Formato JSON de ingredientes inválido para actualización."})
+
+    steps = data.get('steps')
+    if steps is not None:
+        try:
+            steps = json.loads(steps)
+        except json.JSONDecodeError:
+            raise serializers.ValidationError({"steps": "Formato JSON de pasos inválido para actualización."})
+
+    return ingredients, steps
+
+
+class RecipeListSerializer(CompiledListSerializer):
+    """
+    ListSerializer para recetas que resuelve por adelantado las imágenes de todas las recetas
+    de la página y de todos sus pasos, con una consulta por tipo de imagen.
+
+    Si los pasos ya vienen precargados (`prefetch_related('step_set')`) se reutilizan;
+    en caso contrario se obtienen sus ids con una única consulta.
+    Las imágenes que no forman parte de la respuesta (`?fields=`/`?include=`) no se consultan.
+    Las recetas se serializan con el plan compilado de `api.compiled_serializers`.
+    """
+
+    def prime(self, recipes):
+        fields = self.child.fields
+        resolver = get_image_resolver(self.context)
+        if 'image' in fields:
+            resolver.prime(Image.ImageType.RECIPE, [recipe.id for recipe in recipes])
+
+        if 'steps' not in fields or 'image' not in fields['steps'].child.fields:
+            return
+        if any('step_set' not in getattr(recipe, '_prefetched_objects_cache', {}) for recipe in recipes):
+            step_ids = Step.objects.filter(recipe__in=recipes).values_list('id', flat=True)
+        else:
+            step_ids = [step.id for recipe in recipes for step in recipe.step_set.all()]
+        resolver.prime(Image.ImageType.STEP, step_ids)
+
+
+class RecipeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
         Serializer para el modelo Recipe utilizado en vistas públicas o de uso general.
 
@@ -49,6 +106,9 @@ class RecipeSerializer(serializers.ModelSerializer):
             `updated_at (datetime)`: Fecha de la última modificación del registro (solo lectura).
             `image (str)`: URL de la imagen principal de la receta.
 
+        En las lecturas admite `?fields=`, `?include=` y `?exclude=` (`api.fieldsets`) sobre los campos y
+        las relaciones anidadas de `relation_fields`.
+
         Author:
             Lorena Martínez
 
@@ -57,13 +117,15 @@ class RecipeSerializer(serializers.ModelSerializer):
         """
 
     user = CustomUserFrontSerializer(read_only=True, source='user_id')
-    categories = serializers.PrimaryKeyRelatedField(
-        many=True, queryset=Category.objects.all()
+    categories = ReferencePrimaryKeyRelatedField(
+        many=True, queryset=Category.objects.all(), reference_table=category_table
     )
     ingredients = RecipeIngredientSerializer(many=True, read_only=True, source='recipe_ingredients')
     steps = StepSerializer(many=True, read_only=True, source='step_set')
     image = serializers.SerializerMethodField()
 
+    relation_fields = ('user', 'categories', 'ingredients', 'steps', 'image')
+
     class Meta:
 
         model = Recipe
@@ -82,10 +144,11 @@ class RecipeSerializer(serializers.ModelSerializer):
         ]
 
         read_only_fields = ['id', 'user', 'updated_at']
+        list_serializer_class = RecipeListSerializer
 
     def get_image(self, obj):
-        image = Image.objects.filter(external_id=obj.id, type='RECIPE').first()
-        return ImageListSerializer(image).data if image else None
+        image = get_image_resolver(self.context).get(Image.ImageType.RECIPE, obj.id)
+        return image_list_data(image) if image else None
 
     def create(self, validated_data):
         request = self.context.get('request')
@@ -117,65 +180,33 @@ class RecipeSerializer(serializers.ModelSerializer):
         # Asegúrate de eliminar 'categories' de validated_data si lo tienes, ya que lo gestionamos aparte.
         validated_data.pop('categories', None)
 
-        recipe = Recipe.objects.create(user_id=user, **validated_data)
-
-        if categories_ids:
-            recipe.categories.set(categories_ids)
-
-        for ing_data in parsed_ingredients:
-            ingredient_id = ing_data.get('ingredient')
-            quantity = ing_data.get('quantity')
-            unit_id = ing_data.get('unit')
-
-            if not all([ingredient_id, quantity, unit_id]):
-                raise serializers.ValidationError("Datos incompletos para el ingrediente de la receta.")
-
+        # Se valida todo (incluidos los ids, contra las tablas de referencia en caché) antes de escribir nada.
+        ingredient_lines = parse_ingredient_lines(parsed_ingredients)
+        steps = parse_steps(parsed_steps)
+
+        with transaction.atomic():
+            recipe = Recipe.objects.create(user_id=user, **validated_data)
+
+            if categories_ids:
+                recipe.categories.set(categories_ids)
+
+            step_objs = create_recipe_lines(recipe, ingredient_lines, steps)
+
+            # === La parte de los archivos sigue esperando que vengan en request.FILES ===
+            # La foto de la receta y las de los pasos se guardan en paralelo y se crean con un único
+            # `bulk_create`; si alguna falla, se revierte la receta entera sin dejar archivos.
+            uploads = []
+            recipe_photo_file = request.FILES.get('photo')
+            if recipe_photo_file:
+                uploads.append((recipe_photo_file, Image.ImageType.RECIPE, recipe))
+            for idx, step_obj in enumerate(step_objs):
+                step_image_file = request.FILES.get(f'step_image_{idx}')
+                if step_image_file:
+                    uploads.append((step_image_file, Image.ImageType.STEP, step_obj))
             try:
-                ingredient = Ingredient.objects.get(id=ingredient_id)
-                unit_obj = Unit.objects.get(id=unit_id)
-                RecipeIngredient.objects.create(
-                    recipe=recipe,
-                    ingredient=ingredient,
-                    quantity=quantity,
-                    unit=unit_obj
-                )
-            except (Ingredient.DoesNotExist, Unit.DoesNotExist) as e:
-                # Este print es un error, no un debug, por lo que se mantiene.
-                print(f"ERROR: Ingrediente o unidad no encontrado durante la creación: {e}")
-                raise serializers.ValidationError(f"Ingrediente o unidad no encontrado: {e}")
-
-        # === La parte de los archivos sigue esperando que vengan en request.FILES ===
-        recipe_photo_file = request.FILES.get('photo')
-        if recipe_photo_file:
-            update_image_for_instance(
-                image_file=recipe_photo_file,
-                user_id=request.user.id,
-                external_id=recipe.id,
-                image_type=Image.ImageType.RECIPE
-            )
-
-
-        for idx, step_data in enumerate(parsed_steps):
-            order = step_data.get('order')
-            text = step_data.get('description')
-
-            if not all([order, text]):
-                raise serializers.ValidationError(f"Datos incompletos para el paso {idx+1}.")
-
-            step_obj = Step.objects.create(
-                recipe=recipe,
-                order=order,
-                description=text,
-            )
-
-            step_image_file = request.FILES.get(f'step_image_{idx}')
-            if step_image_file:
-                update_image_for_instance(
-                    image_file=step_image_file,
-                    user_id=request.user.id,
-                    external_id=step_obj.id,
-                    image_type=Image.ImageType.STEP
-                )
+                create_images(uploads, request.user.id)
+            except DjangoValidationError as e:
+                raise serializers.ValidationError({'images': e.messages})
 
         return recipe
 
@@ -186,92 +217,13 @@ class RecipeSerializer(serializers.ModelSerializer):
 
         Actualiza los campos directos de la receta, y gestiona las relaciones Many-to-Many
         (categorías) y anidadas (ingredientes, pasos) comparando los datos existentes
-        con los recibidos.
+        con los recibidos. La reconciliación en bloque la hace `recipe_writer.update_recipe`.
         """
-        instance.name = validated_data.get('name', instance.name)
-        instance.description = validated_data.get('description', instance.description)
-        instance.duration_minutes = validated_data.get('duration_minutes', instance.duration_minutes)
-        instance.commensals = validated_data.get('commensals', instance.commensals)
+        ingredients_data, steps_data = parse_nested_update_data(self.context.get('request'))
+        return update_recipe(instance, validated_data, ingredients_data, steps_data)
 
-        categories_data = validated_data.get('categories')
-        if categories_data is not None:
-            instance.categories.set(categories_data)
 
-        instance.save()
-
-        ingredients_data_str = self.context['request'].data.get('ingredients')
-        if ingredients_data_str is not None:
-            try:
-                new_ingredients_data = json.loads(ingredients_data_str)
-            except json.JSONDecodeError:
-                raise serializers.ValidationError({"ingredients": "Formato JSON de ingredientes inválido para actualización."})
-
-            current_ingredients = {ri.ingredient_id: ri for ri in instance.recipe_ingredients.all()}
-            new_ingredient_ids_set = {item['ingredient'] for item in new_ingredients_data}
-
-            for item in new_ingredients_data:
-                ing_id = item['ingredient']
-                qty = item['quantity']
-                unit_id = item['unit']
-
-                try:
-                    ingredient_obj = Ingredient.objects.get(id=ing_id)
-                    unit_obj = Unit.objects.get(id=unit_id)
-                except (Ingredient.DoesNotExist, Unit.DoesNotExist) as e:
-                    raise serializers.ValidationError(
-                        {"detail": f"Ingrediente o unidad no encontrado para actualizar: {e}. ID: {ing_id}"}
-                    ) from e
-
-                if ing_id in current_ingredients:
-                    ri_instance = current_ingredients[ing_id]
-                    ri_instance.quantity = qty
-                    ri_instance.unit = unit_obj
-                    ri_instance.save()
-                else:
-                    RecipeIngredient.objects.create(
-                        recipe=instance,
-                        ingredient=ingredient_obj,
-                        quantity=qty,
-                        unit=unit_obj
-                    )
-
-            for ing_id_to_delete, ri_instance in current_ingredients.items():
-                if ing_id_to_delete not in new_ingredient_ids_set:
-                    ri_instance.delete()
-
-        steps_data_str = self.context['request'].data.get('steps')
-        if steps_data_str is not None:
-            try:
-                new_steps_data = json.loads(steps_data_str)
-            except json.JSONDecodeError:
-                raise serializers.ValidationError({"steps": "Formato JSON de pasos inválido para actualización."})
-
-            current_steps = {s.order: s for s in instance.step_set.all()}
-            new_step_orders_set = {item['order'] for item in new_steps_data}
-
-            for item in new_steps_data:
-                order = item['order']
-                description = item['description']
-
-                if order in current_steps:
-                    step_instance = current_steps[order]
-                    step_instance.description = description
-                    step_instance.save()
-                else:
-                    Step.objects.create(
-                        recipe=instance,
-                        order=order,
-                        description=description
-                    )
-
-            for order_to_delete, step_instance in current_steps.items():
-                if order_to_delete not in new_step_orders_set:
-                    step_instance.delete()
-
-        return instance
-
-
-class RecipeAdminSerializer(serializers.ModelSerializer):
+class RecipeAdminSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
 
     """
     Serializer para el modelo Recipe con acceso completo a todos los campos.
@@ -299,21 +251,24 @@ class RecipeAdminSerializer(serializers.ModelSerializer):
     """
 
     user = CustomUserFrontSerializer(read_only=True, source='user_id')
-    categories = serializers.PrimaryKeyRelatedField(
-        many=True, queryset=Category.objects.all()
+    categories = ReferencePrimaryKeyRelatedField(
+        many=True, queryset=Category.objects.all(), reference_table=category_table
     )
     steps = StepSerializer(many=True, read_only=True, source='step_set')
     ingredients = RecipeIngredientSerializer(many=True, read_only=True, source='recipe_ingredients')
     image = serializers.SerializerMethodField()
 
+    relation_fields = ('user', 'categories', 'ingredients', 'steps', 'image')
+
     class Meta:
         model = Recipe
         fields = '__all__'
         read_only_fields = ['id', 'created_at', 'updated_at', 'user_id']
+        list_serializer_class = RecipeListSerializer
 
     def get_image(self, obj):
-        image = Image.objects.filter(external_id=obj.id, type='RECIPE').first()
-        return ImageListSerializer(image).data['url'] if image else None
+        image = get_image_resolver(self.context).get(Image.ImageType.RECIPE, obj.id)
+        return image_list_data(image)['url'] if image else None
 
     # Si el RecipeAdminSerializer también va a manejar subidas de imágenes
     # y los mismos campos que el RecipeSerializer regular, deberías copiar
@@ -326,7 +281,8 @@ class RecipeAdminSerializer(serializers.ModelSerializer):
             con un enfoque para el uso administrativo.
 
             Extrae las categorías, ingredientes y pasos del `validated_data` y de `request.data`.
-            Crea la instancia de la receta, y luego itera para crear los RecipeIngredient y Step.
+            Valida ingredientes, unidades y pasos en bloque y crea la receta, sus RecipeIngredient
+            y sus Step de forma atómica con `bulk_create`.
         """
         ingredients_data_str = self.context['request'].data.get('ingredients')
         steps_data_str = self.context['request'].data.get('steps')
@@ -349,35 +305,18 @@ class RecipeAdminSerializer(serializers.ModelSerializer):
             except json.JSONDecodeError:
                 raise serializers.ValidationError({"steps": "Formato JSON de pasos inválido."})
 
-        # Crear la receta S-I-N categorías
-        recipe = Recipe.objects.create(**validated_data)
+        ingredient_lines = parse_ingredient_lines(ingredients_data)
+        steps = parse_steps(steps_data)
 
-        # Asignar las categorías después de crear la receta
-        if categories_data: # Solo si hay categorías para asignar
-            recipe.categories.set(categories_data)
+        with transaction.atomic():
+            # Crear la receta S-I-N categorías
+            recipe = Recipe.objects.create(**validated_data)
 
-        for item in ingredients_data:
-            try:
-                ingredient_obj = Ingredient.objects.get(id=item['ingredient'])
-                unit_obj = Unit.objects.get(id=item['unit'])
-            except (Ingredient.DoesNotExist, Unit.DoesNotExist) as e:
-                raise serializers.ValidationError(
-                    {"detail": f"Ingrediente o unidad no encontrado: {e}. Asegúrate de que los IDs existan."}
-                ) from e
-
-            RecipeIngredient.objects.create(
-                recipe=recipe,
-                ingredient=ingredient_obj,
-                quantity=item['quantity'],
-                unit=unit_obj,
-            )
-
-        for item in steps_data:
-            Step.objects.create(
-                recipe=recipe,
-                order=item['order'],
-                description=item['description'],
-            )
+            # Asignar las categorías después de crear la receta
+            if categories_data: # Solo si hay categorías para asignar
+                recipe.categories.set(categories_data)
+
+            create_recipe_lines(recipe, ingredient_lines, steps)
 
         return recipe
 
@@ -388,86 +327,7 @@ class RecipeAdminSerializer(serializers.ModelSerializer):
 
             Actualiza los campos directos de la receta, y gestiona las relaciones Many-to-Many
             (categorías) y anidadas (ingredientes, pasos) comparando los datos existentes
-            con los recibidos.
+            con los recibidos. La reconciliación en bloque la hace `recipe_writer.update_recipe`.
         """
-        instance.name = validated_data.get('name', instance.name)
-        instance.description = validated_data.get('description', instance.description)
-        instance.duration_minutes = validated_data.get('duration_minutes', instance.duration_minutes)
-        instance.commensals = validated_data.get('commensals', instance.commensals)
-
-        categories_data = validated_data.get('categories')
-        if categories_data is not None:
-            instance.categories.set(categories_data)
-
-        instance.save()
-
-        ingredients_data_str = self.context['request'].data.get('ingredients')
-        if ingredients_data_str is not None:
-            try:
-                new_ingredients_data = json.loads(ingredients_data_str)
-            except json.JSONDecodeError:
-                raise serializers.ValidationError({"ingredients": "Formato JSON de ingredientes inválido para actualización."})
-
-            current_ingredients = {ri.ingredient_id: ri for ri in instance.recipe_ingredients.all()}
-            new_ingredient_ids_set = {item['ingredient'] for item in new_ingredients_data}
-
-            for item in new_ingredients_data:
-                ing_id = item['ingredient']
-                qty = item['quantity']
-                unit_id = item['unit']
-
-                try:
-                    ingredient_obj = Ingredient.objects.get(id=ing_id)
-                    unit_obj = Unit.objects.get(id=unit_id)
-                except (Ingredient.DoesNotExist, Unit.DoesNotExist) as e:
-                    raise serializers.ValidationError(
-                        {"detail": f"Ingrediente o unidad no encontrado para actualizar: {e}. ID: {ing_id}"}
-                    ) from e
-
-                if ing_id in current_ingredients:
-                    ri_instance = current_ingredients[ing_id]
-                    ri_instance.quantity = qty
-                    ri_instance.unit = unit_obj
-                    ri_instance.save()
-                else:
-                    RecipeIngredient.objects.create(
-                        recipe=instance,
-                        ingredient=ingredient_obj,
-                        quantity=qty,
-                        unit=unit_obj
-                    )
-
-            for ing_id_to_delete, ri_instance in current_ingredients.items():
-                if ing_id_to_delete not in new_ingredient_ids_set:
-                    ri_instance.delete()
-
-        steps_data_str = self.context['request'].data.get('steps')
-        if steps_data_str is not None:
-            try:
-                new_steps_data = json.loads(steps_data_str)
-            except json.JSONDecodeError:
-                raise serializers.ValidationError({"steps": "Formato JSON de pasos inválido para actualización."})
-
-            current_steps = {s.order: s for s in instance.step_set.all()}
-            new_step_orders_set = {item['order'] for item in new_steps_data}
-
-            for item in new_steps_data:
-                order = item['order']
-                description = item['description']
-
-                if order in current_steps:
-                    step_instance = current_steps[order]
-                    step_instance.description = description
-                    step_instance.save()
-                else:
-                    Step.objects.create(
-                        recipe=instance,
-                        order=order,
-                        description=description
-                    )
-
-            for order_to_delete, step_instance in current_steps.items():
-                if order_to_delete not in new_step_orders_set:
-                    step_instance.delete()
-
-        return instance
\ No newline at end of file
+        ingredients_data, steps_data = parse_nested_update_data(self.context.get('request'))
+        return update_recipe(instance, validated_data, ingredients_data, steps_data)
@@ -1,9 +1,24 @@
 from rest_framework import serializers
+from api.compiled_serializers import CompiledListSerializer
+from api.fieldsets import DynamicFieldsMixin
 from recipes.models import Step, Recipe
 from media.models.image import Image
-from media.serializers.image_serializer import ImageListSerializer
+from media.serializers.image_serializer import image_list_data
+from media.services.image_resolver import get_image_resolver
 
-class StepSerializer(serializers.ModelSerializer):
+
+class StepListSerializer(CompiledListSerializer):
+    """
+    ListSerializer que resuelve en una sola consulta las imágenes de todos los pasos
+    antes de serializarlos, evitando una consulta por paso (ninguna si la respuesta no incluye `image`).
+    """
+
+    def prime(self, steps):
+        if 'image' in self.child.fields:
+            get_image_resolver(self.context).prime(Image.ImageType.STEP, [step.id for step in steps])
+
+
+class StepSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para el modelo Step.
 
@@ -26,16 +41,20 @@ class StepSerializer(serializers.ModelSerializer):
     """
     image = serializers.SerializerMethodField()
 
+    relation_fields = ('image',)
+
     class Meta:
         model = Step
         fields = ('order', 'description', 'id', 'recipe', 'created_at', 'updated_at', 'image')  
         read_only_fields = ('id', 'created_at', 'updated_at', 'recipe')
+        list_serializer_class = StepListSerializer
+
     def get_image(self, obj):
-        image = Image.objects.filter(external_id=obj.id, type='STEP').first()
-        return ImageListSerializer(image).data if image else None
+        image = get_image_resolver(self.context).get(Image.ImageType.STEP, obj.id)
+        return image_list_data(image) if image else None
 
 
-class StepAdminSerializer(serializers.ModelSerializer):
+class StepAdminSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para el modelo Step.
 
@@ -59,12 +78,15 @@ class StepAdminSerializer(serializers.ModelSerializer):
    """
     image = serializers.SerializerMethodField()
 
+    relation_fields = ('image',)
+
     class Meta:
         model = Step
         fields = '__all__'
         read_only_fields = ('created_at', 'updated_at', 'id', 'recipe')
-        
+        list_serializer_class = StepListSerializer
+
     def get_image(self, obj):
-        image = Image.objects.filter(external_id=obj.id, type='STEP').first()
-        return ImageListSerializer(image).data if image else None
+        image = get_image_resolver(self.context).get(Image.ImageType.STEP, obj.id)
+        return image_list_data(image) if image else None
 
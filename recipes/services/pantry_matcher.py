@@ -0,0 +1,56 @@
+from django.db.models import Count, F, FloatField, Q
+from django.db.models.functions import Cast
+
+from recipes.models.recipeIngredient import RecipeIngredient
+
+COOKABLE_DEFAULT = 20
+COOKABLE_MAX = 50
+
+
+def match_recipes(ingredient_ids, queryset=None, limit=COOKABLE_DEFAULT):
+    """
+    Ordena las recetas según cuántos de los ingredientes dados cubren.
+
+    `recipe_ingredients` actúa como índice invertido ingrediente -> recetas: el índice compuesto
+    `(ingredient, recipe)` permite obtener las recetas candidatas leyendo solo las entradas de los
+    ingredientes pedidos, sin recorrer el catálogo. Después se agregan únicamente las líneas de esas
+    candidatas para conocer su total de ingredientes, y la base de datos ordena y corta el resultado.
+
+    Args:
+        ingredient_ids (iterable[int]): Ingredientes disponibles (despensa o lista de la compra).
+        queryset (QuerySet | None): Recetas permitidas (por ejemplo las filtradas por el viewset).
+        limit (int): Número máximo de recetas devueltas.
+
+    Returns:
+        list[dict]: Una entrada por receta con `recipe_id`, `matched` (ingredientes cubiertos),
+        `total` (ingredientes de la receta), `missing` y `coverage` (`matched / total`), ordenadas
+        por cobertura, número de coincidencias y receta más reciente.
+    """
+    ingredient_ids = {int(ingredient_id) for ingredient_id in ingredient_ids}
+    if not ingredient_ids:
+        return []
+
+    candidates = RecipeIngredient.objects.filter(ingredient_id__in=ingredient_ids)
+    if queryset is not None:
+        candidates = candidates.filter(recipe_id__in=queryset.values('pk'))
+
+    rows = (
+        RecipeIngredient.objects.filter(recipe_id__in=candidates.values('recipe_id'))
+        .values('recipe_id')
+        .annotate(
+            total=Count('ingredient_id', distinct=True),
+            matched=Count('ingredient_id', distinct=True, filter=Q(ingredient_id__in=ingredient_ids)),
+        )
+        .annotate(coverage=Cast(F('matched'), FloatField()) / Cast(F('total'), FloatField()))
+        .order_by('-coverage', '-matched', '-recipe_id')[:limit]
+    )
+    return [
+        {
+            'recipe_id': row['recipe_id'],
+            'matched': row['matched'],
+            'total': row['total'],
+            'missing': row['total'] - row['matched'],
+            'coverage': round(row['coverage'], 4),
+        }
+        for row in rows
+    ]
@@ -0,0 +1,26 @@
+from api.commit_batches import CommitBatch
+from recipes.services.recipe_cards import refresh_cards
+from recipes.services.recipe_search import index_recipes
+
+
+def refresh_projections(recipe_ids):
+    """
+    Recalcula las proyecciones de lectura de las recetas: el documento de búsqueda y la tarjeta.
+    """
+    recipe_ids = set(recipe_ids)
+    index_recipes(recipe_ids)
+    refresh_cards(recipe_ids)
+
+
+_pending_recipes = CommitBatch('recipe_projections', refresh_projections)
+
+
+def schedule_refresh(recipe_ids):
+    """
+    Marca recetas para recalcular sus proyecciones cuando se confirme la transacción en curso.
+
+    Los ids se acumulan por transacción (`api.commit_batches.CommitBatch`), de modo que guardar una receta
+    con muchos pasos o líneas provoca un solo recálculo por receta. Fuera de una transacción se recalcula
+    inmediatamente.
+    """
+    _pending_recipes.add(recipe_id for recipe_id in recipe_ids if recipe_id is not None)
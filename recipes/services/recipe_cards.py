@@ -0,0 +1,100 @@
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from media.models.image import Image
+from media.services.image_service import variant_path
+from recipes.models.recipe import Recipe
+from recipes.models.recipeCard import RecipeCard
+from recipes.models.recipeIngredient import RecipeIngredient
+from recipes.models.step import Step
+
+CARD_FIELDS = [
+    'author', 'author_username', 'name', 'duration_minutes', 'commensals', 'thumbnail_path',
+    'category_ids', 'ingredient_count', 'step_count', 'created_at',
+]
+THUMBNAIL_VARIANT = 'thumb'
+
+
+def _count_subquery(model):
+    counts = model.objects.filter(recipe=OuterRef('pk')).order_by().values('recipe').annotate(total=Count('pk'))
+    return Coalesce(Subquery(counts.values('total'), output_field=IntegerField()), 0)
+
+
+def recipe_thumbnails(recipe_ids):
+    """
+    Devuelve `{recipe_id: ruta de la miniatura}` de las imágenes de receta indicadas con una sola consulta.
+    Si hubiera varias imágenes para una receta se usa la primera, como `ImageResolver`.
+    """
+    thumbnails = {}
+    images = Image.objects.for_owners(Image.ImageType.RECIPE, recipe_ids).order_by('pk')
+    for image in images:
+        thumbnails.setdefault(image.recipe_id, variant_path(image, THUMBNAIL_VARIANT))
+    return thumbnails
+
+
+def refresh_cards(recipe_ids):
+    """
+    Recalcula las tarjetas de las recetas indicadas con un número fijo de consultas.
+
+    Se leen las recetas con su autor y sus contadores, las categorías y las imágenes en bloque, y las
+    tarjetas se escriben con un único `bulk_create` con `update_conflicts`. Los ids de recetas ya
+    borradas se ignoran (su tarjeta se borra en cascada).
+
+    Args:
+        recipe_ids (iterable[int]): Ids de las recetas a recalcular.
+    """
+    recipe_ids = set(recipe_ids)
+    if not recipe_ids:
+        return
+    recipes = list(
+        Recipe.objects.filter(id__in=recipe_ids)
+        .select_related('user_id')
+        .annotate(ingredient_total=_count_subquery(RecipeIngredient), step_total=_count_subquery(Step))
+    )
+    category_ids = {}
+    links = Recipe.categories.through.objects.filter(recipe_id__in=recipe_ids).order_by('category_id')
+    for recipe_id, category_id in links.values_list('recipe_id', 'category_id'):
+        category_ids.setdefault(recipe_id, []).append(category_id)
+    thumbnails = recipe_thumbnails(recipe_ids)
+
+    RecipeCard.objects.bulk_create(
+        [
+            RecipeCard(
+                recipe=recipe,
+                author_id=recipe.user_id_id,
+                author_username=recipe.user_id.username,
+                name=recipe.name,
+                duration_minutes=recipe.duration_minutes,
+                commensals=recipe.commensals,
+                thumbnail_path=thumbnails.get(recipe.id),
+                category_ids=category_ids.get(recipe.id, []),
+                ingredient_count=recipe.ingredient_total,
+                step_count=recipe.step_total,
+                created_at=recipe.created_at,
+            )
+            for recipe in recipes
+        ],
+        update_conflicts=True,
+        unique_fields=['recipe'],
+        update_fields=CARD_FIELDS,
+    )
+
+
+def refresh_thumbnails(recipe_ids):
+    """
+    Actualiza solo la miniatura de las tarjetas indicadas (una consulta de imágenes y un `UPDATE` por tarjeta).
+    """
+    thumbnails = recipe_thumbnails(recipe_ids)
+    for recipe_id in recipe_ids:
+        RecipeCard.objects.filter(recipe_id=recipe_id).exclude(
+            thumbnail_path=thumbnails.get(recipe_id)
+        ).update(thumbnail_path=thumbnails.get(recipe_id))
+
+
+def refresh_author(user):
+    """
+    Propaga el nombre de usuario a las tarjetas de sus recetas. No escribe nada si no ha cambiado.
+    """
+    RecipeCard.objects.filter(author_id=user.pk).exclude(author_username=user.username).update(
+        author_username=user.username
+    )
@@ -0,0 +1,75 @@
+import random
+
+from django.db.models import Max, Min
+
+# Número de rondas de sondeo por rango de ids antes de recurrir al sondeo por vecino.
+PROBE_ROUNDS = 4
+# Factor de sobremuestreo de cada ronda para compensar los huecos en la secuencia de ids.
+OVERSAMPLE = 3
+
+
+def sample_ids(queryset, count, rng=random):
+    """
+    Devuelve hasta `count` ids aleatorios y distintos del `queryset` sin recorrer la tabla completa.
+
+    Estrategia:
+        1. Obtiene `MIN(id)` y `MAX(id)` del queryset filtrado (una consulta respaldada por índice).
+        2. Sondea ids aleatorios dentro del rango con `id__in`, sobremuestreando para cubrir los huecos
+           dejados por borrados o por los filtros aplicados. Se repite unas pocas rondas.
+        3. Si la secuencia es muy dispersa, completa con búsquedas del primer id `>=` a un punto
+           aleatorio (`ORDER BY id LIMIT 1`), cada una resuelta con una búsqueda en el índice.
+
+    Cada consulta toca como mucho unas decenas de filas, por lo que el coste no depende del tamaño del catálogo.
+
+    Args:
+        queryset (QuerySet): Queryset ya filtrado sobre el que muestrear.
+        count (int): Número de ids a devolver.
+        rng (random.Random): Generador aleatorio, inyectable para pruebas.
+
+    Returns:
+        list[int]: Ids muestreados en orden aleatorio.
+    """
+    if count <= 0:
+        return []
+
+    ids_queryset = queryset.order_by().select_related(None).prefetch_related(None)
+    bounds = ids_queryset.aggregate(low=Min('id'), high=Max('id'))
+    low, high = bounds['low'], bounds['high']
+    if low is None:
+        return []
+
+    span = high - low + 1
+    found = set()
+    exhausted = False
+
+    for _ in range(PROBE_ROUNDS):
+        missing = count - len(found)
+        if missing <= 0:
+            break
+        sample_size = min(span, missing * OVERSAMPLE)
+        candidates = {low + offset for offset in rng.sample(range(span), sample_size)} - found
+        if not candidates:
+            continue
+        hits = list(ids_queryset.filter(id__in=candidates).values_list('id', flat=True))
+        rng.shuffle(hits)
+        found.update(hits[:missing])
+        if sample_size == span:
+            # Se ha sondeado el rango completo: no quedan más ids por descubrir.
+            exhausted = True
+            break
+
+    attempts = 0 if exhausted else (count - len(found)) * 2
+    while len(found) < count and attempts > 0:
+        attempts -= 1
+        pivot = rng.randint(low, high)
+        neighbour = (
+            ids_queryset.filter(id__gte=pivot).exclude(id__in=found).order_by('id').values_list('id', flat=True).first()
+            or ids_queryset.filter(id__lt=pivot).exclude(id__in=found).order_by('-id').values_list('id', flat=True).first()
+        )
+        if neighbour is None:
+            break
+        found.add(neighbour)
+
+    sampled = list(found)
+    rng.shuffle(sampled)
+    return sampled[:count]
@@ -0,0 +1,159 @@
+import re
+import unicodedata
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection, transaction
+from django.db.models import Count, F, FloatField, OuterRef, Subquery, Sum
+
+from recipes.models.recipe import Recipe
+from recipes.models.recipeSearch import RecipeSearchDocument, RecipeSearchTerm
+
+# Campos del documento, con su peso de PostgreSQL (A-D) y el equivalente numérico del índice invertido.
+FIELD_WEIGHTS = {
+    'name': ('A', 1.0),
+    'ingredients': ('B', 0.4),
+    'description': ('C', 0.2),
+    'steps': ('D', 0.1),
+}
+MAX_TERM_LENGTH = 64
+
+STOPWORDS = {
+    'a', 'al', 'con', 'de', 'del', 'el', 'en', 'es', 'la', 'las', 'lo', 'los', 'o', 'para', 'por',
+    'se', 'su', 'un', 'una', 'y',
+}
+TOKEN_RE = re.compile(r'\w+')
+
+
+def uses_vector_search():
+    """
+    Indica si la base de datos por defecto soporta la ruta tsvector/GIN (PostgreSQL).
+    """
+    return connection.vendor == 'postgresql'
+
+
+def tokenize(text):
+    """
+    Normaliza un texto (minúsculas y sin acentos) y lo divide en términos, descartando las palabras vacías.
+
+    Returns:
+        list[str]: Términos en el orden en que aparecen.
+    """
+    text = unicodedata.normalize('NFKD', (text or '').lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return [
+        token[:MAX_TERM_LENGTH] for token in TOKEN_RE.findall(text)
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def build_document(recipe):
+    """
+    Construye los textos del documento de búsqueda de una receta con pasos e ingredientes precargados.
+    """
+    return {
+        'name': recipe.name or '',
+        'ingredients': ' '.join(line.ingredient.name for line in recipe.recipe_ingredients.all()),
+        'description': recipe.description or '',
+        'steps': ' '.join(step.description for step in sorted(recipe.step_set.all(), key=lambda step: step.order)),
+    }
+
+
+def index_recipes(recipe_ids):
+    """
+    Recalcula el documento de búsqueda de las recetas indicadas.
+
+    Se cargan las recetas con sus pasos e ingredientes en un número fijo de consultas y los documentos se
+    escriben en bloque. En PostgreSQL se actualiza el tsvector con una sola sentencia; en otras bases se
+    reescriben los términos de `RecipeSearchTerm`. Los ids de recetas ya borradas se ignoran.
+
+    Args:
+        recipe_ids (iterable[int]): Ids de las recetas a reindexar.
+    """
+    recipe_ids = set(recipe_ids)
+    if not recipe_ids:
+        return
+    recipes = list(
+        Recipe.objects.filter(id__in=recipe_ids)
+        .prefetch_related('step_set', 'recipe_ingredients__ingredient')
+    )
+    documents = [RecipeSearchDocument(recipe=recipe, **build_document(recipe)) for recipe in recipes]
+    found_ids = [recipe.id for recipe in recipes]
+
+    with transaction.atomic():
+        RecipeSearchDocument.objects.bulk_create(
+            documents,
+            update_conflicts=True,
+            unique_fields=['recipe'],
+            update_fields=list(FIELD_WEIGHTS),
+        )
+        if uses_vector_search():
+            _update_vectors(found_ids)
+        else:
+            _update_terms(documents, found_ids)
+
+
+def _update_vectors(recipe_ids):
+    config = settings.RECIPE_SEARCH_CONFIG
+    vector = None
+    for field, (weight, _) in FIELD_WEIGHTS.items():
+        part = SearchVector(field, weight=weight, config=config)
+        vector = part if vector is None else vector + part
+    RecipeSearchDocument.objects.filter(recipe_id__in=recipe_ids).update(vector=vector)
+
+
+def _update_terms(documents, recipe_ids):
+    terms = []
+    for document in documents:
+        weights = defaultdict(float)
+        for field, (_, weight) in FIELD_WEIGHTS.items():
+            for term in tokenize(getattr(document, field)):
+                weights[term] += weight
+        terms += [
+            RecipeSearchTerm(term=term, recipe_id=document.recipe_id, weight=weight)
+            for term, weight in weights.items()
+        ]
+    RecipeSearchTerm.objects.filter(recipe_id__in=recipe_ids).delete()
+    RecipeSearchTerm.objects.bulk_create(terms, batch_size=1000)
+
+
+def search_recipes(queryset, query):
+    """
+    Filtra `queryset` por las recetas que contienen todos los términos de `query`, ordenadas por relevancia.
+
+    En PostgreSQL usa `websearch_to_tsquery` contra el tsvector indexado con GIN y `ts_rank`; en otras
+    bases de datos usa el índice invertido `RecipeSearchTerm`, sumando los pesos de los términos.
+
+    Args:
+        queryset (QuerySet): Recetas sobre las que buscar (ya filtradas por el viewset).
+        query (str): Texto de búsqueda.
+
+    Returns:
+        QuerySet: Recetas que coinciden, anotadas con `rank` y ordenadas por `-rank`, `-id`.
+    """
+    if uses_vector_search():
+        search_query = SearchQuery(query, config=settings.RECIPE_SEARCH_CONFIG, search_type='websearch')
+        return (
+            queryset.filter(search_document__vector=search_query)
+            .annotate(rank=SearchRank(F('search_document__vector'), search_query))
+            .order_by('-rank', '-id')
+        )
+
+    terms = set(tokenize(query))
+    if not terms:
+        return queryset.none()
+    matches = (
+        RecipeSearchTerm.objects.filter(term__in=terms)
+        .values('recipe_id')
+        .annotate(score=Sum('weight'), matched=Count('term'))
+        .filter(matched=len(terms))
+    )
+    return (
+        queryset.filter(id__in=matches.values('recipe_id'))
+        .annotate(rank=Subquery(
+            matches.filter(recipe_id=OuterRef('pk')).values('score')[:1],
+            output_field=FloatField(),
+        ))
+        .order_by('-rank', '-id')
+    )
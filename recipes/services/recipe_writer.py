@@ -0,0 +1,242 @@
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from api.reference_cache import approved_ingredients, units
+from recipes.models.ingredient import Ingredient
+from recipes.models.recipe import Recipe
+from recipes.models.recipeIngredient import RecipeIngredient
+from recipes.models.step import Step
+from recipes.signals import recipe_changed
+from measurements.models.unit import Unit
+
+
+def _to_int(value, label):
+    """
+    Convierte un id recibido en el JSON (int o str) a entero, o lanza un error de validación.
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise serializers.ValidationError(f"Id de {label} inválido: {value!r}.")
+
+
+def _to_quantity(value):
+    """
+    Convierte la cantidad a entero como lo hace el campo del modelo con un número (`int()`, que trunca los
+    decimales); las cadenas decimales como `"2.5"` se tratan igual que el número que representan.
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return int(float(value))
+    except (TypeError, ValueError, OverflowError):
+        raise serializers.ValidationError(f"Cantidad inválida: {value!r}.")
+
+
+def parse_ingredient_lines(items):
+    """
+    Valida las líneas de ingredientes recibidas y comprueba que sus ids existen.
+
+    Los ids se buscan primero en las tablas de referencia en memoria (unidades e ingredientes aprobados);
+    solo los que no están en ellas (por ejemplo ingredientes sin aprobar) se resuelven con `in_bulk`.
+
+    Args:
+        items (list[dict]): Líneas con las claves `ingredient`, `quantity` y `unit`.
+
+    Returns:
+        list[dict]: Líneas normalizadas con `ingredient_id`, `quantity` y `unit_id` como enteros.
+
+    Raises:
+        serializers.ValidationError: Si falta algún dato o algún ingrediente o unidad no existe.
+    """
+    lines = []
+    for item in items:
+        ingredient_id = item.get('ingredient')
+        quantity = item.get('quantity')
+        unit_id = item.get('unit')
+
+        # Una cantidad 0 es válida: solo falta si no se ha enviado.
+        if not ingredient_id or quantity is None or not unit_id:
+            raise serializers.ValidationError("Datos incompletos para el ingrediente de la receta.")
+
+        lines.append({
+            'ingredient_id': _to_int(ingredient_id, 'ingrediente'),
+            'quantity': _to_quantity(quantity),
+            'unit_id': _to_int(unit_id, 'unidad'),
+        })
+
+    ingredient_ids = {line['ingredient_id'] for line in lines}
+    unit_ids = {line['unit_id'] for line in lines}
+    missing_ingredients = approved_ingredients.missing(ingredient_ids)
+    if missing_ingredients:
+        missing_ingredients -= set(Ingredient.objects.in_bulk(missing_ingredients))
+    missing_units = units.missing(unit_ids)
+    if missing_units:
+        missing_units -= set(Unit.objects.in_bulk(missing_units))
+
+    if missing_ingredients or missing_units:
+        raise serializers.ValidationError(
+            {"detail": f"Ingrediente o unidad no encontrado. Ingredientes: {sorted(missing_ingredients)}, "
+                       f"unidades: {sorted(missing_units)}."}
+        )
+    return lines
+
+
+def parse_steps(items):
+    """
+    Valida los pasos recibidos antes de escribir nada en la base de datos.
+
+    Args:
+        items (list[dict]): Pasos con las claves `order` y `description`.
+
+    Returns:
+        list[dict]: Pasos normalizados con `order` y `description`.
+
+    Raises:
+        serializers.ValidationError: Si a algún paso le falta el orden o la descripción.
+    """
+    steps = []
+    for idx, item in enumerate(items):
+        order = item.get('order')
+        description = item.get('description')
+
+        if not all([order, description]):
+            raise serializers.ValidationError(f"Datos incompletos para el paso {idx+1}.")
+
+        steps.append({'order': _to_int(order, 'orden'), 'description': description})
+    return steps
+
+
+def create_recipe_lines(recipe, ingredient_lines, steps):
+    """
+    Inserta las líneas de ingredientes y los pasos de una receta recién creada con un `bulk_create`
+    por tabla. Debe llamarse dentro de una transacción junto con la creación de la receta.
+
+    Args:
+        recipe (Recipe): Receta a la que pertenecen las líneas y los pasos.
+        ingredient_lines (list[dict]): Líneas devueltas por `parse_ingredient_lines`.
+        steps (list[dict]): Pasos devueltos por `parse_steps`.
+
+    Returns:
+        list[Step]: Los pasos creados, en el mismo orden recibido y con su `id` asignado.
+    """
+    RecipeIngredient.objects.bulk_create([
+        RecipeIngredient(recipe=recipe, **line) for line in ingredient_lines
+    ])
+    step_objs = Step.objects.bulk_create([
+        Step(recipe=recipe, **step) for step in steps
+    ])
+    # bulk_create no dispara post_save: se avisa explícitamente para reindexar la receta.
+    recipe_changed.send(sender=Recipe, recipe_ids=[recipe.pk])
+    return step_objs
+
+
+def sync_recipe_ingredients(recipe, items):
+    """
+    Reconcilia las líneas de ingredientes de una receta con las recibidas, identificándolas por ingrediente.
+
+    Calcula los conjuntos de altas, cambios y bajas y los aplica con un `bulk_create`, un `bulk_update`
+    (solo de las filas cuyo valor cambia) y un único `delete()` filtrado.
+
+    Args:
+        recipe (Recipe): Receta a actualizar.
+        items (list[dict]): Líneas deseadas con las claves `ingredient`, `quantity` y `unit`.
+    """
+    desired = {line['ingredient_id']: line for line in parse_ingredient_lines(items)}
+    current = {ri.ingredient_id: ri for ri in recipe.recipe_ingredients.all()}
+
+    to_create = []
+    to_update = []
+    for ingredient_id, line in desired.items():
+        ri_instance = current.get(ingredient_id)
+        if ri_instance is None:
+            to_create.append(RecipeIngredient(recipe=recipe, **line))
+        elif ri_instance.quantity != line['quantity'] or ri_instance.unit_id != line['unit_id']:
+            ri_instance.quantity = line['quantity']
+            ri_instance.unit_id = line['unit_id']
+            to_update.append(ri_instance)
+    to_delete = [ri.pk for ingredient_id, ri in current.items() if ingredient_id not in desired]
+
+    if to_create:
+        RecipeIngredient.objects.bulk_create(to_create)
+    if to_update:
+        RecipeIngredient.objects.bulk_update(to_update, ['quantity', 'unit'])
+    if to_delete:
+        RecipeIngredient.objects.filter(pk__in=to_delete).delete()
+    if to_create or to_update or to_delete:
+        recipe_changed.send(sender=Recipe, recipe_ids=[recipe.pk])
+
+
+def sync_recipe_steps(recipe, items):
+    """
+    Reconcilia los pasos de una receta con los recibidos, identificándolos por su orden.
+
+    Igual que `sync_recipe_ingredients`, solo escribe los pasos nuevos, los que cambian de descripción
+    y los que desaparecen, con una operación en bloque por tipo de cambio.
+
+    Args:
+        recipe (Recipe): Receta a actualizar.
+        items (list[dict]): Pasos deseados con las claves `order` y `description`.
+    """
+    desired = {step['order']: step for step in parse_steps(items)}
+    current = {step.order: step for step in recipe.step_set.all()}
+
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    for order, step in desired.items():
+        step_instance = current.get(order)
+        if step_instance is None:
+            to_create.append(Step(recipe=recipe, **step))
+        elif step_instance.description != step['description']:
+            step_instance.description = step['description']
+            # bulk_update no aplica auto_now, se actualiza explícitamente.
+            step_instance.updated_at = now
+            to_update.append(step_instance)
+    to_delete = [step.pk for order, step in current.items() if order not in desired]
+
+    if to_create:
+        Step.objects.bulk_create(to_create)
+    if to_update:
+        Step.objects.bulk_update(to_update, ['description', 'updated_at'])
+    if to_delete:
+        Step.objects.filter(pk__in=to_delete).delete()
+    if to_create or to_update or to_delete:
+        recipe_changed.send(sender=Recipe, recipe_ids=[recipe.pk])
+
+
+def update_recipe(instance, validated_data, ingredients_data=None, steps_data=None):
+    """
+    Actualiza de forma atómica los campos de una receta, sus categorías y, si se reciben,
+    sus ingredientes y pasos mediante `sync_recipe_ingredients` y `sync_recipe_steps`.
+
+    Args:
+        instance (Recipe): Receta a actualizar.
+        validated_data (dict): Datos validados por el serializer.
+        ingredients_data (list[dict] | None): Líneas de ingredientes deseadas o `None` para no tocarlas.
+        steps_data (list[dict] | None): Pasos deseados o `None` para no tocarlos.
+
+    Returns:
+        Recipe: La receta actualizada.
+    """
+    with transaction.atomic():
+        instance.name = validated_data.get('name', instance.name)
+        instance.description = validated_data.get('description', instance.description)
+        instance.duration_minutes = validated_data.get('duration_minutes', instance.duration_minutes)
+        instance.commensals = validated_data.get('commensals', instance.commensals)
+
+        categories_data = validated_data.get('categories')
+        if categories_data is not None:
+            instance.categories.set(categories_data)
+
+        instance.save()
+
+        if ingredients_data is not None:
+            sync_recipe_ingredients(instance, ingredients_data)
+        if steps_data is not None:
+            sync_recipe_steps(instance, steps_data)
+
+    return instance
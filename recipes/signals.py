@@ -0,0 +1,86 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+
+from media.models.image import Image
+from media.signals import image_processed
+from recipes.models.category import Category
+from recipes.models.ingredient import Ingredient
+from recipes.models.recipe import Recipe
+from recipes.models.recipeIngredient import RecipeIngredient
+from recipes.models.step import Step
+from recipes.services.projections import schedule_refresh
+from recipes.services.recipe_cards import refresh_author, refresh_thumbnails
+from users.models.user import CustomUser
+
+# Se envía cuando cambia el contenido de una o varias recetas por una vía que no dispara
+# post_save/post_delete (por ejemplo bulk_create/bulk_update en `recipes.services.recipe_writer`).
+# Argumentos: `recipe_ids` (iterable de ids).
+recipe_changed = Signal()
+
+
+@receiver(recipe_changed)
+def refresh_changed_recipes(sender, recipe_ids, **kwargs):
+    schedule_refresh(recipe_ids)
+
+
+@receiver(post_save, sender=Recipe)
+def refresh_saved_recipe(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_refresh([instance.pk])
+
+
+@receiver(post_save, sender=Step)
+@receiver(post_delete, sender=Step)
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def refresh_recipe_of_line(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_refresh([instance.recipe_id])
+
+
+@receiver(m2m_changed, sender=Recipe.categories.through)
+def refresh_recipe_categories(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        schedule_refresh([instance.pk])
+    elif action == 'pre_clear':
+        # Antes de vaciar la relación, que es cuando aún se sabe qué recetas la pierden.
+        schedule_refresh(instance.recipes.values_list('id', flat=True))
+    else:
+        schedule_refresh(pk_set or ())
+
+
+@receiver(post_save, sender=Ingredient)
+def reindex_recipes_using_ingredient(sender, instance, created=False, raw=False, **kwargs):
+    # Un ingrediente nuevo todavía no aparece en ninguna receta.
+    if raw or created:
+        return
+    schedule_refresh(
+        RecipeIngredient.objects.filter(ingredient=instance).values_list('recipe_id', flat=True).distinct()
+    )
+
+
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+@receiver(image_processed)
+def refresh_recipe_thumbnail(sender, instance, raw=False, **kwargs):
+    if not raw and instance.type == Image.ImageType.RECIPE:
+        refresh_thumbnails([instance.external_id])
+
+
+@receiver(post_save, sender=CustomUser)
+def refresh_author_cards(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_author(instance)
+
+
+@receiver(pre_delete, sender=Category)
+def refresh_recipes_of_deleted_category(sender, instance, **kwargs):
+    # El borrado elimina las filas de la tabla intermedia sin enviar m2m_changed.
+    schedule_refresh(instance.recipes.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Category)
+def detach_category_subtree(sender, instance, **kwargs):
+    instance.detach_descendants()
@@ -56,6 +56,92 @@ class TestCategoryModel:
         assert Category.objects.count() == 2
 
 
+# --- Test Category Tree ---
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.models
+@pytest.mark.recipes_app
+class TestCategoryTree:
+    """Tests de la ruta materializada (`path`/`depth`) de Category."""
+
+    @pytest.fixture
+    def tree(self, test_user):
+        root = Category.objects.create(name='Origen', user_id=test_user)
+        europe = Category.objects.create(name='Europa', user_id=test_user, parent_category_id=root)
+        italy = Category.objects.create(name='Italiana', user_id=test_user, parent_category_id=europe)
+        other = Category.objects.create(name='Tipo', user_id=test_user)
+        return root, europe, italy, other
+
+    def test_paths_are_set_on_create(self, tree):
+        root, europe, italy, other = tree
+        assert root.path == f'/{root.id}/' and root.depth == 0
+        assert italy.path == f'/{root.id}/{europe.id}/{italy.id}/' and italy.depth == 2
+        italy.refresh_from_db()
+        assert italy.path == f'/{root.id}/{europe.id}/{italy.id}/'
+
+    def test_moving_a_node_rewrites_its_subtree(self, tree):
+        root, europe, italy, other = tree
+        europe.parent_category_id = other
+        europe.save()
+
+        italy.refresh_from_db()
+        assert italy.path == f'/{other.id}/{europe.id}/{italy.id}/'
+        assert italy.depth == 2
+
+    def test_moving_a_stale_instance_rewrites_grandchildren(self, tree, test_user):
+        root, europe, italy, other = tree
+        sicily = Category.objects.create(name='Siciliana', user_id=test_user, parent_category_id=italy)
+        stale = Category.objects.get(pk=root.pk)
+        # Otra petición mueve la raíz mientras `stale` sigue en memoria con la ruta anterior.
+        root.parent_category_id = other
+        root.save()
+
+        stale.parent_category_id = None
+        stale.save()
+
+        sicily.refresh_from_db()
+        assert sicily.path == f'/{root.id}/{europe.id}/{italy.id}/{sicily.id}/'
+        assert sicily.depth == 3
+
+    def test_cannot_move_under_own_descendant(self, tree):
+        root, europe, italy, other = tree
+        root.parent_category_id = italy
+        with pytest.raises(ValueError):
+            root.save()
+        root.refresh_from_db()
+        assert root.parent_category_id is None
+
+    def test_deleting_a_node_detaches_its_subtree(self, tree):
+        root, europe, italy, other = tree
+        europe.delete()
+
+        italy.refresh_from_db()
+        assert italy.parent_category_id is None
+        assert italy.path == f'/{italy.id}/' and italy.depth == 0
+
+    def test_descendants_of(self, tree):
+        root, europe, italy, other = tree
+        assert set(Category.objects.descendants_of(root.id)) == {root, europe, italy}
+        assert set(Category.objects.descendants_of(root.id, include_self=False)) == {europe, italy}
+
+    def test_descendants_of_filters_by_constant_prefix(self, tree):
+        root = tree[0]
+        where = str(Category.objects.descendants_of(root.id).query).split('WHERE', 1)[1]
+
+        # Prefijo constante (usa el índice de `path`), no una subconsulta.
+        assert f'LIKE {root.path}%' in where
+        assert 'SELECT' not in where
+        assert not Category.objects.descendants_of(0).exists()
+
+    def test_rebuild_paths_after_bulk_update(self, tree):
+        root, europe, italy, other = tree
+        Category.objects.filter(pk=italy.pk).update(parent_category_id=other, path='', depth=0)
+
+        assert Category.objects.rebuild_paths() == 1
+        italy.refresh_from_db()
+        assert italy.path == f'/{other.id}/{italy.id}/' and italy.depth == 1
+
+
 # --- Test Ingredient Model ---
 @pytest.mark.django_db
 @pytest.mark.unit
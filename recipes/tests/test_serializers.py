@@ -1,7 +1,12 @@
+import time
+
 import pytest
 from rest_framework.exceptions import ValidationError
 from model_bakery import baker
 from django.utils import timezone 
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
 
 # Import models - now many can be provided via global fixtures
 from recipes.models.category import Category
@@ -22,6 +27,7 @@ from recipes.serializers.recipeSerializer import RecipeSerializer, RecipeAdminSe
 from recipes.serializers.stepSerializer import StepSerializer, StepAdminSerializer
 from users.serializers.userSerializer import CustomUserFrontSerializer
 from media.serializers.image_serializer import ImageListSerializer
+from api.renderers import FastJSONRenderer
 
 
 # --- Test Category Serializers ---
@@ -582,3 +588,112 @@ class TestRecipeSerializers:
         assert created_recipe.user_id == another_custom_user
         assert created_recipe.categories.count() == 1
         assert category in created_recipe.categories.all()
+
+
+    def test_recipe_serializer_many_resolves_images_in_bulk(self, test_user):
+        """Tests RecipeSerializer(many=True) issues a constant number of image queries."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        def image_queries_for(recipe_count):
+            Recipe.objects.all().delete()
+            for i in range(recipe_count):
+                recipe = baker.make(Recipe, name=f'Bulk {i}', user_id=test_user, duration_minutes=10, commensals=1)
+                baker.make(Image, external_id=recipe.id, type='RECIPE', url=f'recipe_{i}.webp')
+                for order in range(1, 4):
+                    step = baker.make(Step, recipe=recipe, order=order, description=f'Step {order}')
+                    baker.make(Image, external_id=step.id, type='STEP', url=f'step_{i}_{order}.webp')
+
+            with CaptureQueriesContext(connection) as ctx:
+                data = RecipeSerializer(Recipe.objects.all(), many=True).data
+            assert all(item['image'] is not None for item in data)
+            assert all(step['image'] is not None for item in data for step in item['steps'])
+            return sum('"images"' in query['sql'] for query in ctx.captured_queries)
+
+        assert image_queries_for(2) == image_queries_for(6) == 2
+
+
+# --- Test compiled (fast) serialization path ---
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.serializers
+@pytest.mark.recipes_app
+class TestCompiledRecipeSerialization:
+    """
+    The compiled serialization path and FastJSONRenderer must produce the same bytes as DRF's own
+    serializers and JSONRenderer.
+    """
+
+    @pytest.fixture
+    def make_recipes(self, test_user, test_unit, test_unit_type):
+        def _make(count, steps=3, ingredients=3):
+            category = baker.make(Category, user_id=test_user)
+            for i in range(count):
+                recipe = baker.make(Recipe, user_id=test_user, name=f'Receta ñ {i}', duration_minutes=10 + i,
+                                    commensals=2, description=None if i % 2 else 'Línea separada "citada"')
+                recipe.categories.add(category)
+                if i % 2:
+                    baker.make(Image, external_id=recipe.id, type=Image.ImageType.RECIPE, url=f'r{recipe.id}.webp',
+                               variants={'thumb': 'a_thumb.webp'})
+                for order in range(1, steps + 1):
+                    step = baker.make(Step, recipe=recipe, order=order, description=f'Paso {order} 🍳')
+                    if order == 1:
+                        baker.make(Image, external_id=step.id, type=Image.ImageType.STEP, url=f's{step.id}.webp')
+                for _ in range(ingredients):
+                    ingredient = baker.make(Ingredient, user_id=test_user, unit_type_id=test_unit_type)
+                    baker.make(RecipeIngredient, recipe=recipe, ingredient=ingredient, quantity=3, unit=test_unit)
+            return Recipe.objects.with_relations().order_by('id')
+        return _make
+
+    def render(self, settings, serializer_class, queryset, compiled, context=None):
+        settings.COMPILED_SERIALIZERS = compiled
+        renderer = FastJSONRenderer() if compiled else JSONRenderer()
+        data = serializer_class(list(queryset), many=True, context={} if context is None else context).data
+        return renderer.render(data)
+
+    @pytest.mark.parametrize('serializer_class', [RecipeSerializer, RecipeAdminSerializer])
+    def test_output_is_byte_identical(self, settings, make_recipes, serializer_class):
+        queryset = make_recipes(4)
+
+        expected = self.render(settings, serializer_class, queryset, compiled=False)
+        assert self.render(settings, serializer_class, queryset, compiled=True) == expected
+        assert b'\\u2028' in expected
+
+    def test_output_is_byte_identical_with_field_selection(self, settings, make_recipes):
+        queryset = make_recipes(3)
+        request = Request(APIRequestFactory().get('/', {'fields': 'name,steps.description,user', 'exclude': 'user.id'}))
+
+        expected = self.render(settings, RecipeSerializer, queryset, compiled=False, context={'request': request})
+        assert self.render(settings, RecipeSerializer, queryset, compiled=True, context={'request': request}) == expected
+
+    def test_renderer_falls_back_for_indented_output(self):
+        data = {'name': 'Crema', 'when': timezone.now(), 'steps': [1, 2]}
+        media_type = 'application/json; indent=4'
+
+        assert FastJSONRenderer().render(data, media_type) == JSONRenderer().render(data, media_type)
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    @pytest.mark.slow
+    def test_benchmark_compiled_serialization(self, settings, make_recipes):
+        """
+        Benchmark (run with `-m slow`): per-recipe cost of serializing and rendering a list page with the
+        DRF serializers versus the compiled path.
+        """
+        queryset = make_recipes(50, steps=8, ingredients=8)
+        recipes = list(queryset)
+
+        def best_of(compiled, rounds=5):
+            # El contexto se reutiliza para que las imágenes ya estén resueltas y solo se mida la serialización.
+            context = {}
+            self.render(settings, RecipeSerializer, recipes, compiled, context)
+            timings = []
+            for _ in range(rounds):
+                start = time.perf_counter()
+                self.render(settings, RecipeSerializer, recipes, compiled, context)
+                timings.append(time.perf_counter() - start)
+            return min(timings) / len(recipes)
+
+        standard, compiled = best_of(False), best_of(True)
+        print(f'\nDRF: {standard * 1e6:.0f} µs/receta, compilado: {compiled * 1e6:.0f} µs/receta '
+              f'({standard / compiled:.1f}x)')
+        assert compiled * 2 < standard
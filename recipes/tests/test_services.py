@@ -0,0 +1,526 @@
+import random
+from importlib import import_module
+from types import SimpleNamespace
+
+import pytest
+from django.apps import apps as django_apps
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from api import reference_cache
+from api.versioning import RECIPES, bump_versions, has_pending
+from measurements.models.unit import Unit
+from media.models.image import Image
+from recipes.models.category import Category
+from recipes.models.ingredient import Ingredient
+from recipes.models.recipe import Recipe
+from recipes.models.recipeCard import RecipeCard
+from recipes.models.recipeIngredient import RecipeIngredient
+from recipes.models.recipeSearch import RecipeSearchDocument, RecipeSearchTerm
+from recipes.models.step import Step
+from recipes.services import projections
+from recipes.services.projections import schedule_refresh
+from recipes.services.recipe_sampler import PROBE_ROUNDS, sample_ids
+from recipes.services.recipe_search import search_recipes, tokenize
+from recipes.services.pantry_matcher import match_recipes
+from recipes.services.recipe_writer import parse_ingredient_lines, sync_recipe_ingredients, sync_recipe_steps
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.recipes_app
+class TestRecipeSampler:
+    """
+    Tests del muestreo aleatorio de recetas por sondeo de rangos de ids.
+    """
+
+    def test_sample_ids_empty_queryset(self):
+        assert sample_ids(Recipe.objects.all(), 5) == []
+
+    def test_sample_ids_returns_distinct_existing_ids(self, test_user):
+        recipes = baker.make(Recipe, user_id=test_user, duration_minutes=5, commensals=1, _quantity=30)
+        # Se borran recetas para dejar huecos en la secuencia de ids.
+        Recipe.objects.filter(id__in=[r.id for r in recipes[::2]]).delete()
+        existing = set(Recipe.objects.values_list('id', flat=True))
+
+        sampled = sample_ids(Recipe.objects.all(), 5, rng=random.Random(7))
+
+        assert len(sampled) == 5
+        assert len(set(sampled)) == 5
+        assert set(sampled) <= existing
+
+    def test_sample_ids_returns_everything_when_count_exceeds_rows(self, test_user):
+        recipes = baker.make(Recipe, user_id=test_user, duration_minutes=5, commensals=1, _quantity=3)
+        assert sorted(sample_ids(Recipe.objects.all(), 10)) == sorted(r.id for r in recipes)
+
+    def test_sample_ids_honours_filters(self, test_user, another_custom_user):
+        own = baker.make(Recipe, user_id=test_user, duration_minutes=5, commensals=1, _quantity=3)
+        baker.make(Recipe, user_id=another_custom_user, duration_minutes=5, commensals=1, _quantity=40)
+
+        sampled = sample_ids(Recipe.objects.filter(user_id=test_user), 3, rng=random.Random(1))
+
+        assert sorted(sampled) == sorted(r.id for r in own)
+
+    def test_sample_ids_does_not_load_every_id(self, test_user):
+        baker.make(Recipe, user_id=test_user, duration_minutes=5, commensals=1, _quantity=200)
+        with CaptureQueriesContext(connection) as ctx:
+            sampled = sample_ids(Recipe.objects.all(), 5, rng=random.Random(3))
+        assert len(sampled) == 5
+        # Una consulta de límites y unas pocas rondas de sondeo, nunca un recorrido de todos los ids.
+        assert len(ctx.captured_queries) <= 1 + PROBE_ROUNDS
+        assert all('MIN' in q['sql'] or ' IN (' in q['sql'] for q in ctx.captured_queries)
+
+
+def _write_queries(ctx):
+    return [q for q in ctx.captured_queries if q['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))]
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.recipes_app
+class TestRecipeWriterSync:
+    """
+    Tests del motor de reconciliación en bloque de ingredientes y pasos.
+    """
+
+    @pytest.fixture
+    def long_recipe(self, test_user, test_unit, test_unit_type):
+        recipe = baker.make(Recipe, user_id=test_user, duration_minutes=5, commensals=1)
+        ingredients = baker.make(Ingredient, user_id=test_user, unit_type_id=test_unit_type, _quantity=10)
+        for ingredient in ingredients:
+            baker.make(RecipeIngredient, recipe=recipe, ingredient=ingredient, quantity=1, unit=test_unit)
+        for order in range(1, 21):
+            baker.make(Step, recipe=recipe, order=order, description=f'Paso {order}')
+        return recipe
+
+    def steps_payload(self, recipe):
+        return [{'order': s.order, 'description': s.description} for s in recipe.step_set.order_by('order')]
+
+    def lines_payload(self, recipe):
+        return [{'ingredient': ri.ingredient_id, 'quantity': ri.quantity, 'unit': ri.unit_id}
+                for ri in recipe.recipe_ingredients.order_by('id')]
+
+    def test_unchanged_data_issues_no_writes(self, long_recipe):
+        steps, lines = self.steps_payload(long_recipe), self.lines_payload(long_recipe)
+        with CaptureQueriesContext(connection) as ctx:
+            sync_recipe_steps(long_recipe, steps)
+            sync_recipe_ingredients(long_recipe, lines)
+        assert _write_queries(ctx) == []
+
+    def test_editing_one_step_is_a_single_write(self, long_recipe):
+        steps = self.steps_payload(long_recipe)
+        steps[7]['description'] = 'Paso editado'
+        with CaptureQueriesContext(connection) as ctx:
+            sync_recipe_steps(long_recipe, steps)
+        assert len(_write_queries(ctx)) == 1
+        assert long_recipe.step_set.get(order=8).description == 'Paso editado'
+        assert long_recipe.step_set.count() == 20
+
+    def test_steps_add_change_remove(self, long_recipe):
+        steps = self.steps_payload(long_recipe)[:5]
+        steps[0]['description'] = 'Nuevo primero'
+        steps.append({'order': 99, 'description': 'Último'})
+        with CaptureQueriesContext(connection) as ctx:
+            sync_recipe_steps(long_recipe, steps)
+        assert len(_write_queries(ctx)) == 3
+        assert sorted(long_recipe.step_set.values_list('order', flat=True)) == [1, 2, 3, 4, 5, 99]
+        assert long_recipe.step_set.get(order=1).description == 'Nuevo primero'
+
+    def test_ingredients_add_change_remove(self, long_recipe, test_user, test_unit_type, test_unit):
+        lines = self.lines_payload(long_recipe)[:3]
+        lines[0]['quantity'] = '7'
+        extra = baker.make(Ingredient, user_id=test_user, unit_type_id=test_unit_type)
+        lines.append({'ingredient': str(extra.id), 'quantity': 2, 'unit': test_unit.id})
+
+        sync_recipe_ingredients(long_recipe, lines)
+
+        current = {ri.ingredient_id: ri.quantity for ri in long_recipe.recipe_ingredients.all()}
+        assert len(current) == 4
+        assert current[lines[0]['ingredient']] == 7
+        assert current[extra.id] == 2
+
+    def test_unknown_ingredient_raises_validation_error(self, long_recipe, test_unit):
+        with pytest.raises(ValidationError):
+            sync_recipe_ingredients(long_recipe, [{'ingredient': 987654, 'quantity': 1, 'unit': test_unit.id}])
+        assert long_recipe.recipe_ingredients.count() == 10
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.recipes_app
+class TestRecipeSearch:
+    """
+    Tests del documento de búsqueda de recetas, su mantenimiento por señales y la consulta ordenada.
+    """
+
+    @pytest.fixture
+    def make_recipe(self, test_user, test_unit, test_unit_type, django_capture_on_commit_callbacks):
+        def _make(name, description='', steps=(), ingredients=()):
+            with django_capture_on_commit_callbacks(execute=True):
+                recipe = baker.make(Recipe, user_id=test_user, name=name, description=description,
+                                    duration_minutes=10, commensals=2)
+                for order, text in enumerate(steps, start=1):
+                    baker.make(Step, recipe=recipe, order=order, description=text)
+                for ingredient_name in ingredients:
+                    ingredient = baker.make(Ingredient, name=ingredient_name, user_id=test_user, unit_type_id=test_unit_type)
+                    baker.make(RecipeIngredient, recipe=recipe, ingredient=ingredient, quantity=1, unit=test_unit)
+            return recipe
+        return _make
+
+    def search_ids(self, query):
+        return [recipe.id for recipe in search_recipes(Recipe.objects.all(), query)]
+
+    def test_tokenize_normalizes_accents_and_drops_stopwords(self):
+        assert tokenize('Tortilla de Patatas con Cebolla, ¡AÑEJA!') == ['tortilla', 'patatas', 'cebolla', 'aneja']
+
+    def test_document_is_maintained_on_save(self, make_recipe):
+        recipe = make_recipe('Gazpacho', 'Sopa fría', steps=['Triturar tomates'], ingredients=['Pepino'])
+
+        document = RecipeSearchDocument.objects.get(recipe=recipe)
+        assert document.name == 'Gazpacho'
+        assert document.steps == 'Triturar tomates'
+        assert document.ingredients == 'Pepino'
+
+    def test_search_covers_all_fields(self, make_recipe):
+        recipe = make_recipe('Gazpacho', 'Sopa fría andaluza', steps=['Triturar los tomates'], ingredients=['Pepino'])
+        make_recipe('Paella', 'Arroz con marisco')
+
+        for query in ['gazpacho', 'andaluza', 'tomates', 'pepino', 'FRÍA']:
+            assert self.search_ids(query) == [recipe.id], query
+
+    def test_search_requires_all_terms(self, make_recipe):
+        both = make_recipe('Tarta de queso', ingredients=['Fresa'])
+        make_recipe('Tarta de chocolate')
+
+        assert self.search_ids('tarta fresa') == [both.id]
+
+    def test_name_matches_rank_above_step_matches(self, make_recipe):
+        in_steps = make_recipe('Ensalada', steps=['Añadir el pollo'])
+        in_name = make_recipe('Pollo asado')
+
+        assert self.search_ids('pollo') == [in_name.id, in_steps.id]
+
+    def test_bulk_sync_reindexes_recipe(self, make_recipe, test_unit, test_user, test_unit_type,
+                                        django_capture_on_commit_callbacks):
+        recipe = make_recipe('Crema', steps=['Calentar'])
+        ingredient = baker.make(Ingredient, name='Calabaza', user_id=test_user, unit_type_id=test_unit_type)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            sync_recipe_steps(recipe, [{'order': 1, 'description': 'Hervir'}])
+            sync_recipe_ingredients(recipe, [{'ingredient': ingredient.id, 'quantity': 1, 'unit': test_unit.id}])
+
+        assert self.search_ids('hervir calabaza') == [recipe.id]
+        assert self.search_ids('calentar') == []
+
+    def test_ingredient_rename_reindexes_recipes(self, make_recipe, django_capture_on_commit_callbacks):
+        recipe = make_recipe('Guiso', ingredients=['Garbanzo'])
+        ingredient = recipe.recipe_ingredients.get().ingredient
+
+        with django_capture_on_commit_callbacks(execute=True):
+            ingredient.name = 'Lenteja'
+            ingredient.save()
+
+        assert self.search_ids('lenteja') == [recipe.id]
+        assert self.search_ids('garbanzo') == []
+
+    def test_reindex_runs_once_per_transaction(self, make_recipe, django_capture_on_commit_callbacks):
+        recipe = make_recipe('Sopa')
+
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            for order in range(1, 6):
+                baker.make(Step, recipe=recipe, order=order, description=f'Paso {order}')
+
+        assert len(callbacks) == 1
+
+    def test_migration_backfills_existing_recipes(self, make_recipe):
+        recipe = make_recipe('Fabada', steps=['Remojar las fabes'])
+        RecipeSearchDocument.objects.all().delete()
+        RecipeSearchTerm.objects.all().delete()
+        assert self.search_ids('fabes') == []
+
+        backfill = import_module('recipes.migrations.0010_backfill_recipe_search').backfill_search_documents
+        backfill(django_apps, SimpleNamespace(connection=connection))
+
+        assert RecipeSearchDocument.objects.get(recipe=recipe).steps == 'Remojar las fabes'
+        assert self.search_ids('fabes') == [recipe.id]
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.recipes_app
+class TestRecipeCards:
+    """
+    Tests del mantenimiento de la proyección `RecipeCard` desde las señales de los modelos de origen.
+    """
+
+    @pytest.fixture
+    def recipe(self, test_user, test_unit, test_unit_type, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            recipe = baker.make(Recipe, user_id=test_user, name='Lentejas', duration_minutes=40, commensals=4)
+            for order in (1, 2):
+                baker.make(Step, recipe=recipe, order=order, description=f'Paso {order}')
+            ingredient = baker.make(Ingredient, user_id=test_user, unit_type_id=test_unit_type)
+            baker.make(RecipeIngredient, recipe=recipe, ingredient=ingredient, quantity=1, unit=test_unit)
+        return recipe
+
+    def test_card_is_built_on_commit(self, recipe, test_user):
+        card = RecipeCard.objects.get(recipe=recipe)
+
+        assert (card.name, card.duration_minutes, card.commensals) == ('Lentejas', 40, 4)
+        assert (card.author_id, card.author_username) == (test_user.id, test_user.username)
+        assert (card.step_count, card.ingredient_count) == (2, 1)
+        assert card.thumbnail_path is None
+        assert card.created_at == recipe.created_at
+
+    def test_category_changes_update_card(self, recipe, test_user, django_capture_on_commit_callbacks):
+        first, second = baker.make(Category, user_id=test_user, _quantity=2)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            recipe.categories.add(first, second)
+        assert RecipeCard.objects.get(recipe=recipe).category_ids == [first.id, second.id]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            second.recipes.clear()
+        assert RecipeCard.objects.get(recipe=recipe).category_ids == [first.id]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            first.delete()
+        assert RecipeCard.objects.get(recipe=recipe).category_ids == []
+
+    def test_processed_image_sets_thumbnail(self, recipe, test_user):
+        image = baker.make(Image, type=Image.ImageType.RECIPE, external_id=recipe.id,
+                           processing_status=Image.ImageStatus.COMPLETED,
+                           storage_path=f'{test_user.id}/lentejas.webp', variants={'thumb': 'lentejas_thumb.webp'})
+        assert RecipeCard.objects.get(recipe=recipe).thumbnail_path == f'{test_user.id}/lentejas_thumb.webp'
+
+        image.delete()
+        assert RecipeCard.objects.get(recipe=recipe).thumbnail_path is None
+
+    def test_username_change_updates_cards(self, recipe, test_user):
+        test_user.username = 'nuevo_nombre'
+        test_user.save()
+
+        assert RecipeCard.objects.get(recipe=recipe).author_username == 'nuevo_nombre'
+
+    def test_refresh_is_coalesced_with_search_index(self, recipe, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            for order in range(3, 6):
+                baker.make(Step, recipe=recipe, order=order, description=f'Paso {order}')
+
+        assert len(callbacks) == 1
+        assert RecipeCard.objects.get(recipe=recipe).step_count == 5
+
+    def test_migration_backfills_existing_recipes(self, recipe, test_user):
+        category = baker.make(Category, user_id=test_user)
+        recipe.categories.add(category)
+        baker.make(Image, type=Image.ImageType.RECIPE, external_id=recipe.id,
+                   processing_status=Image.ImageStatus.COMPLETED,
+                   storage_path=f'{test_user.id}/lentejas.webp', variants={'thumb': 'lentejas_thumb.webp'})
+        RecipeCard.objects.all().delete()
+
+        backfill = import_module('recipes.migrations.0011_backfill_recipe_cards').backfill_cards
+        backfill(django_apps, SimpleNamespace(connection=connection))
+
+        card = RecipeCard.objects.get(recipe=recipe)
+        assert (card.author_username, card.step_count, card.ingredient_count) == (test_user.username, 2, 1)
+        assert card.category_ids == [category.id]
+        assert card.thumbnail_path == f'{test_user.id}/lentejas_thumb.webp'
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.recipes_app
+class TestPantryMatcher:
+    """
+    Tests de la puntuación de recetas por cobertura de ingredientes disponibles.
+    """
+
+    @pytest.fixture
+    def ingredients(self, test_user, test_unit_type):
+        return baker.make(Ingredient, user_id=test_user, unit_type_id=test_unit_type, _quantity=5)
+
+    @pytest.fixture
+    def make_recipe(self, test_user, test_unit):
+        def _make(ingredients):
+            recipe = baker.make(Recipe, user_id=test_user, duration_minutes=10, commensals=2)
+            for ingredient in ingredients:
+                baker.make(RecipeIngredient, recipe=recipe, ingredient=ingredient, quantity=1, unit=test_unit)
+            return recipe
+        return _make
+
+    def test_ranks_by_coverage(self, ingredients, make_recipe):
+        a, b, c, d, e = ingredients
+        full = make_recipe([a, b])
+        half = make_recipe([a, c, d, e])
+        make_recipe([d, e])
+
+        result = match_recipes([a.id, b.id])
+
+        assert [row['recipe_id'] for row in result] == [full.id, half.id]
+        assert result[0] == {'recipe_id': full.id, 'matched': 2, 'total': 2, 'missing': 0, 'coverage': 1.0}
+        assert result[1]['matched'] == 1 and result[1]['missing'] == 3 and result[1]['coverage'] == 0.25
+
+    def test_respects_queryset_and_limit(self, ingredients, make_recipe, another_custom_user):
+        a = ingredients[0]
+        own = [make_recipe([a]) for _ in range(3)]
+        other = make_recipe([a])
+        other.user_id = another_custom_user
+        other.save()
+
+        allowed = Recipe.objects.exclude(id=other.id)
+        result = match_recipes([a.id], allowed, limit=2)
+
+        assert len(result) == 2
+        assert {row['recipe_id'] for row in result} <= {recipe.id for recipe in own}
+
+    def test_empty_ingredients_returns_nothing(self):
+        assert match_recipes([]) == []
+
+    def test_single_aggregate_query(self, ingredients, make_recipe):
+        for _ in range(5):
+            make_recipe(ingredients[:3])
+        with CaptureQueriesContext(connection) as ctx:
+            match_recipes([ingredient.id for ingredient in ingredients])
+        assert len(ctx.captured_queries) == 1
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.integration
+@pytest.mark.recipes_app
+class TestReferenceCache:
+    """
+    Tests de la caché de datos de referencia: lecturas en memoria e invalidación por señales.
+    Usan transacciones reales para que los cambios se confirmen como en producción.
+    """
+
+    @pytest.fixture
+    def approved(self, test_user, test_unit_type):
+        return baker.make(Ingredient, user_id=test_user, unit_type_id=test_unit_type, is_approved=True)
+
+    def test_second_read_is_served_from_memory(self, test_unit):
+        assert reference_cache.units.get(test_unit.id)['name'] == 'TestUnit'
+
+        with CaptureQueriesContext(connection) as ctx:
+            assert reference_cache.units.get(test_unit.id)['name'] == 'TestUnit'
+        assert ctx.captured_queries == []
+
+    def test_save_and_delete_invalidate_the_table(self, test_unit, test_unit_type, test_user):
+        reference_cache.units.rows()
+        test_unit.name = 'Renombrada'
+        test_unit.save()
+        other = baker.make(Unit, name='Nueva', unit_type=test_unit_type, user_id=test_user)
+
+        assert reference_cache.units.get(test_unit.id)['name'] == 'Renombrada'
+        assert reference_cache.units.get(other.id) is not None
+
+        other.delete()
+        assert reference_cache.units.get(other.id) is None
+
+    def test_shared_cache_survives_a_cold_process(self, test_unit):
+        reference_cache.units.rows()
+        reference_cache.reference_cache.clear()
+
+        with CaptureQueriesContext(connection) as ctx:
+            assert reference_cache.units.get(test_unit.id) is not None
+        assert ctx.captured_queries == []
+
+    def test_parse_lines_resolves_reference_ids_without_queries(self, approved, test_unit):
+        lines = [{'ingredient': approved.id, 'quantity': 2, 'unit': test_unit.id}]
+        parse_ingredient_lines(lines)
+
+        with CaptureQueriesContext(connection) as ctx:
+            parsed = parse_ingredient_lines(lines)
+        assert parsed == [{'ingredient_id': approved.id, 'quantity': 2, 'unit_id': test_unit.id}]
+        assert ctx.captured_queries == []
+
+    def test_parse_lines_falls_back_for_unapproved_and_rejects_unknown(self, test_user, test_unit_type, test_unit):
+        private = baker.make(Ingredient, user_id=test_user, unit_type_id=test_unit_type, is_approved=False)
+
+        assert parse_ingredient_lines([{'ingredient': private.id, 'quantity': 1, 'unit': test_unit.id}])
+        with pytest.raises(ValidationError):
+            parse_ingredient_lines([{'ingredient': private.id + 100, 'quantity': 1, 'unit': test_unit.id}])
+
+    def test_parse_lines_accepts_zero_and_decimal_quantities(self, approved, test_unit):
+        parsed = parse_ingredient_lines([
+            {'ingredient': approved.id, 'quantity': 0, 'unit': test_unit.id},
+            {'ingredient': approved.id, 'quantity': '2.5', 'unit': test_unit.id},
+            {'ingredient': approved.id, 'quantity': '3', 'unit': test_unit.id},
+        ])
+        assert [line['quantity'] for line in parsed] == [0, 2, 3]
+
+        for quantity in (None, 'mucho'):
+            with pytest.raises(ValidationError):
+                parse_ingredient_lines([{'ingredient': approved.id, 'quantity': quantity, 'unit': test_unit.id}])
+
+    def test_unit_list_endpoint_uses_the_cache(self, test_unit):
+        client = APIClient()
+        first = client.get('/api/measurements/units/')
+
+        with CaptureQueriesContext(connection) as ctx:
+            second = client.get('/api/measurements/units/')
+        assert second.status_code == 200
+        assert second.data == first.data == [{'id': test_unit.id, 'name': 'TestUnit', 'unit_type': test_unit.unit_type_id}]
+        assert ctx.captured_queries == []
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.integration
+@pytest.mark.recipes_app
+class TestProjectionBatches:
+    """
+    Comprueba que las recetas marcadas en una transacción se recalculan una vez al confirmarse y nunca si se revierte.
+    """
+
+    @pytest.fixture
+    def flushed(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(projections._pending_recipes, 'flush', lambda ids: calls.append(set(ids)))
+        return calls
+
+    def test_ids_are_flushed_once_on_commit(self, flushed):
+        with transaction.atomic():
+            schedule_refresh([1, 2])
+            schedule_refresh([2, 3, None])
+            assert flushed == []
+
+        assert flushed == [{1, 2, 3}]
+
+    def test_rolled_back_ids_are_discarded(self, flushed):
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                schedule_refresh([1])
+                raise RuntimeError
+        with transaction.atomic():
+            schedule_refresh([2])
+
+        assert flushed == [{2}]
+
+    def test_savepoint_rollback_starts_a_new_batch(self, flushed):
+        with transaction.atomic():
+            with pytest.raises(RuntimeError):
+                with transaction.atomic():
+                    schedule_refresh([1])
+                    raise RuntimeError
+            schedule_refresh([2])
+
+        assert flushed == [{2}]
+
+    def test_outside_a_transaction_ids_are_flushed_immediately(self, flushed):
+        schedule_refresh([4])
+        schedule_refresh([5])
+
+        assert flushed == [{4}, {5}]
+
+    def test_versions_pending_only_until_commit_or_rollback(self):
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                bump_versions(RECIPES)
+                assert has_pending(RECIPES)
+                raise RuntimeError
+        with transaction.atomic():
+            assert not has_pending(RECIPES)
+            bump_versions(RECIPES)
+        assert not has_pending(RECIPES)
@@ -0,0 +1,714 @@
+import io
+import json
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from PIL import Image as PILImage
+from rest_framework.test import APIClient
+
+from recipes.models.category import Category
+from recipes.models.ingredient import Ingredient
+from recipes.models.recipe import Recipe
+from recipes.models.recipeCard import RecipeCard
+from recipes.models.recipeIngredient import RecipeIngredient
+from recipes.models.step import Step
+from media.models.image import Image
+from shopping.models.shoppingListItem import ShoppingListItem
+
+
+RECIPES_URL = '/api/recipes/recipes/'
+
+# Presupuesto máximo de consultas por petición de lectura, independiente del número de recetas.
+RECIPE_LIST_QUERY_BUDGET = 6
+RECIPE_DETAIL_QUERY_BUDGET = 6
+RECIPE_RANDOM_QUERY_BUDGET = 8
+
+
+def make_upload(name, size=(32, 24), color=(200, 100, 50)):
+    buffer = io.BytesIO()
+    PILImage.new('RGB', size, color=color).save(buffer, format='PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+@pytest.mark.recipes_app
+class TestRecipeViewQueryBudget:
+    """
+    Comprueba que los endpoints de lectura de recetas lanzan un número de consultas acotado
+    que no crece con el número de recetas, pasos, ingredientes o imágenes.
+    """
+
+    @pytest.fixture
+    def client(self):
+        return APIClient()
+
+    @pytest.fixture
+    def make_recipes(self, test_user, test_unit, test_unit_type):
+        def _make(count, steps=3, ingredients=3):
+            category = baker.make(Category, user_id=test_user)
+            recipes = []
+            for i in range(count):
+                recipe = baker.make(Recipe, user_id=test_user, duration_minutes=10, commensals=2)
+                recipe.categories.add(category)
+                baker.make(Image, external_id=recipe.id, type=Image.ImageType.RECIPE, url=f'r{recipe.id}.webp')
+                for order in range(1, steps + 1):
+                    step = baker.make(Step, recipe=recipe, order=order, description=f'Paso {order}')
+                    baker.make(Image, external_id=step.id, type=Image.ImageType.STEP, url=f's{step.id}.webp')
+                for _ in range(ingredients):
+                    ingredient = baker.make(Ingredient, user_id=test_user, unit_type_id=test_unit_type)
+                    baker.make(RecipeIngredient, recipe=recipe, ingredient=ingredient, quantity=1, unit=test_unit)
+                recipes.append(recipe)
+            return recipes
+        return _make
+
+    def count_queries(self, client, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        assert response.status_code == 200
+        return len(ctx.captured_queries)
+
+    @pytest.mark.parametrize('recipe_count', [1, 5, 20])
+    def test_list_query_budget(self, client, make_recipes, recipe_count):
+        make_recipes(recipe_count)
+        assert self.count_queries(client, RECIPES_URL) <= RECIPE_LIST_QUERY_BUDGET
+
+    def test_list_query_count_does_not_scale(self, client, make_recipes):
+        make_recipes(2)
+        small = self.count_queries(client, RECIPES_URL)
+        make_recipes(10, steps=6, ingredients=6)
+        assert self.count_queries(client, RECIPES_URL) == small
+
+    def test_retrieve_query_budget(self, client, make_recipes):
+        recipe = make_recipes(1, steps=10, ingredients=10)[0]
+        assert self.count_queries(client, f'{RECIPES_URL}{recipe.id}/') <= RECIPE_DETAIL_QUERY_BUDGET
+
+    @pytest.mark.parametrize('recipe_count', [3, 15])
+    def test_random_query_budget(self, client, make_recipes, recipe_count):
+        make_recipes(recipe_count)
+        assert self.count_queries(client, f'{RECIPES_URL}random/') <= RECIPE_RANDOM_QUERY_BUDGET
+
+    def test_sparse_fields_skip_unrequested_relations(self, client, make_recipes):
+        make_recipes(5)
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(f'{RECIPES_URL}?fields=name,duration_minutes')
+
+        assert len(ctx.captured_queries) == 1
+        assert [set(item) for item in response.data['results']] == [{'id', 'name', 'duration_minutes'}] * 5
+
+    def test_include_limits_nested_relations(self, client, make_recipes):
+        recipe = make_recipes(1)[0]
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(f'{RECIPES_URL}{recipe.id}/?include=steps&exclude=steps.image')
+
+        # La receta y sus pasos: ni autor, ni categorías, ni ingredientes, ni imágenes.
+        assert len(ctx.captured_queries) == 2
+        assert {'user', 'categories', 'ingredients', 'image'}.isdisjoint(response.data)
+        assert 'name' in response.data
+        assert 'image' not in response.data['steps'][0]
+
+    def test_dotted_fields_shape_nested_serializers(self, client, make_recipes):
+        recipe = make_recipes(1)[0]
+        response = client.get(f'{RECIPES_URL}{recipe.id}/?fields=name,steps.description,user.username')
+
+        assert set(response.data) == {'id', 'name', 'steps', 'user'}
+        assert [set(step) for step in response.data['steps']] == [{'id', 'description'}] * 3
+        assert set(response.data['user']) == {'id', 'username'}
+
+    @pytest.mark.parametrize('exclude', ['id', 'user.id'])
+    def test_exclude_never_drops_id(self, client, make_recipes, exclude):
+        recipe = make_recipes(1)[0]
+
+        listing = client.get(f'{RECIPES_URL}?exclude={exclude}')
+        detail = client.get(f'{RECIPES_URL}{recipe.id}/?exclude={exclude}')
+
+        assert listing.status_code == detail.status_code == 200
+        assert listing.data['results'][0]['id'] == detail.data['id'] == recipe.id
+        assert listing.data['results'][0]['user']['id'] == detail.data['user']['id'] == recipe.user_id.id
+
+    def test_writes_ignore_field_selection(self, make_recipes, test_user):
+        recipe = make_recipes(1)[0]
+        client = APIClient()
+        client.force_authenticate(test_user)
+
+        response = client.patch(f'{RECIPES_URL}{recipe.id}/?fields=name', {'commensals': 6}, format='json')
+
+        assert response.status_code == 200
+        assert response.data['commensals'] == 6
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+@pytest.mark.recipes_app
+class TestRecipeViewPagination:
+    """
+    Comprueba la paginación por cursor del listado de recetas.
+    """
+
+    @pytest.fixture
+    def client(self):
+        return APIClient()
+
+    def test_list_is_paginated_by_cursor(self, client, test_user):
+        recipes = baker.make(Recipe, user_id=test_user, duration_minutes=10, commensals=2, _quantity=5)
+        expected_ids = [r.id for r in sorted(recipes, key=lambda r: (r.created_at, r.id), reverse=True)]
+
+        seen_ids = []
+        url = f'{RECIPES_URL}?limit=2'
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            assert len(response.data['results']) <= 2
+            seen_ids += [item['id'] for item in response.data['results']]
+            url = response.data['next']
+
+        assert seen_ids == expected_ids
+
+    def test_list_page_size_is_bounded(self, client, test_user):
+        baker.make(Recipe, user_id=test_user, duration_minutes=10, commensals=2, _quantity=3)
+        response = client.get(f'{RECIPES_URL}?limit=100000')
+        assert response.status_code == 200
+        assert response.data['previous'] is None
+        assert len(response.data['results']) == 3
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+@pytest.mark.recipes_app
+class TestRecipeViewRandom:
+    """
+    Comprueba el endpoint de recetas aleatorias.
+    """
+
+    def test_random_honours_user_filter(self, test_user, another_custom_user):
+        own = baker.make(Recipe, user_id=test_user, duration_minutes=5, commensals=1, _quantity=4)
+        baker.make(Recipe, user_id=another_custom_user, duration_minutes=5, commensals=1, _quantity=20)
+
+        response = APIClient().get(f'{RECIPES_URL}random/?count=3&user_id={test_user.id}')
+
+        assert response.status_code == 200
+        ids = [item['id'] for item in response.data]
+        assert len(ids) == len(set(ids)) == 3
+        assert set(ids) <= {r.id for r in own}
+
+    def test_random_invalid_count_falls_back_to_default(self, test_user):
+        baker.make(Recipe, user_id=test_user, duration_minutes=5, commensals=1, _quantity=8)
+        response = APIClient().get(f'{RECIPES_URL}random/?count=abc')
+        assert response.status_code == 200
+        assert len(response.data) == 5
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+@pytest.mark.recipes_app
+class TestRecipeViewCreate:
+    """
+    Comprueba la creación de recetas con sus ingredientes y pasos en bloque.
+    """
+
+    @pytest.fixture
+    def client(self, test_user):
+        client = APIClient()
+        client.force_authenticate(user=test_user)
+        return client
+
+    @pytest.fixture
+    def payload(self, test_user, test_unit, test_unit_type, test_category):
+        ingredients = baker.make(Ingredient, user_id=test_user, unit_type_id=test_unit_type, _quantity=25)
+        return {
+            'name': 'Receta grande',
+            'description': 'Muchas líneas',
+            'duration_minutes': 60,
+            'commensals': 4,
+            'categories': [test_category.id],
+            'ingredients_data': json.dumps([
+                {'ingredient': ing.id, 'quantity': 10, 'unit': test_unit.id} for ing in ingredients
+            ]),
+            'steps_data': json.dumps([
+                {'order': order, 'description': f'Paso {order}'} for order in range(1, 16)
+            ]),
+        }
+
+    def test_create_uses_bulk_writes(self, client, payload):
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.post(RECIPES_URL, payload, format='multipart')
+
+        assert response.status_code == 201, response.data
+        recipe = Recipe.objects.get(name='Receta grande')
+        assert recipe.recipe_ingredients.count() == 25
+        assert recipe.step_set.count() == 15
+        writes = [q for q in ctx.captured_queries if q['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))]
+        assert len(writes) <= 5
+
+    def test_create_with_unknown_unit_is_atomic(self, client, payload):
+        lines = json.loads(payload['ingredients_data'])
+        lines[-1]['unit'] = 999999
+        payload['ingredients_data'] = json.dumps(lines)
+
+        response = client.post(RECIPES_URL, payload, format='multipart')
+
+        assert response.status_code == 400
+        assert not Recipe.objects.filter(name='Receta grande').exists()
+        assert not RecipeIngredient.objects.exists()
+        assert not Step.objects.exists()
+
+    @pytest.fixture
+    def media_dirs(self, settings, tmp_path):
+        settings.MEDIA_IMG_PATH = tmp_path
+        settings.MEDIA_PENDING_PATH = tmp_path / 'pending'
+        settings.IMAGE_PIPELINE_BACKEND = 'media.services.image_pipeline.SyncBackend'
+        settings.IMAGE_CONTENT_ADDRESSED = False
+        return tmp_path
+
+    def test_create_with_photos_inserts_images_in_one_batch(self, client, payload, media_dirs,
+                                                            django_capture_on_commit_callbacks):
+        payload['photo'] = make_upload('photo.png', color=(10, 20, 30))
+        for idx in range(3):
+            payload[f'step_image_{idx}'] = make_upload(f'step_{idx}.png', color=(idx, 0, 0))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.post(RECIPES_URL, payload, format='multipart')
+
+        assert response.status_code == 201, response.data
+        recipe = Recipe.objects.get(name='Receta grande')
+        assert recipe.images.count() == 1
+        assert Image.objects.filter(step__recipe=recipe).count() == 3
+        assert set(Image.objects.values_list('processing_status', flat=True)) == {Image.ImageStatus.COMPLETED}
+        image_inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "images"')]
+        assert len(image_inserts) == 1
+
+    def test_invalid_photo_rolls_back_recipe_and_stored_files(self, client, payload, media_dirs):
+        payload['photo'] = make_upload('photo.png')
+        payload['step_image_0'] = SimpleUploadedFile('broken.png', b'not an image', content_type='image/png')
+
+        response = client.post(RECIPES_URL, payload, format='multipart')
+
+        assert response.status_code == 400
+        assert 'images' in response.data
+        assert not Recipe.objects.filter(name='Receta grande').exists()
+        assert not Image.objects.exists()
+        assert not any((media_dirs / 'pending').iterdir())
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+@pytest.mark.recipes_app
+class TestRecipeViewSearch:
+    """
+    Comprueba el endpoint de búsqueda de recetas.
+    """
+
+    def test_search_returns_ranked_matches(self, test_user, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            in_description = baker.make(Recipe, user_id=test_user, name='Ensalada', description='Con salmón',
+                                        duration_minutes=5, commensals=1)
+            in_name = baker.make(Recipe, user_id=test_user, name='Salmón al horno', description='',
+                                 duration_minutes=5, commensals=1)
+            baker.make(Recipe, user_id=test_user, name='Paella', description='', duration_minutes=5, commensals=1)
+
+        response = APIClient().get(f'{RECIPES_URL}search/?q=salmon')
+
+        assert response.status_code == 200
+        assert response.data['count'] == 2
+        assert [item['id'] for item in response.data['results']] == [in_name.id, in_description.id]
+
+    def test_search_without_query_is_rejected(self):
+        response = APIClient().get(f'{RECIPES_URL}search/')
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+@pytest.mark.recipes_app
+class TestRecipeViewCards:
+    """
+    Comprueba el listado de tarjetas, leído de la proyección `RecipeCard` con una sola consulta.
+    """
+
+    @pytest.fixture
+    def recipes(self, test_user, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            recipes = [
+                baker.make(Recipe, user_id=test_user, name=f'Receta {i}', duration_minutes=10, commensals=2)
+                for i in range(5)
+            ]
+        return recipes
+
+    def test_cards_are_served_with_a_single_query(self, recipes):
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().get(f'{RECIPES_URL}cards/?limit=3')
+
+        assert response.status_code == 200
+        assert len(queries) == 1
+        assert [item['id'] for item in response.data['results']] == [recipe.id for recipe in recipes[::-1][:3]]
+        assert set(response.data['results'][0]) == {
+            'id', 'name', 'duration_minutes', 'commensals', 'user_id', 'author_username', 'thumbnail',
+            'categories', 'ingredient_count', 'step_count', 'created_at',
+        }
+
+        next_page = APIClient().get(response.data['next'])
+        assert [item['id'] for item in next_page.data['results']] == [recipe.id for recipe in recipes[::-1][3:]]
+
+    def test_cards_filter_by_author_and_category(self, recipes, test_user, django_capture_on_commit_callbacks):
+        other = baker.make('users.CustomUser')
+        category = baker.make(Category, user_id=test_user)
+        with django_capture_on_commit_callbacks(execute=True):
+            foreign = baker.make(Recipe, user_id=other, name='Ajena', duration_minutes=10, commensals=2)
+            recipes[0].categories.add(category)
+
+        by_author = APIClient().get(f'{RECIPES_URL}cards/?user_id={other.id}')
+        with CaptureQueriesContext(connection) as queries:
+            by_category = APIClient().get(f'{RECIPES_URL}cards/?categories={category.id}')
+
+        assert [item['id'] for item in by_author.data['results']] == [foreign.id]
+        assert [item['id'] for item in by_category.data['results']] == [recipes[0].id]
+        assert by_category.data['results'][0]['categories'] == [category.id]
+        assert len(queries) == 1
+
+    def test_cards_ignore_recipes_without_card(self, test_user):
+        # Las recetas creadas sin señales (carga en bruto) aparecen tras `rebuild_recipe_cards`.
+        Recipe.objects.bulk_create([Recipe(user_id=test_user, name='En bruto', duration_minutes=1, commensals=1)])
+        assert APIClient().get(f'{RECIPES_URL}cards/').data['results'] == []
+
+        call_command('rebuild_recipe_cards', stdout=io.StringIO())
+
+        assert RecipeCard.objects.count() == 1
+        assert APIClient().get(f'{RECIPES_URL}cards/').data['results'][0]['name'] == 'En bruto'
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+@pytest.mark.recipes_app
+class TestRecipeViewCookable:
+    """
+    Comprueba el endpoint de recetas que se pueden cocinar con los ingredientes disponibles.
+    """
+
+    @pytest.fixture
+    def setup(self, test_user, test_unit, test_unit_type):
+        ingredients = baker.make(Ingredient, user_id=test_user, unit_type_id=test_unit_type, _quantity=3)
+        full = baker.make(Recipe, user_id=test_user, duration_minutes=5, commensals=1)
+        partial = baker.make(Recipe, user_id=test_user, duration_minutes=5, commensals=1)
+        for ingredient in ingredients[:2]:
+            baker.make(RecipeIngredient, recipe=full, ingredient=ingredient, quantity=1, unit=test_unit)
+        for ingredient in ingredients[1:]:
+            baker.make(RecipeIngredient, recipe=partial, ingredient=ingredient, quantity=1, unit=test_unit)
+        return ingredients, full, partial
+
+    def test_cookable_with_ingredient_param(self, setup):
+        ingredients, full, partial = setup
+        ids = ','.join(str(ingredient.id) for ingredient in ingredients[:2])
+
+        response = APIClient().get(f'{RECIPES_URL}cookable/?ingredients={ids}')
+
+        assert response.status_code == 200
+        assert [item['id'] for item in response.data] == [full.id, partial.id]
+        assert response.data[0]['match'] == {'matched': 2, 'total': 2, 'missing': 0, 'coverage': 1.0}
+
+    def test_cookable_uses_shopping_list(self, setup, test_user, test_unit):
+        ingredients, full, partial = setup
+        baker.make(ShoppingListItem, user_id=test_user, ingredient_id=ingredients[2], quantity_needed=1, unit=test_unit)
+        client = APIClient()
+        client.force_authenticate(user=test_user)
+
+        response = client.get(f'{RECIPES_URL}cookable/')
+
+        assert response.status_code == 200
+        assert [item['id'] for item in response.data] == [partial.id]
+
+    def test_cookable_requires_ingredients_for_anonymous(self):
+        assert APIClient().get(f'{RECIPES_URL}cookable/').status_code == 400
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+@pytest.mark.recipes_app
+class TestCategoryTreeViews:
+    """
+    Comprueba el endpoint del árbol de categorías y el filtro de recetas por subárbol.
+    """
+
+    @pytest.fixture
+    def tree(self, test_user):
+        root = Category.objects.create(name='Origen', user_id=test_user)
+        europe = Category.objects.create(name='Europa', user_id=test_user, parent_category_id=root)
+        italy = Category.objects.create(name='Italiana', user_id=test_user, parent_category_id=europe)
+        other = Category.objects.create(name='Tipo', user_id=test_user)
+        return root, europe, italy, other
+
+    def test_tree_is_built_with_one_query(self, tree):
+        root, europe, italy, other = tree
+        with CaptureQueriesContext(connection) as ctx:
+            response = APIClient().get('/api/recipes/categories/tree/')
+
+        assert response.status_code == 200
+        assert len(ctx.captured_queries) == 1
+        by_id = {node['id']: node for node in response.data}
+        assert set(by_id) == {root.id, other.id}
+        assert by_id[root.id]['children'][0]['id'] == europe.id
+        assert by_id[root.id]['children'][0]['children'][0] == {
+            'id': italy.id, 'name': 'Italiana', 'depth': 2, 'children': [],
+        }
+
+    def test_recipes_filtered_by_category_subtree(self, tree, test_user):
+        root, europe, italy, other = tree
+        pasta = baker.make(Recipe, user_id=test_user, duration_minutes=5, commensals=1)
+        pasta.categories.add(italy)
+        tapas = baker.make(Recipe, user_id=test_user, duration_minutes=5, commensals=1)
+        tapas.categories.add(europe, italy)
+        unrelated = baker.make(Recipe, user_id=test_user, duration_minutes=5, commensals=1)
+        unrelated.categories.add(other)
+
+        response = APIClient().get(f'{RECIPES_URL}?categories__descendant_of={root.id}')
+
+        assert response.status_code == 200
+        assert sorted(item['id'] for item in response.data['results']) == sorted([pasta.id, tapas.id])
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+@pytest.mark.recipes_app
+class TestCategorySummaryViews:
+    """
+    Comprueba el listado ligero de categorías con contadores y el sub-recurso paginado de recetas.
+    """
+
+    CATEGORIES_URL = '/api/recipes/categories/'
+
+    @pytest.fixture
+    def populated(self, test_user, test_unit_type):
+        def _make(recipes_per_category):
+            categories = baker.make(Category, user_id=test_user, _quantity=3)
+            for category in categories:
+                recipes = baker.make(Recipe, user_id=test_user, duration_minutes=5, commensals=1,
+                                     _quantity=recipes_per_category)
+                category.recipes.add(*recipes)
+                ingredient = baker.make(Ingredient, user_id=test_user, unit_type_id=test_unit_type)
+                category.ingredients.add(ingredient)
+            return categories
+        return _make
+
+    def test_list_returns_counts_without_embedding_recipes(self, populated):
+        categories = populated(4)
+
+        response = APIClient().get(self.CATEGORIES_URL)
+
+        assert response.status_code == 200
+        item = next(entry for entry in response.data if entry['id'] == categories[0].id)
+        assert item['recipe_count'] == 4
+        assert item['ingredient_count'] == 1
+        assert 'recipes' not in item and 'ingredients' not in item
+
+    def test_list_query_count_does_not_scale(self, populated):
+        populated(1)
+        with CaptureQueriesContext(connection) as small:
+            APIClient().get(self.CATEGORIES_URL)
+        populated(10)
+        with CaptureQueriesContext(connection) as large:
+            APIClient().get(self.CATEGORIES_URL)
+        assert len(large.captured_queries) == len(small.captured_queries) == 1
+
+    def test_category_recipes_are_paginated(self, populated):
+        category = populated(5)[0]
+
+        response = APIClient().get(f'{self.CATEGORIES_URL}{category.id}/recipes/?limit=2')
+
+        assert response.status_code == 200
+        assert len(response.data['results']) == 2
+        assert response.data['next'] is not None
+        assert {'steps', 'ingredients'} <= set(response.data['results'][0])
+
+    def test_category_recipes_skip_unrequested_relations(self, populated):
+        category = populated(3)[0]
+        url = f'{self.CATEGORIES_URL}{category.id}/recipes/'
+        with CaptureQueriesContext(connection) as full:
+            APIClient().get(url)
+        with CaptureQueriesContext(connection) as sparse:
+            response = APIClient().get(f'{url}?fields=name')
+
+        assert [set(item) for item in response.data['results']] == [{'id', 'name'}] * 3
+        assert len(full.captured_queries) - len(sparse.captured_queries) == 4
+        assert not any('steps' in query['sql'] or 'recipe_ingredients' in query['sql']
+                       for query in sparse.captured_queries)
+
+    def test_category_recipes_with_descendants(self, test_user):
+        parent = Category.objects.create(name='Padre', user_id=test_user)
+        child = Category.objects.create(name='Hija', user_id=test_user, parent_category_id=parent)
+        recipe = baker.make(Recipe, user_id=test_user, duration_minutes=5, commensals=1)
+        recipe.categories.add(child)
+
+        direct = APIClient().get(f'{self.CATEGORIES_URL}{parent.id}/recipes/')
+        subtree = APIClient().get(f'{self.CATEGORIES_URL}{parent.id}/recipes/?descendants=true')
+
+        assert direct.data['results'] == []
+        assert [item['id'] for item in subtree.data['results']] == [recipe.id]
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+@pytest.mark.recipes_app
+class TestConditionalGet:
+    """
+    Comprueba los validadores ETag / Last-Modified y las respuestas 304 de las lecturas.
+    """
+
+    @pytest.fixture
+    def client(self):
+        return APIClient()
+
+    def test_list_and_detail_return_validators(self, client, test_recipe):
+        for url in (RECIPES_URL, f'{RECIPES_URL}{test_recipe.id}/'):
+            response = client.get(url)
+            assert response.status_code == 200
+            assert response['ETag'].startswith('"')
+            assert 'Last-Modified' in response
+            assert response['Cache-Control'] == 'no-cache'
+
+    def test_matching_etag_returns_304_without_queries(self, client, test_recipe):
+        etag = client.get(f'{RECIPES_URL}{test_recipe.id}/')['ETag']
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(f'{RECIPES_URL}{test_recipe.id}/', HTTP_IF_NONE_MATCH=f'W/{etag}')
+
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+        assert response.content == b''
+        assert ctx.captured_queries == []
+
+    def test_if_modified_since_returns_304(self, client, test_recipe):
+        last_modified = client.get(RECIPES_URL)['Last-Modified']
+
+        assert client.get(RECIPES_URL, HTTP_IF_MODIFIED_SINCE=last_modified).status_code == 304
+
+    def test_etag_varies_with_query_string(self, client, test_recipe):
+        assert client.get(RECIPES_URL)['ETag'] != client.get(f'{RECIPES_URL}?limit=1')['ETag']
+
+    @pytest.mark.parametrize('change', ['recipe', 'step', 'category'])
+    def test_changes_invalidate_etag(self, client, test_recipe, test_category, change):
+        etag = client.get(RECIPES_URL)['ETag']
+
+        if change == 'recipe':
+            test_recipe.name = 'Otro nombre'
+            test_recipe.save()
+        elif change == 'step':
+            baker.make(Step, recipe=test_recipe, order=1, description='Nuevo paso')
+        else:
+            test_recipe.categories.add(test_category)
+
+        assert client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    def test_category_tree_and_units_are_conditional(self, client, test_unit, test_category):
+        for url in ('/api/recipes/categories/tree/', '/api/measurements/units/'):
+            etag = client.get(url)['ETag']
+            assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+        etag = client.get('/api/measurements/units/')['ETag']
+        test_unit.name = 'Otra unidad'
+        test_unit.save()
+        assert client.get('/api/measurements/units/', HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    def test_writes_are_not_conditional(self, client, test_recipe):
+        response = client.post(RECIPES_URL, {}, HTTP_IF_NONE_MATCH='*')
+        assert response.status_code != 304
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+@pytest.mark.recipes_app
+class TestRecipeResponseCache:
+    """
+    Comprueba la caché de respuestas anónimas de recetas: aciertos sin consultas, invalidación por
+    dependencias y recálculo único por clave.
+    """
+
+    @pytest.fixture
+    def recipes(self, test_user, another_custom_user):
+        own = baker.make(Recipe, user_id=test_user, duration_minutes=5, commensals=1)
+        other = baker.make(Recipe, user_id=another_custom_user, duration_minutes=5, commensals=1)
+        return own, other
+
+    def detail_url(self, recipe):
+        return f'{RECIPES_URL}{recipe.id}/'
+
+    def queries_for(self, url, **extra):
+        with CaptureQueriesContext(connection) as ctx:
+            response = APIClient().get(url, **extra)
+        return response, len(ctx.captured_queries)
+
+    def test_repeated_anonymous_reads_hit_the_cache(self, recipes):
+        own, _ = recipes
+        for url in (RECIPES_URL, self.detail_url(own)):
+            first, _ = self.queries_for(url)
+            second, queries = self.queries_for(url)
+            assert second.status_code == 200
+            assert queries == 0
+            assert second.content == first.content
+            assert second['Content-Type'] == first['Content-Type']
+
+    def test_query_parameters_are_part_of_the_key(self, recipes):
+        self.queries_for(RECIPES_URL)
+        response, queries = self.queries_for(f'{RECIPES_URL}?limit=1')
+        assert queries > 0
+        assert len(response.json()['results']) == 1
+
+    def test_authenticated_reads_are_not_cached(self, recipes, test_user):
+        client = APIClient()
+        client.force_authenticate(test_user)
+        client.get(RECIPES_URL)
+        with CaptureQueriesContext(connection) as ctx:
+            client.get(RECIPES_URL)
+        assert len(ctx.captured_queries) > 0
+
+    def test_step_change_invalidates_only_its_recipe(self, recipes):
+        own, other = recipes
+        self.queries_for(self.detail_url(own))
+        self.queries_for(self.detail_url(other))
+
+        baker.make(Step, recipe=own, order=1, description='Paso nuevo')
+
+        response, queries = self.queries_for(self.detail_url(own))
+        assert queries > 0
+        assert response.json()['steps'][0]['description'] == 'Paso nuevo'
+        assert self.queries_for(self.detail_url(other))[1] == 0
+
+    def test_author_change_invalidates_their_recipes(self, recipes, test_user):
+        own, other = recipes
+        self.queries_for(self.detail_url(own))
+        self.queries_for(self.detail_url(other))
+
+        test_user.username = 'renombrado'
+        test_user.save()
+
+        response, queries = self.queries_for(self.detail_url(own))
+        assert queries > 0 and response.json()['user']['username'] == 'renombrado'
+        assert self.queries_for(self.detail_url(other))[1] == 0
+
+    def test_new_recipe_invalidates_list_pages(self, recipes, test_user):
+        self.queries_for(RECIPES_URL)
+        created = baker.make(Recipe, user_id=test_user, duration_minutes=5, commensals=1)
+
+        response, _ = self.queries_for(RECIPES_URL)
+        assert created.id in [item['id'] for item in response.json()['results']]
+
+    def test_concurrent_miss_serves_previous_entry_while_recomputing(self, recipes):
+        from api import response_cache
+
+        own, _ = recipes
+        url = self.detail_url(own)
+        self.queries_for(url)
+        own.name = 'Cambiada'
+        own.save()
+        key = f'recipe:retrieve:{own.id}:'
+        assert response_cache.acquire(key)
+
+        response, queries = self.queries_for(url)
+
+        assert queries == 0
+        assert response.json()['name'] != 'Cambiada'
+        response_cache.release(key)
+        assert self.queries_for(url)[0].json()['name'] == 'Cambiada'
@@ -1,14 +1,50 @@
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAdminUser
-from recipes.models import Category
+from rest_framework.renderers import BrowsableAPIRenderer
+from api import reference_cache
+from api.fieldsets import selected_relations
+from api.mixins import ConditionalGetMixin
+from api.renderers import FastJSONRenderer
+from api.versioning import CATEGORIES, RECIPES
+from recipes.models import Category, Recipe
+from recipes.pagination import RecipeCursorPagination
 from recipes.serializers.categorySerializer import (
     CategorySerializer,
     CategoryAdminSerializer,
+    CategorySummarySerializer,
 )
+from recipes.serializers.recipeSerializer import RecipeSerializer, RecipeAdminSerializer
 from django_filters.rest_framework import DjangoFilterBackend
 
 
-class CategoryView(viewsets.ModelViewSet):
+def build_category_tree(rows):
+    """
+    Construye el árbol anidado de categorías a partir de filas ordenadas por `path`.
+
+    Al ordenar por ruta materializada cada padre aparece antes que sus hijos, por lo que basta una pasada.
+
+    Args:
+        rows (iterable[dict]): Filas con `id`, `name`, `parent_category_id` y `depth`.
+
+    Returns:
+        list[dict]: Categorías raíz, cada una con su lista `children`.
+    """
+    nodes = {}
+    roots = []
+    for row in rows:
+        node = {'id': row['id'], 'name': row['name'], 'depth': row['depth'], 'children': []}
+        nodes[row['id']] = node
+        parent = nodes.get(row['parent_category_id'])
+        if parent is None:
+            roots.append(node)
+        else:
+            parent['children'].append(node)
+    return roots
+
+
+class CategoryView(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar categorías en la aplicación de recetas.
 
@@ -22,6 +58,9 @@ class CategoryView(viewsets.ModelViewSet):
     queryset = Category.objects.all()
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['parent_category_id']
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    conditional_scopes = (CATEGORIES, RECIPES)
+    conditional_actions = ('list', 'retrieve', 'tree', 'recipes')
     # def get_queryset(self):
     #     """
     #     Obtiene el conjunto de categorías disponibles.
@@ -48,13 +87,51 @@ class CategoryView(viewsets.ModelViewSet):
             return [IsAdminUser()]  # Solo los administradores pueden hacer cambios (POST, PUT, DELETE)
         return [IsAuthenticatedOrReadOnly()]  # Los usuarios autenticados pueden leer (GET) y no modificar
     
+    def get_queryset(self):
+        """
+        En lectura anota los contadores de recetas e ingredientes que usa `CategorySummarySerializer`.
+        """
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.with_counts()
+        return queryset
+
     def get_serializer_class(self):
         """
-        Determina el serializador a utilizar según el estado del usuario.
+        Determina el serializador a utilizar según la acción y el estado del usuario.
+        Las lecturas usan el resumen con contadores; las escrituras de administrador el serializer completo.
 
         Returns:
             Serializer: Serializador adecuado para el usuario.
         """
+        if self.action in ('list', 'retrieve'):
+            return CategorySummarySerializer
         if self.request.user.is_staff:
             return CategoryAdminSerializer
         return CategorySerializer
+
+    @action(detail=True, methods=['get'])
+    def recipes(self, request, pk=None):
+        """
+        Devuelve paginadas (por cursor, `?limit=`) las recetas completas de una categoría.
+        Con 'descendants=true' incluye también las recetas de todas sus subcategorías. Como el listado de
+        recetas, solo precarga las relaciones que pide la respuesta (`?fields=`, `?include=`, `?exclude=`).
+        """
+        category = self.get_object()
+        descendants = request.query_params.get('descendants') == 'true'
+        serializer_class = RecipeAdminSerializer if request.user.is_staff else RecipeSerializer
+        relations = selected_relations(request, serializer_class.relation_fields)
+        recipes = Recipe.objects.with_relations(relations).in_category(category.pk, descendants=descendants)
+
+        paginator = RecipeCursorPagination()
+        page = paginator.paginate_queryset(recipes, request, view=self)
+        serializer = serializer_class(page, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def tree(self, request):
+        """
+        Devuelve el árbol completo de categorías (`id`, `name`, `depth`, `children`) a partir de la tabla
+        de referencia de categorías, ordenada por la ruta materializada `path`.
+        """
+        return Response(build_category_tree(reference_cache.categories.rows()))
@@ -1,10 +1,13 @@
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAdminUser
+from api import reference_cache
+from api.mixins import ConditionalGetMixin, ReferenceReadMixin
+from api.versioning import INGREDIENTS
 from recipes.models.ingredient import Ingredient
 from recipes.serializers.ingredientSerializer import IngredientSerializer
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(ConditionalGetMixin, ReferenceReadMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet para el modelo Ingredient.  
  
@@ -24,6 +27,8 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_fields = ['id']
     serializer_class = IngredientSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]  # CRUD solo para autenticados, GET para todos
+    conditional_scopes = (INGREDIENTS,)
+    reference_table = reference_cache.approved_ingredients
 
 class IngredientAdminViewSet(viewsets.ModelViewSet):
     """
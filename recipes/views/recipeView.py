@@ -1,16 +1,33 @@
-import random
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
+from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework import filters
+from rest_framework.renderers import BrowsableAPIRenderer
+from api.fieldsets import selected_relations
+from api.mixins import ConditionalGetMixin, ResponseCacheMixin
+from api.renderers import FastJSONRenderer
+from api.response_cache import RECIPE_LIST_TAG, recipe_tag, user_tag
+from api.versioning import RECIPES
 from recipes.models.recipe import Recipe
+from recipes.models.recipeCard import RecipeCard
 from recipes.serializers.recipeSerializer import RecipeSerializer, RecipeAdminSerializer
+from recipes.serializers.recipeCardSerializer import RecipeCardSerializer
+from recipes.filters import RecipeCardFilter, RecipeFilter
+from recipes.pagination import RecipeCardCursorPagination, RecipeCursorPagination, RecipeSearchPagination
+from recipes.services.recipe_sampler import sample_ids
+from recipes.services.recipe_search import search_recipes
+from recipes.services.pantry_matcher import COOKABLE_DEFAULT, COOKABLE_MAX, match_recipes
+from shopping.models.shoppingListItem import ShoppingListItem
 from media.services.image_service import update_image_for_instance
 
+RANDOM_RECIPES_DEFAULT = 5
+RANDOM_RECIPES_MAX = 50
 
-class RecipeViewSet(viewsets.ModelViewSet):
+
+class RecipeViewSet(ConditionalGetMixin, ResponseCacheMixin, viewsets.ModelViewSet):
     """
     ViewSet para el modelo Recipe.
 
@@ -18,9 +35,13 @@ class RecipeViewSet(viewsets.ModelViewSet):
     Usuarios NO autenticados solo pueden hacer GET (listar y ver recetas).
 
     Attributes:
-        queryset (QuerySet): Obtiene todos los objetos Recipe.
+        queryset (QuerySet): Obtiene todos los objetos Recipe con el plan de precarga de relaciones anidadas.
         permission_classes (list): Controla el acceso según autenticación.
         get_serializer_class (func): Selecciona el serializer según el tipo de usuario.
+        pagination_class (RecipeCursorPagination): Paginación por cursor sobre `(created_at, id)`, `?limit=` fija el tamaño de página.
+        conditional_scopes (tuple): Versiones que validan las lecturas condicionales (ETag / Last-Modified).
+        Las lecturas anónimas (listado y detalle) se sirven desde la caché de respuestas (`ResponseCacheMixin`).
+        Las lecturas admiten `?fields=`, `?include=` y `?exclude=`; el plan de precarga se adapta a la forma pedida.
 
     Author:
         {Lorena Martínez}
@@ -30,12 +51,20 @@ class RecipeViewSet(viewsets.ModelViewSet):
     Mofified:
         Agregados filtro
     """
-    queryset = Recipe.objects.all()
+    queryset = Recipe.objects.with_relations()
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
-    filterset_fields = ['user_id', 'id']
+    filterset_class = RecipeFilter
     ordering_fields = ['created_at']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
+    pagination_class = RecipeCursorPagination
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
     permission_classes = [IsAuthenticatedOrReadOnly]
+    conditional_scopes = (RECIPES,)
+    conditional_actions = ('list', 'retrieve', 'search', 'cards')
+
+    def get_queryset(self):
+        relations = selected_relations(self.request, self.get_serializer_class().relation_fields)
+        return Recipe.objects.with_relations(relations)
 
     def get_serializer_class(self):
         user = self.request.user
@@ -43,6 +72,19 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return RecipeAdminSerializer
         return RecipeSerializer
 
+    def get_response_cache_tags(self, data):
+        """
+        Una respuesta depende de cada receta que muestra y de su autor; los listados, además, de la
+        composición del catálogo (altas, bajas y cambios de categorías).
+        """
+        items = data['results'] if self.action == 'list' else [data]
+        tags = [RECIPE_LIST_TAG] if self.action == 'list' else []
+        for item in items:
+            tags.append(recipe_tag(item['id']))
+            if item.get('user'):
+                tags.append(user_tag(item['user']['id']))
+        return tags
+
     def perform_create(self, serializer): 
         recipe = serializer.save(user_id=self.request.user)
 
@@ -58,35 +100,102 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def random(self, request):
         """
-        Returns a specified number of random recipes by picking random IDs.
-        Query parameter 'count' (default: 5) to specify how many random recipes.
-        This method is more efficient than order_by('?') for large tables.
-        Filters (like user_id or current user) applied via get_queryset will work as expected.
+        Devuelve un número de recetas aleatorias sin materializar todos los ids de la tabla.
+        Parámetro de consulta 'count' (por defecto 5, máximo 50) para indicar cuántas recetas.
+        Los filtros del viewset (por ejemplo `user_id`) se aplican antes de muestrear.
+        El muestreo por sondeo de rangos de ids se delega en `recipes.services.recipe_sampler`.
         """
-        count = int(request.query_params.get('count', 5))
-
-        all_recipe_ids = list(self.get_queryset().values_list('id', flat=True))
+        try:
+            count = int(request.query_params.get('count', RANDOM_RECIPES_DEFAULT))
+        except ValueError:
+            count = RANDOM_RECIPES_DEFAULT
+        count = max(1, min(count, RANDOM_RECIPES_MAX))
 
-        if not all_recipe_ids:
+        queryset = self.filter_queryset(self.get_queryset())
+        random_ids = sample_ids(queryset, count)
+        if not random_ids:
             return Response([])
 
-        if len(all_recipe_ids) <= count:
-            random_ids = all_recipe_ids
-        else:
-            random_ids = random.sample(all_recipe_ids, count)
-
-        random_recipes = self.get_queryset().filter(id__in=random_ids)
+        recipes_by_id = {recipe.id: recipe for recipe in self.get_queryset().filter(id__in=random_ids)}
+        random_recipes = [recipes_by_id[recipe_id] for recipe_id in random_ids if recipe_id in recipes_by_id]
 
         serializer = self.get_serializer(random_recipes, many=True)
         return Response(serializer.data)
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
+    @action(detail=False, methods=['get'])
+    def cards(self, request):
+        """
+        Listado ligero de recetas para pantallas de listado, leído de la proyección `RecipeCard`.
+        Admite los filtros `user_id`, `categories` y `categories__descendant_of` y se pagina por cursor
+        igual que el listado completo. Cada página es una sola consulta sobre `recipe_cards`, sin JOIN.
+        """
+        filterset = RecipeCardFilter(request.query_params, queryset=RecipeCard.objects.all(), request=request)
+        if not filterset.is_valid():
+            return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+        paginator = RecipeCardCursorPagination()
+        page = paginator.paginate_queryset(filterset.qs, request, view=self)
+        return paginator.get_paginated_response(RecipeCardSerializer(page, many=True).data)
 
-        # Limitar resultados si se pasa el parámetro 'limit'
-        limit = request.query_params.get('limit')
-        if limit is not None and limit.isdigit():
-            queryset = queryset[:int(limit)]
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Busca recetas por nombre, descripción, texto de los pasos y nombre de los ingredientes.
+        Parámetro de consulta 'q' (obligatorio); los resultados vienen ordenados por relevancia
+        y paginados con `limit`/`offset`. Los filtros del viewset (por ejemplo `user_id`) se aplican antes.
+        La consulta la resuelve `recipes.services.recipe_search` sobre el documento de búsqueda precalculado.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"detail": "El parámetro 'q' es obligatorio."}, status=status.HTTP_400_BAD_REQUEST)
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = search_recipes(self.filter_queryset(self.get_queryset()), query)
+        paginator = RecipeSearchPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def cookable(self, request):
+        """
+        Devuelve las recetas ordenadas por cuántos de los ingredientes disponibles cubren.
+        Parámetro de consulta 'ingredients' con ids separados por comas; si no se indica y el usuario
+        está autenticado se usan los ingredientes de su lista de la compra ('purchased=true' para usar
+        solo los ya comprados). 'limit' (por defecto 20, máximo 50) indica cuántas recetas devolver.
+        Cada receta incluye `match` con `matched`, `total`, `missing` y `coverage`.
+        La puntuación la calcula `recipes.services.pantry_matcher` sobre el índice ingrediente -> recetas.
+        """
+        raw_ids = request.query_params.get('ingredients')
+        if raw_ids:
+            try:
+                ingredient_ids = [int(value) for value in raw_ids.split(',') if value.strip()]
+            except ValueError:
+                return Response({"detail": "El parámetro 'ingredients' debe ser una lista de ids separados por comas."},
+                                status=status.HTTP_400_BAD_REQUEST)
+        elif request.user.is_authenticated:
+            items = ShoppingListItem.objects.filter(user_id=request.user)
+            if request.query_params.get('purchased') == 'true':
+                items = items.filter(is_purchased=True)
+            ingredient_ids = list(items.values_list('ingredient_id', flat=True))
+        else:
+            return Response({"detail": "Indica el parámetro 'ingredients' o inicia sesión para usar tu lista de la compra."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = int(request.query_params.get('limit', COOKABLE_DEFAULT))
+        except ValueError:
+            limit = COOKABLE_DEFAULT
+        limit = max(1, min(limit, COOKABLE_MAX))
+
+        matches = match_recipes(ingredient_ids, self.filter_queryset(self.get_queryset()), limit)
+        if not matches:
+            return Response([])
+
+        recipes_by_id = self.get_queryset().in_bulk([match['recipe_id'] for match in matches])
+        ranked = [(recipes_by_id[match['recipe_id']], match) for match in matches if match['recipe_id'] in recipes_by_id]
+        serializer = self.get_serializer([recipe for recipe, _ in ranked], many=True)
+        data = []
+        for item, (_, match) in zip(serializer.data, ranked):
+            match = dict(match)
+            match.pop('recipe_id')
+            data.append({**item, 'match': match})
+        return Response(data)
@@ -1,4 +1,7 @@
 from rest_framework import serializers
+from api.fields import ReferencePrimaryKeyRelatedField
+from api.fieldsets import DynamicFieldsMixin
+from api.reference_cache import approved_ingredients, units
 from recipes.serializers.ingredientFromSerializer import IngredientFromSerializer
 from recipes.serializers.ingredientSerializer import IngredientSerializer
 from shopping.models.shoppingListItem import ShoppingListItem
@@ -6,7 +9,7 @@ from users.models.user import CustomUser
 from recipes.models.ingredient import Ingredient
 from measurements.models.unit import Unit
 
-class ShoppingListItemSerializer(serializers.ModelSerializer):
+class ShoppingListItemSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
 
     """
     Serializer para el modelo ShoppingListItem, utilizado en vistas de usuarios estándar.
@@ -35,8 +38,11 @@ class ShoppingListItemSerializer(serializers.ModelSerializer):
     """
 
     # ingredient_id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
-    unit = serializers.PrimaryKeyRelatedField(queryset=Unit.objects.all(), allow_null=True, required=False)
+    unit = ReferencePrimaryKeyRelatedField(
+        queryset=Unit.objects.all(), allow_null=True, required=False, reference_table=units
+    )
     ingredient = IngredientFromSerializer(read_only=True, source='ingredient_id')
+    relation_fields = ('ingredient',)
 
     class Meta:
         model = ShoppingListItem
@@ -53,7 +59,7 @@ class ShoppingListItemSerializer(serializers.ModelSerializer):
         read_only_fields = ['user_id']
 
 
-class ShoppingListItemAdminSerializer(serializers.ModelSerializer):
+class ShoppingListItemAdminSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
 
     """
     Serializer para el modelo ShoppingListItem con acceso completo para administradores.
@@ -81,8 +87,12 @@ class ShoppingListItemAdminSerializer(serializers.ModelSerializer):
     """
 
     user_id = serializers.PrimaryKeyRelatedField(queryset=CustomUser.objects.all())
-    ingredient_id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
-    unit = serializers.PrimaryKeyRelatedField(queryset=Unit.objects.all(), allow_null=True, required=False)
+    ingredient_id = ReferencePrimaryKeyRelatedField(
+        queryset=Ingredient.objects.all(), reference_table=approved_ingredients
+    )
+    unit = ReferencePrimaryKeyRelatedField(
+        queryset=Unit.objects.all(), allow_null=True, required=False, reference_table=units
+    )
 
     class Meta:
         model = ShoppingListItem
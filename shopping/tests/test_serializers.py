@@ -2,6 +2,10 @@ import pytest
 from rest_framework.exceptions import ValidationError
 from model_bakery import baker
 from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.fieldsets import FieldSelection
 
 # Import models
 from shopping.models.shoppingListItem import ShoppingListItem
@@ -66,6 +70,21 @@ class TestShoppingListItemSerializers:
         # ingredient_id is writable for functional use, so no read-only assertion here.
 
 
+    def test_shopping_list_item_serializer_field_selection(self, setup_shopping_list_item_serializer_data):
+        """
+        Tests that `?fields=` and `?include=` on a read shape the output and skip the nested ingredient.
+        """
+        item = setup_shopping_list_item_serializer_data['item']
+        factory = APIRequestFactory()
+
+        request = Request(factory.get('/', {'fields': 'quantity_needed,is_purchased'}))
+        data = ShoppingListItemSerializer(instance=item, context={'request': request}).data
+        assert set(data) == {'id', 'quantity_needed', 'is_purchased'}
+
+        data = ShoppingListItemSerializer(instance=item, field_selection=FieldSelection(include={})).data
+        assert 'ingredient' not in data
+        assert data['ingredient_id'] == item.ingredient_id.id
+
     def test_shopping_list_item_serializer_create(self, test_user, test_ingredient, test_unit):
         """
         Tests ShoppingListItemSerializer can create a new ShoppingListItem.
@@ -2,6 +2,7 @@ from rest_framework import viewsets
 from shopping.models.shoppingListItem import ShoppingListItem
 from shopping.serializers.shoppingListItemSerializer import ShoppingListItemSerializer, ShoppingListItemAdminSerializer
 from rest_framework.permissions import IsAuthenticated
+from api.fieldsets import selected_relations
 
 class ShoppingListItemView(viewsets.ModelViewSet):
     """ViewSet para gestionar directamente la lista de la compra del usuario, compuesta\n
@@ -15,7 +16,11 @@ class ShoppingListItemView(viewsets.ModelViewSet):
         user = self.request.user
         if user.is_staff:
             return ShoppingListItem.objects.all()
-        return ShoppingListItem.objects.filter(user_id=user.id)
+        queryset = ShoppingListItem.objects.filter(user_id=user.id)
+        # El ingrediente anidado solo se carga (en la misma consulta) si forma parte de la respuesta.
+        if selected_relations(self.request, ShoppingListItemSerializer.relation_fields):
+            queryset = queryset.select_related('ingredient_id')
+        return queryset
 
     def get_serializer_class(self):
         if self.request.user.is_staff:
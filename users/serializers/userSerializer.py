@@ -1,13 +1,14 @@
 from rest_framework import serializers
+from api.fieldsets import DynamicFieldsMixin
 from ..models.user import CustomUser
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from media.models.image import Image
+from media.services.image_resolver import owner_image
 from media.serializers.image_serializer import ImageListSerializer
 
 
-class CustomUserSerializer(serializers.ModelSerializer):
+class CustomUserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializador del modelo CustomUser para usuarios estándar (solo lectura).
 
@@ -30,6 +31,7 @@ class CustomUserSerializer(serializers.ModelSerializer):
     """
 
     image = serializers.SerializerMethodField()
+    relation_fields = ('image',)
     
     class Meta:
         model = CustomUser
@@ -47,11 +49,11 @@ class CustomUserSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
     def get_image(self, obj):
-        image = Image.objects.filter(external_id=obj.id, type='USER').first()
+        image = owner_image(obj)
         return ImageListSerializer(image).data if image else None
 
 
-class CustomUserAdminSerializer(serializers.ModelSerializer):
+class CustomUserAdminSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializador del modelo CustomUser para la visualización y gestión por parte de usuarios `is_staff`.
 
@@ -79,6 +81,7 @@ class CustomUserAdminSerializer(serializers.ModelSerializer):
     """
 
     image = serializers.SerializerMethodField()
+    relation_fields = ('image',)
 
     class Meta:
         model = CustomUser
@@ -86,7 +89,7 @@ class CustomUserAdminSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
     def get_image(self, obj):
-        image = Image.objects.filter(external_id=obj.id, type='USER').first()
+        image = owner_image(obj)
         return ImageListSerializer(image).data if image else None
 
 
@@ -142,7 +145,7 @@ class CustomUserCreateSerializer(serializers.ModelSerializer):
         return user
 
     def get_image(self, obj):
-        image = Image.objects.filter(external_id=obj.id, type='USER').first()
+        image = owner_image(obj)
         return ImageListSerializer(image).data if image else None
 
 
@@ -210,7 +213,7 @@ class CustomUserUpdateSerializer(serializers.ModelSerializer):
         return instance
 
     def get_image(self, obj):
-        image = Image.objects.filter(external_id=obj.id, type='USER').first()
+        image = owner_image(obj)
         return ImageListSerializer(image).data if image else None
 
 
@@ -248,7 +251,7 @@ class CustomUserAdminUpdateSerializer(serializers.ModelSerializer):
         return instance
 
     def get_image(self, obj):
-        image = Image.objects.filter(external_id=obj.id, type='USER').first()
+        image = owner_image(obj)
         return ImageListSerializer(image).data if image else None
 
 
@@ -274,7 +277,7 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         return token
 
 
-class CustomUserFrontSerializer(serializers.ModelSerializer):
+class CustomUserFrontSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializador del modelo CustomUser para usuarios estándar (solo lectura).
 
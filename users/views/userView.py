@@ -1,5 +1,6 @@
-from django.core.exceptions import PermissionDenied
+from django.core.exceptions import PermissionDenied, ValidationError as DjangoValidationError
 from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -22,9 +23,9 @@ from ..serializers.favoriteSerializer import (
     FavoriteAdminSerializer
 )
 from rest_framework.parsers import MultiPartParser, FormParser
-from media.services.image_service import remove_image_file, update_image_for_instance
+from media.services.image_service import update_image_for_instance
 from media.serializers.image_serializer import ImageAdminSerializer
-from media.models.image import Image
+from media.services.image_resolver import owner_image, prefetch_owner_images
 
 
 class UserRegistrationView(generics.CreateAPIView):
@@ -151,7 +152,8 @@ class AdminUserViewSet(generics.ListCreateAPIView, generics.RetrieveUpdateDestro
         sobre todos los usuarios del sistema. Los serializers utilizados varían en función del tipo de petición
         (GET, POST, PUT/PATCH).
     """
-    queryset = CustomUser.objects.all()
+    # La imagen de cada usuario se carga con una consulta para toda la página (ver `owner_image`).
+    queryset = CustomUser.objects.prefetch_related(prefetch_owner_images())
     permission_classes = [IsAdminUser]  # Only is_staff users can access
 
     def get_serializer_class(self):
@@ -266,22 +268,24 @@ class UserImageUpdateView(APIView):
             return Response({'detail': 'No se ha enviado ninguna imagen.'}, status=status.HTTP_400_BAD_REQUEST)
 
         user = request.user
-        image_obj = update_image_for_instance(
-            image_file=image_file,
-            user_id=user.id,
-            external_id=user.id,
-            image_type='USER'
-        )
+        try:
+            image_obj = update_image_for_instance(
+                image_file=image_file,
+                user_id=user.id,
+                external_id=user.id,
+                image_type='USER'
+            )
+        except DjangoValidationError as e:
+            raise ValidationError({'image': e.messages})
         serializer = ImageAdminSerializer(image_obj)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def delete(self, request, *args, **kwargs):
         user = request.user
-        image_obj = Image.objects.filter(external_id=user.id, type='USER').first()
+        image_obj = owner_image(user)
         if not image_obj:
             return Response({'detail': 'No hay imagen para eliminar.'}, status=status.HTTP_404_NOT_FOUND)
 
-        remove_image_file(user.id, image_obj.url)
         image_obj.delete()
         return Response({'detail': 'Imagen eliminada correctamente.'}, status=status.HTTP_204_NO_CONTENT)
 